@@ -0,0 +1,29 @@
+"""Task listing keyset index
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches GET /api/tasks: WHERE project_id = ? ORDER BY priority DESC, created_at DESC, task_id DESC
+    op.create_index(
+        'ix_task_project_priority_created',
+        'task',
+        ['project_id', sa.text('priority DESC'), sa.text('created_at DESC'), sa.text('task_id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_project_priority_created', table_name='task')
@@ -0,0 +1,66 @@
+"""Indexes for hot filter columns
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial WHERE clause)
+INDEXES = [
+    # routes/tasks.py list_tasks default view (include_archived=False)
+    (
+        'ix_task_project_active',
+        'task',
+        ['project_id', sa.text('priority DESC'), sa.text('created_at DESC'), sa.text('task_id DESC')],
+        'is_archived = false',
+    ),
+    # list_tasks assignee filter
+    ('ix_task_project_assignee', 'task', ['project_id', 'assignee_id'], 'assignee_id IS NOT NULL'),
+    # Subtask counts and parent_task_id filter
+    ('ix_task_parent_task_id', 'task', ['parent_task_id'], 'parent_task_id IS NOT NULL'),
+    # ON DELETE SET NULL from person
+    ('ix_task_assignee_id', 'task', ['assignee_id'], 'assignee_id IS NOT NULL'),
+    # routes/comments.py list_comments ordering
+    ('ix_comment_task_created', 'comment', ['task_id', 'created_at'], None),
+    ('ix_comment_attachment_comment_id', 'comment_attachment', ['comment_id'], None),
+    ('ix_task_attachment_task_id', 'task_attachment', ['task_id'], None),
+    ('ix_task_status_history_task_changed', 'task_status_history', ['task_id', 'changed_at'], None),
+    # services/permissions.py and list_projects / list_teams lookups by person.
+    # The primary keys lead with team_id / project_id, so they don't serve these.
+    ('ix_team_member_person_team', 'team_member', ['person_id', 'team_id'], None),
+    ('ix_project_member_person_project', 'project_member', ['person_id', 'project_id'], None),
+    ('ix_project_team_team_project', 'project_team', ['team_id', 'project_id'], None),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, so build
+    # the indexes outside alembic's migration transaction to avoid locking
+    # writers on a live database.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,60 @@
+"""Per-project change feed
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('project', sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0'))
+
+    op.create_table(
+        'project_change',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.BigInteger(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('changed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['project_id'], ['project.project_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'seq'),
+    )
+
+    # Seed the feed with everything that already exists so a client syncing
+    # from scratch gets a complete snapshot.
+    op.execute("""
+        INSERT INTO project_change (project_id, seq, entity, entity_id)
+        SELECT project_id,
+               row_number() OVER (PARTITION BY project_id ORDER BY entity, entity_id),
+               entity, entity_id
+        FROM (
+            SELECT project_id, 'TASK' AS entity, task_id AS entity_id FROM task
+            UNION ALL
+            SELECT t.project_id, 'COMMENT', c.comment_id FROM comment c JOIN task t ON t.task_id = c.task_id
+            UNION ALL
+            SELECT project_id, 'MEMBER', person_id FROM project_member
+            UNION ALL
+            SELECT project_id, 'TEAM', team_id FROM project_team
+        ) AS existing
+    """)
+    op.execute("""
+        UPDATE project SET change_seq = latest.seq
+        FROM (SELECT project_id, max(seq) AS seq FROM project_change GROUP BY project_id) AS latest
+        WHERE latest.project_id = project.project_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('project_change')
+    op.drop_column('project', 'change_seq')
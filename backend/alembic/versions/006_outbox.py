@@ -0,0 +1,42 @@
+"""Transactional outbox
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox',
+        sa.Column('outbox_id', sa.BigInteger(), nullable=False),
+        sa.Column('topic', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('available_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('failed', sa.Boolean(), nullable=False, server_default='false'),
+        sa.PrimaryKeyConstraint('outbox_id'),
+    )
+    op.create_index(
+        'ix_outbox_pending', 'outbox', ['available_at'],
+        postgresql_where=sa.text('processed_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending', table_name='outbox')
+    op.drop_table('outbox')
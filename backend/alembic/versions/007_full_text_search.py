@@ -0,0 +1,53 @@
+"""Full-text search vectors on tasks and comments
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASK_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+COMMENT_VECTOR = "setweight(to_tsvector('english', text), 'B')"
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites the table under an exclusive
+    # lock; on a large install run this in a maintenance window.
+    op.add_column('task', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(TASK_VECTOR, persisted=True),
+    ))
+    op.add_column('comment', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(COMMENT_VECTOR, persisted=True),
+    ))
+
+    with op.get_context().autocommit_block():
+        for name, table in (('ix_task_search_vector', 'task'), ('ix_comment_search_vector', 'comment')):
+            op.create_index(
+                name,
+                table,
+                ['search_vector'],
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comment_search_vector', table_name='comment')
+    op.drop_index('ix_task_search_vector', table_name='task')
+    op.drop_column('comment', 'search_vector')
+    op.drop_column('task', 'search_vector')
@@ -0,0 +1,44 @@
+"""Trigram indexes for people search
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PERSON_TRGM_INDEXES = (
+    ('ix_person_name_trgm', 'name'),
+    ('ix_person_email_trgm', 'email'),
+)
+
+
+def upgrade() -> None:
+    # Needs CREATE privilege on the database (or a superuser) the first time
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Serves ILIKE '%term%' as well as the similarity operators
+    with op.get_context().autocommit_block():
+        for name, column in PERSON_TRGM_INDEXES:
+            op.create_index(
+                name,
+                'person',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    for name, _ in PERSON_TRGM_INDEXES:
+        op.drop_index(name, table_name='person')
@@ -0,0 +1,29 @@
+"""Size and SHA-256 of attachments
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable, so no table rewrite; existing files stay unknown
+    for table in ('task_attachment', 'comment_attachment'):
+        op.add_column(table, sa.Column('file_size', sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column('sha256', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('comment_attachment', 'task_attachment'):
+        op.drop_column(table, 'sha256')
+        op.drop_column(table, 'file_size')
@@ -0,0 +1,157 @@
+"""Content-addressed, deduplicated attachment storage
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+import hashlib
+import logging
+import os
+import shutil
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Same default as Settings.upload_dir; run with the uploads volume mounted
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', '/app/uploads')
+ATTACHMENT_TABLES = ('task_attachment', 'comment_attachment')
+
+REFCOUNT_FUNCTION = """
+CREATE FUNCTION attachment_blob_refcount() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' AND NEW.sha256 IS NOT NULL THEN
+        UPDATE attachment_blob SET ref_count = ref_count + 1, orphaned_at = NULL
+        WHERE sha256 = NEW.sha256;
+    END IF;
+    IF TG_OP <> 'INSERT' AND OLD.sha256 IS NOT NULL THEN
+        UPDATE attachment_blob
+        SET ref_count = ref_count - 1,
+            orphaned_at = CASE WHEN ref_count = 1 THEN timezone('utc', now()) END
+        WHERE sha256 = OLD.sha256;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _blob_path(sha256: str) -> str:
+    return os.path.join(UPLOAD_DIR, 'blobs', sha256[:2], sha256)
+
+
+def _link_into_store(path: str, target: str) -> None:
+    """Add a legacy file to the blob store without removing the original yet."""
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(path, target)
+    except OSError:
+        # Different filesystem or no hard links: copy, then rename into place
+        shutil.copyfile(path, target + '.part')
+        os.replace(target + '.part', target)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attachment_blob',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('orphaned_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.create_index(
+        'ix_attachment_blob_orphaned', 'attachment_blob', ['orphaned_at'],
+        postgresql_where=sa.text('ref_count = 0'),
+    )
+
+    # Hard-link every existing file into the store under its hash. The
+    # originals stay: this transaction can still roll back (with any later
+    # revision in the same run), and a retry reads them again. The worker
+    # deletes them once these rows have committed (blobs.remove_legacy_files).
+    conn = op.get_bind()
+    for table in ATTACHMENT_TABLES:
+        rows = conn.execute(sa.text(f'SELECT attachment_id, file_path, sha256 FROM {table}')).all()
+        for attachment_id, file_path, sha256 in rows:
+            if not os.path.isfile(file_path):
+                logger.warning('%s %s: %s is missing, leaving it without content', table, attachment_id, file_path)
+                conn.execute(
+                    sa.text(f'UPDATE {table} SET sha256 = NULL, file_size = NULL WHERE attachment_id = :id'),
+                    {'id': attachment_id},
+                )
+                continue
+            sha256 = sha256 or _hash_file(file_path)
+            size = os.path.getsize(file_path)
+            target = _blob_path(sha256)
+            _link_into_store(file_path, target)
+            conn.execute(
+                sa.text(
+                    'INSERT INTO attachment_blob (sha256, size) VALUES (:sha256, :size) '
+                    'ON CONFLICT (sha256) DO NOTHING'
+                ),
+                {'sha256': sha256, 'size': size},
+            )
+            conn.execute(
+                sa.text(f'UPDATE {table} SET sha256 = :sha256, file_size = :size WHERE attachment_id = :id'),
+                {'sha256': sha256, 'size': size, 'id': attachment_id},
+            )
+
+    op.execute("""
+        UPDATE attachment_blob b SET ref_count =
+            (SELECT count(*) FROM task_attachment WHERE sha256 = b.sha256) +
+            (SELECT count(*) FROM comment_attachment WHERE sha256 = b.sha256)
+    """)
+
+    for table in ATTACHMENT_TABLES:
+        op.create_index(f'ix_{table}_sha256', table, ['sha256'])
+        op.create_foreign_key(f'{table}_sha256_fkey', table, 'attachment_blob', ['sha256'], ['sha256'])
+        op.drop_column(table, 'file_path')
+
+    op.execute(REFCOUNT_FUNCTION)
+    for table in ATTACHMENT_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_blob_refcount
+            AFTER INSERT OR DELETE OR UPDATE OF sha256 ON {table}
+            FOR EACH ROW EXECUTE FUNCTION attachment_blob_refcount()
+        """)
+
+
+def downgrade() -> None:
+    # Files stay in the blob store; attachments point straight at them again
+    for table in ATTACHMENT_TABLES:
+        op.execute(f'DROP TRIGGER {table}_blob_refcount ON {table}')
+    op.execute('DROP FUNCTION attachment_blob_refcount()')
+
+    for table in ATTACHMENT_TABLES:
+        op.add_column(table, sa.Column('file_path', sa.String(length=500), nullable=True))
+        op.execute(
+            sa.text(
+                f"UPDATE {table} SET file_path = CASE WHEN sha256 IS NULL THEN '' "
+                f"ELSE :root || '/' || substr(sha256, 1, 2) || '/' || sha256 END"
+            ).bindparams(root=os.path.join(UPLOAD_DIR, 'blobs'))
+        )
+        op.alter_column(table, 'file_path', nullable=False)
+        op.drop_constraint(f'{table}_sha256_fkey', table, type_='foreignkey')
+        op.drop_index(f'ix_{table}_sha256', table_name=table)
+
+    op.drop_index('ix_attachment_blob_orphaned', table_name='attachment_blob')
+    op.drop_table('attachment_blob')
@@ -0,0 +1,38 @@
+"""Resumable upload sessions
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'upload_session',
+        sa.Column('upload_id', sa.String(length=32), nullable=False),
+        sa.Column('person_id', sa.Integer(), sa.ForeignKey('person.person_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('task_id', sa.Integer(), sa.ForeignKey('task.task_id', ondelete='CASCADE'), nullable=True),
+        sa.Column('comment_id', sa.Integer(), sa.ForeignKey('comment.comment_id', ondelete='CASCADE'), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('attachment_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('upload_id'),
+    )
+    op.create_index('ix_upload_session_expires_at', 'upload_session', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_upload_session_expires_at', table_name='upload_session')
+    op.drop_table('upload_session')
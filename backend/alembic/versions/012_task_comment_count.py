@@ -0,0 +1,87 @@
+"""Task comment counts and keyset indexes for comment pages
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_FUNCTION = """
+CREATE FUNCTION task_comment_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NOT NEW.is_system_comment THEN
+        UPDATE task SET comment_count = comment_count + 1 WHERE task_id = NEW.task_id;
+    ELSIF TG_OP = 'DELETE' AND NOT OLD.is_system_comment THEN
+        UPDATE task SET comment_count = comment_count - 1 WHERE task_id = OLD.task_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# (name, columns, partial WHERE clause) on comment; both serve list_comments
+# in either direction, the partial one with include_system=false
+INDEXES = [
+    ('ix_comment_task_created_id', ['task_id', 'created_at', 'comment_id'], None),
+    ('ix_comment_task_user_created_id', ['task_id', 'created_at', 'comment_id'], 'is_system_comment = false'),
+]
+
+
+def upgrade() -> None:
+    op.add_column('task', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(COUNT_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER comment_task_comment_count
+        AFTER INSERT OR DELETE ON comment
+        FOR EACH ROW EXECUTE FUNCTION task_comment_count()
+    """)
+    # CREATE TRIGGER holds off comment writes until this commits, so every
+    # comment is counted exactly once: here or by the trigger
+    op.execute("""
+        UPDATE task t SET comment_count = c.n
+        FROM (
+            SELECT task_id, count(*) AS n FROM comment
+            WHERE is_system_comment = false GROUP BY task_id
+        ) c
+        WHERE c.task_id = t.task_id
+    """)
+
+    # Same approach as 003: build the indexes without blocking writers
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'comment',
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+        # Covered by the first index above
+        op.drop_index('ix_comment_task_created', table_name='comment', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_comment_task_created',
+            'comment',
+            ['task_id', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='comment', postgresql_concurrently=True, if_exists=True)
+
+    op.execute('DROP TRIGGER comment_task_comment_count ON comment')
+    op.execute('DROP FUNCTION task_comment_count()')
+    op.drop_column('task', 'comment_count')
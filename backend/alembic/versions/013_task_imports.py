@@ -0,0 +1,36 @@
+"""Task import checkpoints
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_import',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('project.project_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('import_key', sa.String(length=100), nullable=False),
+        sa.Column('person_id', sa.Integer(), sa.ForeignKey('person.person_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('rows_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('project_id', 'import_key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_import')
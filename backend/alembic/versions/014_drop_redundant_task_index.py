@@ -0,0 +1,40 @@
+"""Drop the partial task listing index duplicating 002's
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 003 creates this alongside 002's ix_task_project_priority_created, on the
+# same keys. The full index serves list_tasks with or without archived
+# tasks, so the partial one only costs writes. Dropped CONCURRENTLY so
+# readers and writers of task aren't blocked on a live database
+INDEX = 'ix_task_project_active'
+COLUMNS = ['project_id', sa.text('priority DESC'), sa.text('created_at DESC'), sa.text('task_id DESC')]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX, table_name='task', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX,
+            'task',
+            COLUMNS,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('is_archived = false'),
+            if_not_exists=True,
+        )
@@ -0,0 +1,45 @@
+"""Person updated_at, bumped when what boards show of a person changes
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# In the database rather than the ORM so edits made outside the API count
+# too; token_version bumps don't, since no response shows them
+TOUCH_FUNCTION = """
+CREATE FUNCTION person_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.add_column('person', sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+    op.execute(TOUCH_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER person_touch
+        BEFORE UPDATE OF name, email, nickname ON person
+        FOR EACH ROW
+        WHEN ((OLD.name, OLD.email, OLD.nickname) IS DISTINCT FROM (NEW.name, NEW.email, NEW.nickname))
+        EXECUTE FUNCTION person_touch()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER person_touch ON person')
+    op.execute('DROP FUNCTION person_touch()')
+    op.drop_column('person', 'updated_at')
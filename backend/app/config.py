@@ -4,10 +4,97 @@ from functools import lru_cache
 
 class Settings(BaseSettings):
     database_url: str = "postgresql://tasker:tasker@db:5432/tasker"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    # Costs a round trip per checkout; pool_recycle alone is usually enough
+    db_pool_pre_ping: bool = True
+    # Server-side statement_timeout in milliseconds, 0 disables. Not applied in
+    # PgBouncer mode (set it on the database role instead).
+    db_statement_timeout_ms: int = 0
+    # Connect through PgBouncer in transaction mode: no client-side pool and no
+    # named prepared statements. LISTEN-based features need a direct connection.
+    db_pgbouncer: bool = False
     secret_key: str = "change-me-in-production-use-a-long-random-string"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24 * 7  # 7 days
+    # Trust identity claims in the token instead of loading Person per request
+    stateless_auth: bool = False
+    token_version_cache_ttl_seconds: float = 300.0
+    # Changing bcrypt_rounds re-hashes existing passwords on next login
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    # In-flight uploads are always written here; attachment files too with "local" storage
     upload_dir: str = "/app/uploads"
+    # "local" (files under upload_dir) or "s3" (any S3-compatible bucket)
+    storage_backend: str = "local"
+    s3_bucket: str = ""
+    # Empty for AWS; e.g. http://minio:9000 for MinIO
+    s3_endpoint_url: str = ""
+    # Endpoint browsers use for presigned URLs, if it differs from s3_endpoint_url
+    s3_public_endpoint_url: str = ""
+    s3_region: str = ""
+    # Empty falls back to boto3's usual credential chain (env, instance role, ...)
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+    # MinIO and most self-hosted stores want path-style bucket URLs
+    s3_path_style: bool = False
+    # Files at least this large go up as multipart uploads in parts of this size
+    s3_multipart_part_bytes: int = 16 * 1024 * 1024
+    # Let browsers PUT straight to the bucket; needs a store that verifies x-amz-checksum-sha256
+    s3_direct_uploads: bool = True
+    presigned_url_expiry_seconds: int = 900
+    # Hand local downloads to nginx (X-Accel-Redirect) when it offers to serve them
+    attachment_accel_redirect: bool = True
+    # Keep nginx's client_max_body_size in step with this
+    max_upload_bytes: int = 100 * 1024 * 1024
+    # Resumable uploads untouched this long are deleted by the worker
+    resumable_upload_expiry_hours: int = 24
+    # Unreferenced attachment blobs are kept this long before the worker deletes them
+    blob_gc_grace_hours: int = 24
+    task_page_size: int = 200
+    task_page_size_max: int = 1000
+    comment_page_size: int = 100
+    comment_page_size_max: int = 500
+    # Deepest level GET /api/tasks/{id}/tree returns or counts
+    task_tree_max_depth: int = 20
+    # Rows validated and inserted per transaction by task imports
+    task_import_batch_size: int = 1000
+    # Cards returned per board column; column counts always cover every task
+    board_column_limit: int = 200
+    # "local" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+    cache_broker: str = "local"
+    permission_cache_ttl_seconds: float = 30.0
+    permission_cache_max_entries: int = 10000
+    # People typeahead results per (caller, term); short so new users show up quickly
+    people_search_cache_ttl_seconds: float = 10.0
+    people_search_cache_max_entries: int = 5000
+    # Push change events over SSE; needs a direct (non-PgBouncer) connection to LISTEN
+    project_events: bool = True
+    event_buffer_size: int = 100
+    event_heartbeat_seconds: float = 15.0
+    # How often an open event stream re-checks that its user can still see the project
+    event_access_check_seconds: float = 60.0
+    # Outbox worker (python -m app.worker)
+    outbox_batch_size: int = 100
+    outbox_poll_seconds: float = 1.0
+    outbox_lease_seconds: float = 60.0
+    # Longest one handler may take (a webhook's connect plus read timeouts);
+    # a batch stops starting messages once less than this is left of its
+    # lease, so keep the lease well above it
+    outbox_handler_seconds: float = 12.0
+    outbox_max_attempts: int = 10
+    outbox_retention_hours: int = 24
+    # /api/metrics is disabled until this is set; scrapers send it as a bearer token
+    metrics_token: str = ""
+    # How long the outbox backlog reported by /api/metrics is reused
+    outbox_stats_ttl_seconds: float = 15.0
+    # POSTed task and comment events; empty disables delivery
+    webhook_url: str = ""
+    webhook_secret: str = ""
+    webhook_timeout_seconds: float = 5.0
 
     class Config:
         env_file = ".env"
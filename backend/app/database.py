@@ -1,14 +1,201 @@
-from sqlalchemy import create_engine
+import threading
+import time
+import uuid
+from sqlalchemy import Engine, create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from typing import AsyncGenerator, Generator
 
 from app.config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+
+class PoolStats:
+    """Checkout wait, connection hold time and timeout counters for one engine's pool.
+
+    Fed by the pool's connect() (see timed_pool()) and by the public pool and
+    dialect events (see instrument_pool()).
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        # Checkouts that left no connection free, so the next one had to wait
+        self.exhausted = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, exhausted: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if exhausted:
+                self.exhausted += 1
+
+    def record_wait(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_checkin(self, held: float) -> None:
+        with self._lock:
+            self.hold_seconds_total += held
+            self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def record_connect(self, took: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds_total += took
+            self.connect_seconds_max = max(self.connect_seconds_max, took)
+
+    def snapshot(self, pool) -> dict:
+        data = {
+            "checkouts": self.checkouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 4),
+            "wait_seconds_max": round(self.wait_seconds_max, 4),
+            "exhausted": self.exhausted,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "connect_seconds_total": round(self.connect_seconds_total, 4),
+            "connect_seconds_max": round(self.connect_seconds_max, 4),
+            "hold_seconds_total": round(self.hold_seconds_total, 4),
+            "hold_seconds_max": round(self.hold_seconds_max, 4),
+        }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return data
+
+
+def timed_pool(pool_class: type, stats: PoolStats) -> type:
+    """Subclass a pool so every checkout records how long the caller waited.
+
+    Times the public Pool.connect(), which every engine checkout goes
+    through, so direct session and worker use counts as well as requests.
+    The wait includes opening a new connection and the pre-ping. A checkout
+    that gives up after pool_timeout is counted as a timeout.
+    """
+
+    class TimedPool(pool_class):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                stats.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record_wait(time.perf_counter() - started, timed_out=False)
+            return connection
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_pool(engine: Engine, stats: PoolStats) -> None:
+    """Feed ``stats`` from the engine's pool events.
+
+    Time spent opening connections runs from the dialect's do_connect to the
+    pool's connect event, and hold time from checkout to checkin. A checkout
+    that takes the last connection the pool may open counts as exhausted.
+    """
+    pool = engine.pool
+    capacity = settings.db_pool_size + settings.db_max_overflow if isinstance(pool, QueuePool) else None
+
+    @event.listens_for(engine, "do_connect")
+    def connect_started(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def connected(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        if started is not None:
+            stats.record_connect(time.perf_counter() - started)
+
+    @event.listens_for(pool, "checkout")
+    def checked_out(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        stats.record_checkout(exhausted=capacity is not None and pool.checkedout() >= capacity)
+
+    @event.listens_for(pool, "checkin")
+    def checked_in(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            stats.record_checkin(time.perf_counter() - started)
+
+
+def _engine_options(pool_class: type, stats: PoolStats, connect_args: dict) -> dict:
+    if settings.db_pgbouncer:
+        # PgBouncer owns the pooling
+        return {"poolclass": timed_pool(NullPool, stats), "connect_args": connect_args}
+    return {
+        "poolclass": timed_pool(pool_class, stats),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+def _sync_connect_args() -> dict:
+    if settings.db_statement_timeout_ms and not settings.db_pgbouncer:
+        return {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return {}
+
+
+def _async_connect_args() -> dict:
+    if settings.db_pgbouncer:
+        # Transaction pooling can hand each statement a different server
+        # connection, so prepared statements must be unnamed and uncached.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    if settings.db_statement_timeout_ms:
+        return {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+    return {}
+
+
+# Sync engine for migrations, scripts and background workers
+sync_pool_stats = PoolStats()
+engine = create_engine(settings.database_url, **_engine_options(QueuePool, sync_pool_stats, _sync_connect_args()))
+instrument_pool(engine, sync_pool_stats)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) used by the API routes
+async_pool_stats = PoolStats()
+async_database_url = make_url(settings.database_url).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(
+    async_database_url,
+    **_engine_options(AsyncAdaptedQueuePool, async_pool_stats, _async_connect_args()),
+)
+instrument_pool(async_engine.sync_engine, async_pool_stats)
+# Objects stay usable after commit; async code can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    return {
+        "async": async_pool_stats.snapshot(async_engine.pool),
+        "sync": sync_pool_stats.snapshot(engine.pool),
+    }
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -16,3 +203,8 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,74 @@
+"""Import tasks from a CSV or NDJSON file without going through the API.
+
+    python -m app.importer backlog.csv --project 3 --as alice@example.com
+
+Same rows and checkpoints as POST /api/tasks/import. The key defaults to
+the file's SHA-256, so running the same file again resumes it.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Person, Project
+from app.services.task_import import IMPORT_FORMATS, import_tasks, parse_records
+from app.services.uploads import UPLOAD_CHUNK_SIZE
+
+
+def _file_key(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _file_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+async def run(args: argparse.Namespace) -> int:
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+    try:
+        async with AsyncSessionLocal() as db:
+            person_id = await db.scalar(select(Person.person_id).where(Person.email == args.email))
+            if person_id is None:
+                print(f"No user with email {args.email}", file=sys.stderr)
+                return 1
+            if await db.get(Project, args.project) is None:
+                print(f"Project {args.project} not found", file=sys.stderr)
+                return 1
+            result = await import_tasks(
+                db, args.project, person_id, parse_records(_file_chunks(args.file), fmt), args.key or _file_key(args.file)
+            )
+    except HTTPException as e:
+        print(e.detail, file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+    print(result.model_dump_json(indent=2))
+    return 0 if result.failed == 0 else 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.importer", description="Import tasks into a project.")
+    parser.add_argument("file", help="CSV with a header row, or one JSON object per line")
+    parser.add_argument("--project", type=int, required=True, help="Project id")
+    parser.add_argument("--as", dest="email", required=True, help="Email of the user the tasks are created by")
+    parser.add_argument("--key", help="Import key to resume; defaults to the file's SHA-256")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to csv for .csv files, else ndjson")
+    args = parser.parse_args()
+    if not os.path.isfile(args.file):
+        parser.error(f"{args.file} is not a file")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
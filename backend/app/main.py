@@ -1,18 +1,35 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import hmac
 import os
 
 from app.config import get_settings
-from app.routes import auth, projects, teams, tasks, comments, attachments
+from app.database import SessionLocal, pool_stats
+from app.routes import auth, projects, teams, tasks, comments, attachments, search
+from app.services.cache import MISSING, TTLCache, cache_stats, get_broker
+from app.services.events import event_hub
+from app.services.outbox import outbox_stats
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.resumable import TUS_EXPOSE_HEADERS
+from app.services.passwords import password_hasher
 
 settings = get_settings()
 
+# Shared by all scrapes, so they cost at most one outbox query per TTL
+outbox_stats_cache = TTLCache("outbox_stats", (), ttl=settings.outbox_stats_ttl_seconds, max_entries=1)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     os.makedirs(settings.upload_dir, exist_ok=True)
+    get_broker().start()
+    if settings.project_events:
+        event_hub.start()
     yield
+    event_hub.stop()
+    get_broker().stop()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -32,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "X-Attachment-Id", *TUS_EXPOSE_HEADERS],
 )
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -40,8 +58,42 @@ app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
 app.include_router(comments.router, prefix="/api/comments", tags=["comments"])
 app.include_router(attachments.router, prefix="/api/attachments", tags=["attachments"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
 
 
 @app.get("/api/health")
 def health_check():
     return {"status": "healthy"}
+
+
+def require_metrics_token(authorization: str = Header("")) -> None:
+    """Metrics expose internal state, so scrapers present METRICS_TOKEN as a bearer token."""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/api/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics():
+    return {
+        "db_pool": pool_stats(),
+        "caches": cache_stats(),
+        "password_hashing": password_hasher.stats(),
+        "project_events": event_hub.stats(),
+        "outbox": _outbox_stats(),
+    }
+
+
+def _outbox_stats() -> dict:
+    stats = outbox_stats_cache.get(())
+    if stats is MISSING:
+        with SessionLocal() as db:
+            stats = outbox_stats(db)
+        outbox_stats_cache.set((), stats)
+    return stats
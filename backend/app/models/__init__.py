@@ -1,9 +1,13 @@
 from app.models.base import Base
 from app.models.person import Person
 from app.models.team import Team, TeamMember, TeamRole
-from app.models.project import Project, ProjectTeam, ProjectMember, ProjectRole
+from app.models.project import Project, ProjectTeam, ProjectMember, ProjectRole, ProjectChange, ChangeEntity
 from app.models.task import Task, TaskTag, TaskWatcher, TaskStatus, TaskAttachment, TaskStatusHistory
 from app.models.comment import Comment, CommentAttachment
+from app.models.outbox import OutboxMessage
+from app.models.blob import AttachmentBlob
+from app.models.upload import UploadSession
+from app.models.task_import import TaskImport
 
 __all__ = [
     "Base",
@@ -15,6 +19,8 @@ __all__ = [
     "ProjectTeam",
     "ProjectMember",
     "ProjectRole",
+    "ProjectChange",
+    "ChangeEntity",
     "Task",
     "TaskTag",
     "TaskWatcher",
@@ -23,4 +29,8 @@ __all__ = [
     "TaskStatusHistory",
     "Comment",
     "CommentAttachment",
+    "OutboxMessage",
+    "AttachmentBlob",
+    "UploadSession",
+    "TaskImport",
 ]
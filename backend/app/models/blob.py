@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AttachmentBlob(Base):
+    """One stored file, shared by every attachment with the same content.
+
+    ``ref_count`` is maintained by triggers on the attachment tables, so it
+    stays right when attachments go away through ON DELETE CASCADE. Blobs
+    that drop to zero are removed by the worker's garbage collection.
+    """
+
+    __tablename__ = "attachment_blob"
+    __table_args__ = (
+        Index("ix_attachment_blob_orphaned", "orphaned_at", postgresql_where=text("ref_count = 0")),
+    )
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # When ref_count last dropped to zero
+    orphaned_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -1,13 +1,22 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey, Boolean, Text, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
 
 
 class Comment(Base):
+    """A comment on a task.
+
+    Inserts and deletes keep ``Task.comment_count`` up to date through a
+    trigger, which skips system comments.
+    """
+
     __tablename__ = "comment"
+    # Don't read the generated search_vector back after every insert
+    __mapper_args__ = {"eager_defaults": False}
 
     comment_id: Mapped[int] = mapped_column(primary_key=True)
     task_id: Mapped[int] = mapped_column(ForeignKey("task.task_id", ondelete="CASCADE"))
@@ -16,6 +25,12 @@ class Comment(Base):
     is_system_comment: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     edited_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Maintained by Postgres; weighted like a task description for ranking
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("setweight(to_tsvector('english', text), 'B')", persisted=True),
+        deferred=True,
+    )
 
     # Relationships
     task: Mapped["Task"] = relationship(back_populates="comments")
@@ -30,7 +45,12 @@ class CommentAttachment(Base):
     comment_id: Mapped[int] = mapped_column(ForeignKey("comment.comment_id", ondelete="CASCADE"))
     file_name: Mapped[str] = mapped_column(String(255))
     file_type: Mapped[str] = mapped_column(String(100))
-    file_path: Mapped[str] = mapped_column(String(500))
+    # Content lives in the AttachmentBlob with this hash; None if the file was
+    # already missing when storage became content-addressed
+    sha256: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("attachment_blob.sha256"), nullable=True, index=True
+    )
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
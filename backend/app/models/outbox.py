@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class OutboxMessage(Base):
+    """A side effect to run after the transaction that enqueued it commits.
+
+    Written in the same transaction as the change it describes and drained
+    by ``python -m app.worker``.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_pending", "available_at", postgresql_where=text("processed_at IS NULL")),
+    )
+
+    outbox_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    topic: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Earliest time a worker may (re)try the message
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Set with processed_at once attempts are exhausted
+    failed: Mapped[bool] = mapped_column(Boolean, default=False)
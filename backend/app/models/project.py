@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 import enum
-from sqlalchemy import String, DateTime, ForeignKey, Enum, Boolean
+from sqlalchemy import String, DateTime, ForeignKey, Enum, Boolean, BigInteger, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -13,6 +13,13 @@ class ProjectRole(str, enum.Enum):
     VIEWER = "VIEWER"
 
 
+class ChangeEntity(str, enum.Enum):
+    TASK = "TASK"  # includes its tags and task attachments
+    COMMENT = "COMMENT"  # includes its comment attachments
+    MEMBER = "MEMBER"  # keyed by person_id
+    TEAM = "TEAM"  # keyed by team_id
+
+
 class Project(Base):
     __tablename__ = "project"
 
@@ -22,6 +29,8 @@ class Project(Base):
     created_by: Mapped[int] = mapped_column(ForeignKey("person.person_id"))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     is_archived: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Last sequence number handed out to a ProjectChange row
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0)
 
     # Relationships
     creator: Mapped["Person"] = relationship("Person")
@@ -51,3 +60,20 @@ class ProjectMember(Base):
     # Relationships
     project: Mapped["Project"] = relationship(back_populates="members")
     person: Mapped["Person"] = relationship(back_populates="project_memberships")
+
+
+class ProjectChange(Base):
+    """One entry in a project's change feed.
+
+    ``seq`` is allocated from ``Project.change_seq`` under the project row lock,
+    so entries become visible in sequence order.
+    """
+
+    __tablename__ = "project_change"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("project.project_id", ondelete="CASCADE"), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    entity: Mapped[ChangeEntity] = mapped_column(Enum(ChangeEntity, native_enum=False, length=20))
+    entity_id: Mapped[int] = mapped_column(Integer)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import Optional
 import enum
-from sqlalchemy import String, DateTime, ForeignKey, Enum, Boolean, Integer, Text
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey, Enum, Boolean, Integer, Text, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -17,6 +18,8 @@ class TaskStatus(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "task"
+    # Don't read the generated search_vector back after every insert
+    __mapper_args__ = {"eager_defaults": False}
 
     task_id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("project.project_id", ondelete="CASCADE"))
@@ -32,6 +35,19 @@ class Task(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_archived: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Comments written by people (not system comments); maintained by a
+    # trigger on comment, so never set it from Python
+    comment_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Maintained by Postgres; deferred so normal task loads don't fetch it
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     # Relationships
     project: Mapped["Project"] = relationship(back_populates="tasks")
@@ -80,7 +96,12 @@ class TaskAttachment(Base):
     task_id: Mapped[int] = mapped_column(ForeignKey("task.task_id", ondelete="CASCADE"))
     file_name: Mapped[str] = mapped_column(String(255))
     file_type: Mapped[str] = mapped_column(String(100))
-    file_path: Mapped[str] = mapped_column(String(500))
+    # Content lives in the AttachmentBlob with this hash; None if the file was
+    # already missing when storage became content-addressed
+    sha256: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("attachment_blob.sha256"), nullable=True, index=True
+    )
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     uploaded_by: Mapped[int] = mapped_column(ForeignKey("person.person_id"))
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
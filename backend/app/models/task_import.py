@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class TaskImport(Base):
+    """Checkpoint of a bulk task import, identified by a key the client chooses.
+
+    Each batch of rows commits together with ``rows_done``, so re-sending
+    the same input under the same key skips the rows already handled.
+    """
+
+    __tablename__ = "task_import"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("project.project_id", ondelete="CASCADE"), primary_key=True)
+    import_key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    person_id: Mapped[int] = mapped_column(ForeignKey("person.person_id", ondelete="CASCADE"))
+    # Input rows handled so far, created or rejected; CSV headers and blank lines don't count
+    rows_done: Mapped[int] = mapped_column(Integer, default=0)
+    created: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Set when a run reaches the end of the input
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
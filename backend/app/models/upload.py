@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class UploadSession(Base):
+    """A resumable upload in progress, for a task or a comment.
+
+    The bytes received so far are in a file named after ``upload_id``; its
+    size is the upload offset, so the row only changes when the session is
+    created, extended or finished.
+    """
+
+    __tablename__ = "upload_session"
+
+    upload_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    person_id: Mapped[int] = mapped_column(ForeignKey("person.person_id", ondelete="CASCADE"))
+    task_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("task.task_id", ondelete="CASCADE"), nullable=True
+    )
+    comment_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("comment.comment_id", ondelete="CASCADE"), nullable=True
+    )
+    file_name: Mapped[str] = mapped_column(String(255))
+    # Total length declared up front (tus Upload-Length)
+    file_size: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Pushed back by every chunk; the worker deletes sessions past it
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    # Set once the last chunk is in and the attachment exists; kept until
+    # expiry so a client that lost that response can still see it finished
+    attachment_id: Mapped[Optional[int]] = mapped_column(nullable=True)
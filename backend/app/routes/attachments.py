@@ -1,176 +1,652 @@
 import os
-import uuid
 import mimetypes
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+from jose import JWTError, jwt
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models import Person, TaskAttachment, CommentAttachment
 from app.config import get_settings
-from app.services.auth import get_current_user
-from app.services.permissions import check_task_access, check_comment_access
+from app.database import get_async_db
+from app.models import ChangeEntity, Comment, Person, Task, TaskAttachment, CommentAttachment, UploadSession
+from app.schemas.attachment import AttachmentLink, DirectUpload, DirectUploadComplete, DirectUploadCreate
+from app.services.auth import create_access_token, get_current_user
+from app.services.blobs import adopt_staged_upload, blob_key, staging_key, store_blob
+from app.services.changes import record_change, comment_project
+from app.services.downloads import content_etag, is_not_modified, not_modified_response, send_file
+from app.services.permissions import check_task_access, check_comment_access, require_project_role
+from app.services.resumable import (
+    TUS_CONTENT_TYPE,
+    TUS_EXTENSIONS,
+    TUS_VERSION,
+    create_session_file,
+    header_int,
+    new_upload_id,
+    parse_metadata,
+    receive_chunk,
+    remove_session_file,
+    remove_temp_file,
+    require_tus,
+    session_expiry,
+    session_offset,
+    tus_headers,
+)
+from app.services.storage import get_storage
+from app.services.uploads import UPLOAD_OPENAPI, ReceivedUpload, receive_upload
 
 router = APIRouter()
 settings = get_settings()
 
 
-@router.post("/task/{task_id}", status_code=status.HTTP_201_CREATED)
-def upload_task_attachment(
+@router.post("/task/{task_id}", status_code=status.HTTP_201_CREATED, openapi_extra=UPLOAD_OPENAPI)
+async def upload_task_attachment(
     task_id: int,
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_task_access(db, task_id, current_user)
+    # Checked before reading the body, so rejected uploads cost nothing
+    task = await check_task_access(db, task_id, current_user)
+    # Don't hold a pooled connection while the body trickles in
+    await db.close()
 
-    file_ext = os.path.splitext(file.filename)[1] if file.filename else ""
-    unique_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(settings.upload_dir, "tasks", str(task_id), unique_name)
-
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-    with open(file_path, "wb") as f:
-        content = file.file.read()
-        f.write(content)
-
-    file_type = mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
+    upload = await receive_upload(request)
 
+    await store_blob(db, upload)
     attachment = TaskAttachment(
         task_id=task_id,
-        file_name=file.filename or "unnamed",
-        file_type=file_type,
-        file_path=file_path,
+        file_name=upload.file_name,
+        file_type=_guess_type(upload.file_name),
+        file_size=upload.size,
+        sha256=upload.sha256,
         uploaded_by=current_user.person_id,
     )
     db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
+    await record_change(db, task.project_id, ChangeEntity.TASK, task_id)
+    await db.commit()
 
-    return {
-        "attachment_id": attachment.attachment_id,
-        "file_name": attachment.file_name,
-        "file_type": attachment.file_type,
-        "uploaded_at": attachment.uploaded_at,
-    }
+    return _upload_response(attachment)
 
 
 @router.get("/task/{attachment_id}/download")
-def download_task_attachment(
+async def download_task_attachment(
     attachment_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    attachment = db.query(TaskAttachment).filter(TaskAttachment.attachment_id == attachment_id).first()
-    if not attachment:
-        raise HTTPException(status_code=404, detail="Attachment not found")
+    attachment = await _get_task_attachment(db, attachment_id, current_user)
+    await db.close()
 
-    check_task_access(db, attachment.task_id, current_user)
+    return _download_response(request, attachment)
 
-    if not os.path.exists(attachment.file_path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
 
-    return FileResponse(
-        attachment.file_path,
-        filename=attachment.file_name,
-        media_type=attachment.file_type,
+@router.get("/task/{attachment_id}/link", response_model=AttachmentLink)
+async def task_attachment_link(
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    attachment = await _get_task_attachment(db, attachment_id, current_user)
+
+    return _download_link(request, attachment)
+
+
+@router.post("/task/{task_id}/direct", status_code=status.HTTP_201_CREATED, response_model=DirectUpload)
+async def start_direct_task_upload(
+    task_id: int,
+    body: DirectUploadCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    await check_task_access(db, task_id, current_user)
+    return _start_direct_upload(f"task:{task_id}", body, current_user)
+
+
+@router.post("/task/{task_id}/direct/complete", status_code=status.HTTP_201_CREATED)
+async def complete_direct_task_upload(
+    task_id: int,
+    body: DirectUploadComplete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    ticket = _read_upload_token(body.upload_token, f"task:{task_id}", current_user)
+    task = await check_task_access(db, task_id, current_user)
+    await db.close()
+
+    await adopt_staged_upload(db, ticket["key"], ticket["sha256"], ticket["size"])
+    attachment = TaskAttachment(
+        task_id=task_id,
+        file_name=ticket["file_name"],
+        file_type=_guess_type(ticket["file_name"]),
+        file_size=ticket["size"],
+        sha256=ticket["sha256"],
+        uploaded_by=current_user.person_id,
     )
+    db.add(attachment)
+    await record_change(db, task.project_id, ChangeEntity.TASK, task_id)
+    await db.commit()
+
+    return _upload_response(attachment)
 
 
 @router.delete("/task/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task_attachment(
+async def delete_task_attachment(
     attachment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    attachment = db.query(TaskAttachment).filter(TaskAttachment.attachment_id == attachment_id).first()
+    attachment = await db.get(TaskAttachment, attachment_id)
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
 
-    check_task_access(db, attachment.task_id, current_user)
-
-    if os.path.exists(attachment.file_path):
-        os.remove(attachment.file_path)
+    task = await check_task_access(db, attachment.task_id, current_user)
 
-    db.delete(attachment)
-    db.commit()
+    # The file is shared by content; garbage collection removes it once unreferenced
+    await record_change(db, task.project_id, ChangeEntity.TASK, task.task_id)
+    await db.delete(attachment)
+    await db.commit()
 
 
-@router.post("/comment/{comment_id}", status_code=status.HTTP_201_CREATED)
-def upload_comment_attachment(
+@router.post("/comment/{comment_id}", status_code=status.HTTP_201_CREATED, openapi_extra=UPLOAD_OPENAPI)
+async def upload_comment_attachment(
     comment_id: int,
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_comment_access(db, comment_id, current_user)
+    await check_comment_access(db, comment_id, current_user)
+    await db.close()
 
-    file_ext = os.path.splitext(file.filename)[1] if file.filename else ""
-    unique_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(settings.upload_dir, "comments", str(comment_id), unique_name)
+    upload = await receive_upload(request)
 
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    await store_blob(db, upload)
+    attachment = CommentAttachment(
+        comment_id=comment_id,
+        file_name=upload.file_name,
+        file_type=_guess_type(upload.file_name),
+        file_size=upload.size,
+        sha256=upload.sha256,
+    )
+    db.add(attachment)
+    await record_change(db, comment_project(comment_id), ChangeEntity.COMMENT, comment_id)
+    await db.commit()
+
+    return _upload_response(attachment)
+
+
+@router.get("/comment/{attachment_id}/download")
+async def download_comment_attachment(
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    attachment = await _get_comment_attachment(db, attachment_id, current_user)
+    await db.close()
 
-    with open(file_path, "wb") as f:
-        content = file.file.read()
-        f.write(content)
+    return _download_response(request, attachment)
 
-    file_type = mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
 
+@router.get("/comment/{attachment_id}/link", response_model=AttachmentLink)
+async def comment_attachment_link(
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    attachment = await _get_comment_attachment(db, attachment_id, current_user)
+
+    return _download_link(request, attachment)
+
+
+@router.post("/comment/{comment_id}/direct", status_code=status.HTTP_201_CREATED, response_model=DirectUpload)
+async def start_direct_comment_upload(
+    comment_id: int,
+    body: DirectUploadCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    await check_comment_access(db, comment_id, current_user)
+    return _start_direct_upload(f"comment:{comment_id}", body, current_user)
+
+
+@router.post("/comment/{comment_id}/direct/complete", status_code=status.HTTP_201_CREATED)
+async def complete_direct_comment_upload(
+    comment_id: int,
+    body: DirectUploadComplete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    ticket = _read_upload_token(body.upload_token, f"comment:{comment_id}", current_user)
+    await check_comment_access(db, comment_id, current_user)
+    await db.close()
+
+    await adopt_staged_upload(db, ticket["key"], ticket["sha256"], ticket["size"])
     attachment = CommentAttachment(
         comment_id=comment_id,
-        file_name=file.filename or "unnamed",
-        file_type=file_type,
-        file_path=file_path,
+        file_name=ticket["file_name"],
+        file_type=_guess_type(ticket["file_name"]),
+        file_size=ticket["size"],
+        sha256=ticket["sha256"],
     )
     db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
+    await record_change(db, comment_project(comment_id), ChangeEntity.COMMENT, comment_id)
+    await db.commit()
 
-    return {
-        "attachment_id": attachment.attachment_id,
-        "file_name": attachment.file_name,
-        "file_type": attachment.file_type,
-        "uploaded_at": attachment.uploaded_at,
-    }
+    return _upload_response(attachment)
 
 
-@router.get("/comment/{attachment_id}/download")
-def download_comment_attachment(
+@router.delete("/comment/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_comment_attachment(
     attachment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    attachment = db.query(CommentAttachment).filter(CommentAttachment.attachment_id == attachment_id).first()
+    attachment = await db.get(CommentAttachment, attachment_id)
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
 
-    check_comment_access(db, attachment.comment_id, current_user)
+    await check_comment_access(db, attachment.comment_id, current_user)
 
-    if not os.path.exists(attachment.file_path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
+    await record_change(db, comment_project(attachment.comment_id), ChangeEntity.COMMENT, attachment.comment_id)
+    await db.delete(attachment)
+    await db.commit()
 
-    return FileResponse(
-        attachment.file_path,
-        filename=attachment.file_name,
-        media_type=attachment.file_type,
+
+@router.options("/resumable")
+async def resumable_upload_options():
+    """tus discovery: protocol version, extensions and size limit."""
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "Tus-Resumable": TUS_VERSION,
+            "Tus-Version": TUS_VERSION,
+            "Tus-Extension": TUS_EXTENSIONS,
+            "Tus-Max-Size": str(settings.max_upload_bytes),
+        },
     )
 
 
-@router.delete("/comment/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment_attachment(
-    attachment_id: int,
-    db: Session = Depends(get_db),
+@router.post("/task/{task_id}/resumable", status_code=status.HTTP_201_CREATED)
+async def create_resumable_task_upload(
+    task_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    attachment = db.query(CommentAttachment).filter(CommentAttachment.attachment_id == attachment_id).first()
-    if not attachment:
+    await check_task_access(db, task_id, current_user)
+    return await _create_resumable_upload(request, db, current_user, task_id=task_id)
+
+
+@router.post("/comment/{comment_id}/resumable", status_code=status.HTTP_201_CREATED)
+async def create_resumable_comment_upload(
+    comment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    await check_comment_access(db, comment_id, current_user)
+    return await _create_resumable_upload(request, db, current_user, comment_id=comment_id)
+
+
+@router.head("/resumable/{upload_id}")
+async def resumable_upload_offset(
+    upload_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    require_tus(request)
+    upload_session = await _get_upload_session(db, upload_id, current_user)
+    offset = await run_in_threadpool(session_offset, upload_session)
+    if offset is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(headers=tus_headers(upload_session, offset))
+
+
+@router.patch("/resumable/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Append a chunk at Upload-Offset; the chunk that completes the file creates the attachment."""
+    require_tus(request)
+    if request.headers.get("content-type") != TUS_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected {TUS_CONTENT_TYPE}",
+        )
+    offset = header_int(request, "upload-offset")
+    upload_session = await _get_upload_session(db, upload_id, current_user)
+    if upload_session.attachment_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already complete",
+            headers={"Upload-Offset": str(upload_session.file_size), "Tus-Resumable": TUS_VERSION},
+        )
+    # Don't hold a pooled connection while the chunk trickles in
+    await db.close()
+
+    offset, upload = await receive_chunk(request, upload_session, offset)
+
+    upload_session.expires_at = session_expiry()
+    headers = tus_headers(upload_session, offset)
+    if upload is None:
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.upload_id == upload_id)
+            .values(expires_at=upload_session.expires_at)
+        )
+        await db.commit()
+    else:
+        attachment = await _finish_resumable_upload(db, upload_session, upload, current_user)
+        headers["X-Attachment-Id"] = str(attachment.attachment_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+
+@router.delete("/resumable/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_resumable_upload(
+    upload_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    require_tus(request)
+    upload_session = await _get_upload_session(db, upload_id, current_user)
+    await db.delete(upload_session)
+    await db.commit()
+    await run_in_threadpool(remove_session_file, upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"Tus-Resumable": TUS_VERSION})
+
+
+@router.get("/files/{token}")
+async def download_file(token: str, request: Request):
+    """Target of download links with local storage; the signed token stands in for auth."""
+    claims = _read_token(token, "file")
+    if "uploaded" not in claims:
+        raise HTTPException(status_code=403, detail="Invalid or expired token")
+    # Blob keys end in the content hash
+    etag = content_etag(claims["key"].rsplit("/", 1)[-1])
+    uploaded_at = datetime.utcfromtimestamp(claims["uploaded"])
+    if is_not_modified(request, etag, uploaded_at):
+        return not_modified_response(etag, uploaded_at)
+    path = get_storage().local_path(claims["key"])
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    return _send_local_file(request, path, etag, uploaded_at, claims["name"], claims["type"])
+
+
+async def _get_task_attachment(db: AsyncSession, attachment_id: int, current_user: Person) -> TaskAttachment:
+    """Load a task attachment the user can see; one query when their role is cached."""
+    row = (
+        await db.execute(
+            select(TaskAttachment, Task.project_id)
+            .join(Task, Task.task_id == TaskAttachment.task_id)
+            .where(TaskAttachment.attachment_id == attachment_id)
+        )
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Attachment not found")
+    await require_project_role(db, row.project_id, current_user)
+    return row.TaskAttachment
+
+
+async def _get_comment_attachment(db: AsyncSession, attachment_id: int, current_user: Person) -> CommentAttachment:
+    """Load a comment attachment the user can see; one query when their role is cached."""
+    row = (
+        await db.execute(
+            select(CommentAttachment, Task.project_id)
+            .join(Comment, Comment.comment_id == CommentAttachment.comment_id)
+            .join(Task, Task.task_id == Comment.task_id)
+            .where(CommentAttachment.attachment_id == attachment_id)
+        )
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    await require_project_role(db, row.project_id, current_user)
+    return row.CommentAttachment
+
+
+def _stored_key(attachment: TaskAttachment | CommentAttachment) -> str:
+    if not attachment.sha256:
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    return blob_key(attachment.sha256)
+
+
+def _download_response(request: Request, attachment: TaskAttachment | CommentAttachment) -> Response:
+    key = _stored_key(attachment)
+    # An attachment's content never changes, so revalidation needs no storage access
+    etag = content_etag(attachment.sha256)
+    if is_not_modified(request, etag, attachment.uploaded_at):
+        return not_modified_response(etag, attachment.uploaded_at)
+
+    storage = get_storage()
+    path = storage.local_path(key)
+    if path is None:
+        # Object storage: the client fetches the bytes from the bucket itself
+        url = storage.download_url(key, attachment.file_name, attachment.file_type)
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return _send_local_file(
+        request, path, etag, attachment.uploaded_at, attachment.file_name, attachment.file_type
+    )
+
 
-    check_comment_access(db, attachment.comment_id, current_user)
+def _send_local_file(
+    request: Request, path: str, etag: str, uploaded_at: datetime, file_name: str, media_type: str
+) -> Response:
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    return send_file(
+        request, path, size, etag=etag, last_modified=uploaded_at, file_name=file_name, media_type=media_type
+    )
 
-    if os.path.exists(attachment.file_path):
-        os.remove(attachment.file_path)
 
-    db.delete(attachment)
-    db.commit()
+def _download_link(request: Request, attachment: TaskAttachment | CommentAttachment) -> AttachmentLink:
+    """A short-lived URL that downloads the file without an Authorization header."""
+    key = _stored_key(attachment)
+    expires_in = timedelta(seconds=settings.presigned_url_expiry_seconds)
+    url = get_storage().download_url(key, attachment.file_name, attachment.file_type)
+    if url is None:
+        token = create_access_token(
+            {
+                "purpose": "file",
+                "key": key,
+                "name": attachment.file_name,
+                "type": attachment.file_type,
+                # Last-Modified for conditional requests, as a Unix timestamp
+                "uploaded": int(attachment.uploaded_at.replace(tzinfo=timezone.utc).timestamp()),
+            },
+            expires_in,
+        )
+        url = request.app.url_path_for("download_file", token=token)
+    return AttachmentLink(url=url, expires_at=datetime.utcnow() + expires_in)
+
+
+def _start_direct_upload(target: str, body: DirectUploadCreate, current_user: Person) -> DirectUpload:
+    if body.file_size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.max_upload_bytes} byte upload limit",
+        )
+    key = staging_key()
+    presigned = get_storage().upload_url(key, body.file_size, body.sha256)
+    if presigned is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Direct uploads are not available; POST the file instead",
+        )
+    url, headers = presigned
+    # Lives as long as an abandoned staged upload is kept
+    token = create_access_token(
+        {
+            "purpose": "upload",
+            "target": target,
+            "person": current_user.person_id,
+            "key": key,
+            "sha256": body.sha256,
+            "size": body.file_size,
+            "file_name": os.path.basename(body.file_name) or "unnamed",
+        },
+        timedelta(hours=settings.blob_gc_grace_hours),
+    )
+    return DirectUpload(
+        upload_token=token,
+        url=url,
+        headers=headers,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.presigned_url_expiry_seconds),
+    )
+
+
+def _read_upload_token(token: str, target: str, current_user: Person) -> dict:
+    claims = _read_token(token, "upload")
+    if claims.get("target") != target or claims.get("person") != current_user.person_id:
+        raise HTTPException(status_code=403, detail="Upload token is for another upload")
+    return claims
+
+
+def _read_token(token: str, purpose: str) -> dict:
+    try:
+        claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Invalid or expired token")
+    if claims.get("purpose") != purpose:
+        raise HTTPException(status_code=403, detail="Invalid or expired token")
+    return claims
+
+
+async def _create_resumable_upload(
+    request: Request,
+    db: AsyncSession,
+    current_user: Person,
+    task_id: int | None = None,
+    comment_id: int | None = None,
+) -> Response:
+    require_tus(request)
+    length = header_int(request, "upload-length")
+    if length > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.max_upload_bytes} byte upload limit",
+        )
+    metadata = parse_metadata(request.headers.get("upload-metadata", ""))
+    upload_session = UploadSession(
+        upload_id=new_upload_id(),
+        person_id=current_user.person_id,
+        task_id=task_id,
+        comment_id=comment_id,
+        file_name=os.path.basename(metadata.get("filename", "")) or "unnamed",
+        file_size=length,
+        expires_at=session_expiry(),
+    )
+    db.add(upload_session)
+    await db.commit()
+    await run_in_threadpool(create_session_file, upload_session.upload_id)
+
+    location = request.app.url_path_for("append_resumable_upload", upload_id=upload_session.upload_id)
+    return Response(
+        status_code=status.HTTP_201_CREATED,
+        headers={"Location": location, **tus_headers(upload_session, 0)},
+    )
+
+
+async def _get_upload_session(db: AsyncSession, upload_id: str, current_user: Person) -> UploadSession:
+    upload_session = await db.get(UploadSession, upload_id)
+    if (
+        upload_session is None
+        or upload_session.person_id != current_user.person_id
+        or upload_session.expires_at < datetime.utcnow()
+    ):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload_session
+
+
+async def _finish_resumable_upload(
+    db: AsyncSession,
+    upload_session: UploadSession,
+    upload: ReceivedUpload,
+    current_user: Person,
+) -> TaskAttachment | CommentAttachment:
+    """Attach a completed resumable upload, the same way a one-shot upload is attached.
+
+    The session's file is only removed once the attachment has committed;
+    until then a failed attempt leaves the upload complete, to retry.
+    """
+    try:
+        attachment = await _attach_resumable_upload(db, upload_session, upload, current_user)
+    finally:
+        # Normally store_blob() has already taken it
+        await run_in_threadpool(remove_temp_file, upload.temp_path)
+    await run_in_threadpool(remove_session_file, upload_session.upload_id)
+    return attachment
+
+
+async def _attach_resumable_upload(
+    db: AsyncSession,
+    upload_session: UploadSession,
+    upload: ReceivedUpload,
+    current_user: Person,
+) -> TaskAttachment | CommentAttachment:
+    if upload_session.task_id is not None:
+        task = await check_task_access(db, upload_session.task_id, current_user)
+        await store_blob(db, upload)
+        attachment = TaskAttachment(
+            task_id=task.task_id,
+            file_name=upload.file_name,
+            file_type=_guess_type(upload.file_name),
+            file_size=upload.size,
+            sha256=upload.sha256,
+            uploaded_by=current_user.person_id,
+        )
+        db.add(attachment)
+        await record_change(db, task.project_id, ChangeEntity.TASK, task.task_id)
+    else:
+        comment_id = upload_session.comment_id
+        await check_comment_access(db, comment_id, current_user)
+        await store_blob(db, upload)
+        attachment = CommentAttachment(
+            comment_id=comment_id,
+            file_name=upload.file_name,
+            file_type=_guess_type(upload.file_name),
+            file_size=upload.size,
+            sha256=upload.sha256,
+        )
+        db.add(attachment)
+        await record_change(db, comment_project(comment_id), ChangeEntity.COMMENT, comment_id)
+    await db.flush()
+    # Two final PATCHes can both get this far; only one attaches the file
+    result = await db.execute(
+        update(UploadSession)
+        .where(UploadSession.upload_id == upload_session.upload_id, UploadSession.attachment_id.is_(None))
+        .values(attachment_id=attachment.attachment_id, expires_at=upload_session.expires_at)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already complete",
+            headers={"Upload-Offset": str(upload_session.file_size), "Tus-Resumable": TUS_VERSION},
+        )
+    await db.commit()
+    return attachment
+
+
+def _guess_type(file_name: str) -> str:
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+def _upload_response(attachment: TaskAttachment | CommentAttachment) -> dict:
+    return {
+        "attachment_id": attachment.attachment_id,
+        "file_name": attachment.file_name,
+        "file_type": attachment.file_type,
+        "file_size": attachment.file_size,
+        "uploaded_at": attachment.uploaded_at,
+    }
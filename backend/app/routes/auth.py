@@ -1,27 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.database import get_db
-from app.models import Person
+from app.database import get_async_db
+from app.models import Person, ProjectMember
 from app.schemas.auth import UserRegister, UserLogin, Token
-from app.schemas.person import PersonResponse
+from app.schemas.person import PersonBrief, PersonResponse
 from app.services.auth import (
-    get_password_hash,
     create_access_token,
     authenticate_user,
     get_current_user,
+    token_claims,
+    revoke_tokens,
 )
+from app.services.cache import MISSING, TTLCache
+from app.services.passwords import password_hasher
+from app.services.permissions import accessible_project_ids
 from app.config import get_settings
 
 router = APIRouter()
 settings = get_settings()
 
+# Typeahead results keyed by (person_id, term, limit). Not invalidated: the
+# TTL is short enough that new users and memberships show up within seconds.
+people_search_cache = TTLCache(
+    "people_search",
+    key_fields=("person_id", "term", "limit"),
+    ttl=settings.people_search_cache_ttl_seconds,
+    max_entries=settings.people_search_cache_max_entries,
+)
+
 
 @router.post("/register", response_model=PersonResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    existing = db.query(Person).filter(Person.email == user_data.email).first()
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(Person).where(Person.email == user_data.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -29,17 +43,16 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         name=user_data.name,
         email=user_data.email,
         nickname=user_data.nickname,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await password_hasher.hash(user_data.password),
     )
     db.add(person)
-    db.commit()
-    db.refresh(person)
+    await db.commit()
     return person
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,41 +60,108 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(
-        data={"sub": str(user.person_id)},
+        data=token_claims(user),
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes),
     )
     return Token(access_token=access_token)
 
 
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Revoke every token issued to the current user, including this one."""
+    await revoke_tokens(db, current_user.person_id)
+
+
 @router.get("/me", response_model=PersonResponse)
-def get_me(current_user: Person = Depends(get_current_user)):
-    return current_user
+async def get_me(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    # Identity-map hit unless stateless auth returned a token identity
+    person = await db.get(Person, current_user.person_id)
+    if person is None:
+        # A stateless token can outlive its person until it expires
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return person
 
 
 @router.get("/people", response_model=list[PersonResponse])
-def list_people(
+async def list_people(
     search: str = "",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
     """List all users, optionally filtered by email/name search."""
-    query = db.query(Person)
+    query = select(Person)
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             (Person.email.ilike(search_term)) | (Person.name.ilike(search_term))
         )
-    return query.limit(50).all()
+    return (await db.scalars(query.limit(50))).all()
+
+
+@router.get("/people/typeahead", response_model=list[PersonBrief])
+async def typeahead_people(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """People matching a partial name or email, best matches first.
+
+    Matches substrings as well as near-misses (trigram word similarity), both
+    served by the trigram indexes. People who share a project with the caller
+    rank ahead of everyone else.
+    """
+    term = q.strip().lower()
+    key = (current_user.person_id, term, limit)
+    cached = people_search_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    shares_project = (
+        select(ProjectMember.person_id)
+        .where(
+            ProjectMember.person_id == Person.person_id,
+            ProjectMember.project_id.in_(accessible_project_ids(current_user.person_id)),
+        )
+        .exists()
+    )
+    similarity = func.greatest(
+        func.word_similarity(term, Person.name),
+        func.word_similarity(term, Person.email),
+    )
+    rows = (await db.execute(
+        select(Person.person_id, Person.name, Person.email, Person.nickname)
+        .where(or_(
+            Person.name.icontains(term, autoescape=True),
+            Person.email.icontains(term, autoescape=True),
+            literal(term).op("<%")(Person.name),
+        ))
+        .order_by(shares_project.desc(), similarity.desc(), Person.name, Person.person_id)
+        .limit(limit)
+    )).all()
+    people = [PersonBrief.model_validate(row) for row in rows]
+    people_search_cache.set(key, people)
+    return people
 
 
 @router.get("/people/{person_id}", response_model=PersonResponse)
-def get_person(
+async def get_person(
     person_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
     """Get a specific user by ID."""
-    person = db.query(Person).filter(Person.person_id == person_id).first()
+    person = await db.get(Person, person_id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
     return person
@@ -1,24 +1,31 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
 
-from app.database import get_db
-from app.models import Person, Comment
+from app.config import get_settings
+from app.database import get_async_db
+from app.models import ChangeEntity, Person, Comment
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
-from app.schemas.person import PersonBrief
 from app.services.auth import get_current_user
+from app.services.changes import record_change, comment_project
+from app.services.outbox import enqueue
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, clamp_page_size
 from app.services.permissions import check_task_access, check_comment_owner
+from app.services.responses import comment_relations, comments_to_response
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
-def create_comment(
+async def create_comment(
     comment_data: CommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_task_access(db, comment_data.task_id, current_user)
+    task = await check_task_access(db, comment_data.task_id, current_user)
 
     comment = Comment(
         task_id=comment_data.task_id,
@@ -27,85 +34,103 @@ def create_comment(
         is_system_comment=False,
     )
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    await db.flush()
+    await record_change(db, task.project_id, ChangeEntity.COMMENT, comment.comment_id)
+    enqueue(db, "comment.created", {
+        "comment_id": comment.comment_id,
+        "task_id": task.task_id,
+        "project_id": task.project_id,
+        "person_id": current_user.person_id,
+        "text": comment.text,
+    })
+    await db.commit()
 
-    return _comment_to_response(db, comment)
+    return await _comment_to_response(db, comment)
 
 
 @router.get("/task/{task_id}", response_model=list[CommentResponse])
-def list_comments(
+async def list_comments(
     task_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    newest_first: bool = True,
+    include_system: bool = True,
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size, capped server-side"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_task_access(db, task_id, current_user)
-
-    comments = (
-        db.query(Comment)
-        .options(joinedload(Comment.person), joinedload(Comment.attachments))
-        .filter(Comment.task_id == task_id)
-        .order_by(Comment.created_at.asc())
-        .all()
+    """List a task's comments newest first (or oldest first), one keyset page at a time.
+
+    When more rows are available the cursor for the next page is returned in
+    the X-Next-Cursor header; a response without it is the last page.
+    """
+    await check_task_access(db, task_id, current_user)
+
+    query = select(Comment).where(Comment.task_id == task_id)
+    if not include_system:
+        query = query.where(Comment.is_system_comment == False)
+
+    sort_key = tuple_(Comment.created_at, Comment.comment_id)
+    if cursor:
+        after = decode_cursor(cursor, datetime, int)
+        query = query.where(sort_key < after if newest_first else sort_key > after)
+
+    if newest_first:
+        order = (Comment.created_at.desc(), Comment.comment_id.desc())
+    else:
+        order = (Comment.created_at.asc(), Comment.comment_id.asc())
+    page_size = clamp_page_size(limit, settings.comment_page_size, settings.comment_page_size_max)
+    result = await db.scalars(
+        query.options(*comment_relations())
+        .order_by(*order)
+        .limit(page_size + 1)
     )
+    comments = result.all()
 
-    return [_comment_to_response(db, c) for c in comments]
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        last = comments[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.comment_id)
+
+    return comments_to_response(comments)
 
 
 @router.patch("/{comment_id}", response_model=CommentResponse)
-def update_comment(
+async def update_comment(
     comment_id: int,
     comment_data: CommentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    comment = check_comment_owner(db, comment_id, current_user)
+    comment = await check_comment_owner(db, comment_id, current_user)
 
     comment.text = comment_data.text
     comment.edited_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(comment)
+    await record_change(db, comment_project(comment_id), ChangeEntity.COMMENT, comment_id)
+    await db.commit()
 
-    return _comment_to_response(db, comment)
+    return await _comment_to_response(db, comment)
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(
+async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    comment = check_comment_owner(db, comment_id, current_user)
-    db.delete(comment)
-    db.commit()
+    comment = await check_comment_owner(db, comment_id, current_user)
+    await record_change(db, comment_project(comment_id), ChangeEntity.COMMENT, comment_id, deleted=True)
+    await db.delete(comment)
+    await db.commit()
 
 
-def _comment_to_response(db: Session, comment: Comment) -> CommentResponse:
+async def _comment_to_response(db: AsyncSession, comment: Comment) -> CommentResponse:
     """Convert comment to response."""
-    comment_with_relations = (
-        db.query(Comment)
-        .options(joinedload(Comment.person), joinedload(Comment.attachments))
-        .filter(Comment.comment_id == comment.comment_id)
-        .first()
-    )
-
-    return CommentResponse(
-        comment_id=comment_with_relations.comment_id,
-        task_id=comment_with_relations.task_id,
-        person_id=comment_with_relations.person_id,
-        text=comment_with_relations.text,
-        is_system_comment=comment_with_relations.is_system_comment,
-        created_at=comment_with_relations.created_at,
-        edited_at=comment_with_relations.edited_at,
-        person=PersonBrief.model_validate(comment_with_relations.person) if comment_with_relations.person else None,
-        attachments=[
-            {
-                "attachment_id": a.attachment_id,
-                "file_name": a.file_name,
-                "file_type": a.file_type,
-                "uploaded_at": a.uploaded_at,
-            }
-            for a in comment_with_relations.attachments
-        ],
+    comment_with_relations = await db.scalar(
+        select(Comment)
+        .options(*comment_relations())
+        .where(Comment.comment_id == comment.comment_id)
+        .execution_options(populate_existing=True)
     )
+    return comments_to_response([comment_with_relations])[0]
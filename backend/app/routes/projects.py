@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, cast, func, literal, select, union
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import Optional
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_async_db
 from app.models import (
     Person,
     Project,
     ProjectMember,
     ProjectTeam,
-    TeamMember,
+    Team,
     ProjectRole,
+    ChangeEntity,
+    ProjectChange,
+    Task,
+    TaskStatus,
 )
 from app.schemas.project import (
     ProjectCreate,
@@ -21,19 +30,37 @@ from app.schemas.project import (
     ProjectMemberResponse,
     ProjectTeamAdd,
     ProjectTeamResponse,
+    BoardColumn,
+    ProjectBoard,
 )
+from app.schemas.change import ProjectChanges
 from app.schemas.person import PersonBrief
+from app.schemas.task import TaskCard
 from app.schemas.team import TeamResponse
 from app.services.auth import get_current_user
-from app.services.permissions import check_project_access, check_project_admin
+from app.services.http_cache import make_etag, etag_matches, not_modified
+from app.services.changes import record_change, load_changes
+from app.services.events import RESYNC, event_hub
+from app.services.export import MEDIA_TYPES, ExportEntity, ExportFormat, export_project
+from app.services.pagination import clamp_page_size, decode_cursor
+from app.services.permissions import (
+    accessible_project_ids,
+    check_project_admin,
+    require_project_role,
+    invalidate_project_roles,
+    resolve_project_access,
+)
 
 router = APIRouter()
+settings = get_settings()
+
+BOARD_CACHE_CONTROL = "private, no-cache"
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-def create_project(
+async def create_project(
     project_data: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
     project = Project(
@@ -42,7 +69,7 @@ def create_project(
         created_by=current_user.person_id,
     )
     db.add(project)
-    db.flush()
+    await db.flush()
 
     # Add creator as admin
     member = ProjectMember(
@@ -51,66 +78,45 @@ def create_project(
         role=ProjectRole.ADMIN,
     )
     db.add(member)
-    db.commit()
-    db.refresh(project)
+    await record_change(db, project.project_id, ChangeEntity.MEMBER, current_user.person_id)
+    await db.commit()
     return project
 
 
 @router.get("", response_model=list[ProjectResponse])
-def list_projects(
+async def list_projects(
     include_archived: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    # Projects via direct membership
-    direct_project_ids = (
-        db.query(ProjectMember.project_id)
-        .filter(ProjectMember.person_id == current_user.person_id)
-        .subquery()
-    )
-
-    # Projects via team membership
-    user_team_ids = (
-        db.query(TeamMember.team_id)
-        .filter(TeamMember.person_id == current_user.person_id)
-        .subquery()
-    )
-    team_project_ids = (
-        db.query(ProjectTeam.project_id)
-        .filter(ProjectTeam.team_id.in_(user_team_ids))
-        .subquery()
-    )
-
-    query = db.query(Project).filter(
-        or_(
-            Project.project_id.in_(direct_project_ids),
-            Project.project_id.in_(team_project_ids),
-        )
+    query = select(Project).where(
+        Project.project_id.in_(accessible_project_ids(current_user.person_id))
     )
 
     if not include_archived:
-        query = query.filter(Project.is_archived == False)
+        query = query.where(Project.is_archived == False)
 
-    return query.all()
+    return (await db.scalars(query)).all()
 
 
 @router.get("/{project_id}", response_model=ProjectWithDetails)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_access(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user)
 
-    project = (
-        db.query(Project)
+    project = await db.scalar(
+        select(Project)
         .options(
-            joinedload(Project.members).joinedload(ProjectMember.person),
-            joinedload(Project.teams).joinedload(ProjectTeam.team),
+            selectinload(Project.members).selectinload(ProjectMember.person),
+            selectinload(Project.teams).selectinload(ProjectTeam.team),
         )
-        .filter(Project.project_id == project_id)
-        .first()
+        .where(Project.project_id == project_id)
     )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
 
     members = [
         ProjectMemberResponse(
@@ -137,14 +143,251 @@ def get_project(
     )
 
 
+@router.get("/{project_id}/board", response_model=ProjectBoard)
+async def get_project_board(
+    project_id: int,
+    request: Request,
+    response: Response,
+    assignee_id: Optional[int] = None,
+    severity: Optional[int] = None,
+    include_archived: bool = False,
+    per_column: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Whole Kanban view: cards grouped by status, column counts and the member roster.
+
+    The ETag is computed from a single aggregate query, so a client polling an
+    unchanged board gets a 304 without the cards or members being loaded.
+    """
+    await require_project_role(db, project_id, current_user)
+    limit = clamp_page_size(per_column, settings.board_column_limit, settings.task_page_size_max)
+
+    etag = make_etag(
+        *(await _board_version(db, project_id)),
+        assignee_id, severity, include_archived, limit,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, BOARD_CACHE_CONTROL)
+
+    filters = [Task.project_id == project_id]
+    if assignee_id:
+        filters.append(Task.assignee_id == assignee_id)
+    if severity:
+        filters.append(Task.severity == severity)
+    if not include_archived:
+        filters.append(Task.is_archived == False)
+
+    # Rank within each column so one huge column can't crowd out the others;
+    # the window count gives every column its full total in the same query.
+    card_order = (Task.priority.desc(), Task.created_at.desc(), Task.task_id.desc())
+    ranked = (
+        select(
+            Task.task_id,
+            func.row_number().over(partition_by=Task.status, order_by=card_order).label("position"),
+            func.count().over(partition_by=Task.status).label("column_total"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(Task, ranked.c.column_total)
+        .join(ranked, ranked.c.task_id == Task.task_id)
+        .where(ranked.c.position <= limit)
+        .options(joinedload(Task.assignee), selectinload(Task.tags))
+        .order_by(*card_order)
+    )).all()
+
+    columns = {s: BoardColumn(status=s, count=0) for s in TaskStatus}
+    for task, column_total in rows:
+        column = columns[task.status]
+        column.count = column_total
+        column.tasks.append(TaskCard.model_validate(task))
+
+    members = (await db.scalars(
+        select(ProjectMember)
+        .options(joinedload(ProjectMember.person))
+        .where(ProjectMember.project_id == project_id)
+        .order_by(ProjectMember.person_id)
+    )).all()
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = BOARD_CACHE_CONTROL
+    return ProjectBoard(
+        project_id=project_id,
+        columns=list(columns.values()),
+        members=[
+            ProjectMemberResponse(person=PersonBrief.model_validate(pm.person), role=pm.role)
+            for pm in members
+        ],
+    )
+
+
+@router.get("/{project_id}/changes", response_model=ProjectChanges)
+async def get_project_changes(
+    project_id: int,
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Delta feed for local-first clients.
+
+    Without ``since`` the feed starts from the beginning, which amounts to a
+    full snapshot. Keep requesting with the returned cursor while ``has_more``
+    is true, then poll with the last cursor.
+    """
+    await require_project_role(db, project_id, current_user)
+    after = decode_cursor(since, int)[0] if since else 0
+    limit = clamp_page_size(limit, settings.task_page_size, settings.task_page_size_max)
+    return await load_changes(db, project_id, after, limit)
+
+
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Server-Sent Events push of the project's change feed.
+
+    Events carry the change-feed entry (entity, id, deleted); clients fetch
+    the new state from /changes. A ``resync`` event means events were
+    dropped and the client should catch up from its last cursor.
+    """
+    if not settings.project_events:
+        raise HTTPException(status_code=404, detail="Project events are disabled")
+    await require_project_role(db, project_id, current_user)
+
+    last_event_id = request.headers.get("last-event-id")
+    after = decode_cursor(last_event_id, int)[0] if last_event_id else None
+
+    # Subscribe before reading the backlog so nothing committed in between is missed
+    subscription = event_hub.subscribe(project_id, current_user.person_id)
+    backlog = []
+    try:
+        if after is not None:
+            entries = (await db.scalars(
+                select(ProjectChange)
+                .where(ProjectChange.project_id == project_id, ProjectChange.seq > after)
+                .order_by(ProjectChange.seq)
+                .limit(settings.event_buffer_size + 1)
+            )).all()
+            if len(entries) > settings.event_buffer_size:
+                backlog = [RESYNC]
+            else:
+                backlog = [
+                    {
+                        "project_id": project_id,
+                        "seq": e.seq,
+                        "entity": e.entity.value,
+                        "id": e.entity_id,
+                        "deleted": e.deleted,
+                    }
+                    for e in entries
+                ]
+        # The stream can stay open for hours; don't hold a pooled connection
+        await db.close()
+    except BaseException:
+        event_hub.unsubscribe(subscription)
+        raise
+
+    async def has_access() -> bool:
+        # Straight from the database: a membership event can arrive before
+        # the role cache is invalidated
+        async with AsyncSessionLocal() as session:
+            try:
+                _, role = await resolve_project_access(session, project_id, current_user)
+            except HTTPException:
+                return False
+        return role is not None
+
+    return StreamingResponse(
+        event_hub.stream(
+            subscription, backlog, settings.event_heartbeat_seconds, has_access, settings.event_access_check_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{project_id}/export")
+async def export_project_data(
+    project_id: int,
+    format: ExportFormat = ExportFormat.NDJSON,
+    entity: Optional[ExportEntity] = Query(
+        None, description="Export only this kind of record; CSV holds one kind and defaults to tasks"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Stream the project's tasks (with tags), comments, status history and attachment metadata.
+
+    Rows are read with server-side cursors and sent as they arrive, so the
+    export starts at once and its size doesn't matter. Attachment contents
+    aren't included.
+    """
+    await require_project_role(db, project_id, current_user)
+    if entity is None and format is ExportFormat.CSV:
+        entity = ExportEntity.TASKS
+    entities = [entity] if entity else list(ExportEntity)
+    # The export reads in a session of its own for as long as it streams
+    await db.close()
+
+    suffix = f"-{entity.value}" if entity else ""
+    return StreamingResponse(
+        export_project(project_id, format, entities),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="project-{project_id}{suffix}.{format.value}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def _board_version(db: AsyncSession, project_id: int) -> tuple:
+    """Cheap fingerprint of everything a project board renders.
+
+    Task edits bump updated_at, deletes change the count, and the roster
+    signature covers member additions, removals and role changes. Comments
+    leave their task's updated_at alone, so the project's change sequence
+    covers the comment counts on cards. Members and assignees are shown by
+    name and email, so the latest Person.updated_at among them covers
+    profile edits.
+    """
+    roster = (
+        select(func.string_agg(
+            cast(ProjectMember.person_id, String) + literal(":") + cast(ProjectMember.role, String),
+            aggregate_order_by(literal(","), ProjectMember.person_id),
+        ))
+        .where(ProjectMember.project_id == project_id)
+        .scalar_subquery()
+    )
+    change_seq = select(Project.change_seq).where(Project.project_id == project_id).scalar_subquery()
+    people = union(
+        select(ProjectMember.person_id).where(ProjectMember.project_id == project_id),
+        select(Task.assignee_id).where(Task.project_id == project_id),
+    )
+    people_version = (
+        select(func.max(Person.updated_at)).where(Person.person_id.in_(people)).scalar_subquery()
+    )
+    row = (await db.execute(
+        select(func.count(Task.task_id), func.max(Task.updated_at), roster, change_seq, people_version)
+        .where(Task.project_id == project_id)
+    )).one()
+    return tuple(row)
+
+
 @router.patch("/{project_id}", response_model=ProjectResponse)
-def update_project(
+async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    project = check_project_admin(db, project_id, current_user)
+    project = await check_project_admin(db, project_id, current_user)
 
     if project_data.name is not None:
         project.name = project_data.name
@@ -153,43 +396,36 @@ def update_project(
     if project_data.is_archived is not None:
         project.is_archived = project_data.is_archived
 
-    db.commit()
-    db.refresh(project)
+    await db.commit()
     return project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    project = check_project_admin(db, project_id, current_user)
-    db.delete(project)
-    db.commit()
+    project = await check_project_admin(db, project_id, current_user)
+    await db.delete(project)
+    await db.commit()
+    await invalidate_project_roles(project_id=project_id)
 
 
 @router.post("/{project_id}/members", response_model=ProjectMemberResponse, status_code=status.HTTP_201_CREATED)
-def add_project_member(
+async def add_project_member(
     project_id: int,
     member_data: ProjectMemberAdd,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_admin(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user, ProjectRole.ADMIN)
 
-    person = db.query(Person).filter(Person.person_id == member_data.person_id).first()
+    person = await db.get(Person, member_data.person_id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
 
-    existing = (
-        db.query(ProjectMember)
-        .filter(
-            ProjectMember.project_id == project_id,
-            ProjectMember.person_id == member_data.person_id,
-        )
-        .first()
-    )
+    existing = await db.get(ProjectMember, (project_id, member_data.person_id))
     if existing:
         raise HTTPException(status_code=400, detail="Already a member")
 
@@ -199,7 +435,9 @@ def add_project_member(
         role=member_data.role,
     )
     db.add(member)
-    db.commit()
+    await record_change(db, project_id, ChangeEntity.MEMBER, member_data.person_id)
+    await db.commit()
+    await invalidate_project_roles(person_id=member_data.person_id, project_id=project_id)
 
     return ProjectMemberResponse(
         person=PersonBrief.model_validate(person),
@@ -208,30 +446,25 @@ def add_project_member(
 
 
 @router.patch("/{project_id}/members/{person_id}", response_model=ProjectMemberResponse)
-def update_project_member(
+async def update_project_member(
     project_id: int,
     person_id: int,
     member_data: ProjectMemberUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_admin(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user, ProjectRole.ADMIN)
 
-    member = (
-        db.query(ProjectMember)
-        .filter(
-            ProjectMember.project_id == project_id,
-            ProjectMember.person_id == person_id,
-        )
-        .first()
-    )
+    member = await db.get(ProjectMember, (project_id, person_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
     member.role = member_data.role
-    db.commit()
+    await record_change(db, project_id, ChangeEntity.MEMBER, person_id)
+    await db.commit()
+    await invalidate_project_roles(person_id=person_id, project_id=project_id)
 
-    person = db.query(Person).filter(Person.person_id == person_id).first()
+    person = await db.get(Person, person_id)
     return ProjectMemberResponse(
         person=PersonBrief.model_validate(person),
         role=member.role,
@@ -239,52 +472,38 @@ def update_project_member(
 
 
 @router.delete("/{project_id}/members/{person_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_project_member(
+async def remove_project_member(
     project_id: int,
     person_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_admin(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user, ProjectRole.ADMIN)
 
-    member = (
-        db.query(ProjectMember)
-        .filter(
-            ProjectMember.project_id == project_id,
-            ProjectMember.person_id == person_id,
-        )
-        .first()
-    )
+    member = await db.get(ProjectMember, (project_id, person_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
-    db.delete(member)
-    db.commit()
+    await record_change(db, project_id, ChangeEntity.MEMBER, person_id, deleted=True)
+    await db.delete(member)
+    await db.commit()
+    await invalidate_project_roles(person_id=person_id, project_id=project_id)
 
 
 @router.post("/{project_id}/teams", response_model=ProjectTeamResponse, status_code=status.HTTP_201_CREATED)
-def add_project_team(
+async def add_project_team(
     project_id: int,
     team_data: ProjectTeamAdd,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_admin(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user, ProjectRole.ADMIN)
 
-    from app.models import Team
-
-    team = db.query(Team).filter(Team.team_id == team_data.team_id).first()
+    team = await db.get(Team, team_data.team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
 
-    existing = (
-        db.query(ProjectTeam)
-        .filter(
-            ProjectTeam.project_id == project_id,
-            ProjectTeam.team_id == team_data.team_id,
-        )
-        .first()
-    )
+    existing = await db.get(ProjectTeam, (project_id, team_data.team_id))
     if existing:
         raise HTTPException(status_code=400, detail="Team already added")
 
@@ -293,30 +512,27 @@ def add_project_team(
         team_id=team_data.team_id,
     )
     db.add(project_team)
-    db.commit()
+    await record_change(db, project_id, ChangeEntity.TEAM, team_data.team_id)
+    await db.commit()
+    await invalidate_project_roles(project_id=project_id)
 
     return ProjectTeamResponse(team=TeamResponse.model_validate(team))
 
 
 @router.delete("/{project_id}/teams/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_project_team(
+async def remove_project_team(
     project_id: int,
     team_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_admin(db, project_id, current_user)
+    await require_project_role(db, project_id, current_user, ProjectRole.ADMIN)
 
-    project_team = (
-        db.query(ProjectTeam)
-        .filter(
-            ProjectTeam.project_id == project_id,
-            ProjectTeam.team_id == team_id,
-        )
-        .first()
-    )
+    project_team = await db.get(ProjectTeam, (project_id, team_id))
     if not project_team:
         raise HTTPException(status_code=404, detail="Team not in project")
 
-    db.delete(project_team)
-    db.commit()
+    await record_change(db, project_id, ChangeEntity.TEAM, team_id, deleted=True)
+    await db.delete(project_team)
+    await db.commit()
+    await invalidate_project_roles(project_id=project_id)
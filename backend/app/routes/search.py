@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import Float, String, and_, case, cast, func, literal, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.config import get_settings
+from app.database import get_async_db
+from app.models import Comment, Person, Task
+from app.schemas.search import SearchKind, SearchResult
+from app.services.auth import get_current_user
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, clamp_page_size
+from app.services.permissions import accessible_project_ids, require_project_role
+
+router = APIRouter()
+settings = get_settings()
+
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=20, MinWords=8, MaxFragments=2, FragmentDelimiter=" ... "'
+
+
+@router.get("", response_model=list[SearchResult])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Web-search syntax: words, \"phrases\", OR, -exclude"),
+    project_id: Optional[int] = None,
+    kind: Optional[SearchKind] = None,
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size, capped server-side"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Full-text search over task names/descriptions and user comments.
+
+    Results are ranked by relevance across both kinds and limited to projects
+    the caller can access. Matching uses the GIN indexes on ``search_vector``;
+    only keys and ranks are sorted, and text and headlines are fetched for
+    the rows on the returned page.
+    """
+    if project_id is not None:
+        await require_project_role(db, project_id, current_user)
+        projects = [project_id]
+    else:
+        projects = accessible_project_ids(current_user.person_id)
+
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    selects = []
+    if kind in (None, SearchKind.TASK):
+        selects.append(
+            select(
+                cast(literal(SearchKind.TASK.value), String).label("kind"),
+                Task.task_id.label("id"),
+                Task.task_id.label("task_id"),
+                Task.project_id.label("project_id"),
+                cast(func.ts_rank(Task.search_vector, query), Float).label("rank"),
+                Task.created_at.label("created_at"),
+            )
+            .where(Task.search_vector.bool_op("@@")(query), Task.project_id.in_(projects))
+        )
+    if kind in (None, SearchKind.COMMENT):
+        selects.append(
+            select(
+                cast(literal(SearchKind.COMMENT.value), String).label("kind"),
+                Comment.comment_id.label("id"),
+                Comment.task_id.label("task_id"),
+                Task.project_id.label("project_id"),
+                cast(func.ts_rank(Comment.search_vector, query), Float).label("rank"),
+                Comment.created_at.label("created_at"),
+            )
+            .join(Task, Task.task_id == Comment.task_id)
+            .where(
+                Comment.search_vector.bool_op("@@")(query),
+                Comment.is_system_comment == False,
+                Task.project_id.in_(projects),
+            )
+        )
+    matches = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+
+    sort_key = tuple_(matches.c.rank, matches.c.kind, matches.c.id)
+    page_query = select(matches)
+    if cursor:
+        page_query = page_query.where(sort_key < decode_cursor(cursor, float, str, int))
+    page_size = clamp_page_size(limit, settings.task_page_size, settings.task_page_size_max)
+    page = (
+        page_query
+        .order_by(matches.c.rank.desc(), matches.c.kind.desc(), matches.c.id.desc())
+        .limit(page_size + 1)
+        .subquery()
+    )
+
+    # Text is only fetched, and headlines only built, for the rows on this page
+    document = case(
+        (page.c.kind == SearchKind.COMMENT.value, Comment.text),
+        else_=func.concat_ws(" ", Task.name, Task.description),
+    )
+    rows = (await db.execute(
+        select(
+            page.c.kind,
+            page.c.id,
+            page.c.task_id,
+            page.c.project_id,
+            Task.name.label("title"),
+            page.c.rank,
+            page.c.created_at,
+            func.ts_headline(SEARCH_CONFIG, document, query, HEADLINE_OPTIONS).label("headline"),
+        )
+        .join(Task, Task.task_id == page.c.task_id)
+        .outerjoin(Comment, and_(page.c.kind == SearchKind.COMMENT.value, Comment.comment_id == page.c.id))
+        .order_by(page.c.rank.desc(), page.c.kind.desc(), page.c.id.desc())
+    )).all()
+
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.rank, last.kind, last.id)
+
+    return [
+        SearchResult(
+            kind=row.kind,
+            task_id=row.task_id,
+            comment_id=row.id if row.kind == SearchKind.COMMENT.value else None,
+            project_id=row.project_id,
+            title=row.title,
+            headline=row.headline,
+            rank=row.rank,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
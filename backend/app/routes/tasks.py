@@ -1,40 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import (
+    Integer,
+    String,
+    any_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    not_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+from starlette.requests import ClientDisconnect
+from datetime import datetime
 from typing import Optional
 
-from app.database import get_db
-from app.models import Person, Task, TaskTag, TaskStatus, TaskStatusHistory
+from app.config import get_settings
+from app.database import get_async_db
+from app.models import ChangeEntity, Person, Task, TaskTag, TaskStatus, TaskStatusHistory
 from app.schemas.task import (
+    BulkOutcome,
+    TaskBulkItem,
+    TaskBulkResult,
+    TaskBulkUpdate,
     TaskCreate,
+    TaskImportResult,
     TaskUpdate,
     TaskResponse,
+    TaskTreeNode,
     TaskWithDetails,
-    TaskTagResponse,
 )
-from app.schemas.person import PersonBrief
 from app.services.auth import get_current_user
-from app.services.permissions import check_project_access, check_task_access
-from app.services.system_comments import log_status_change, log_assignee_change
+from app.services.changes import record_change, record_changes
+from app.services.outbox import enqueue
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, clamp_page_size
+from app.services.permissions import require_project_role, check_task_access
+from app.services.responses import TASK_RELATIONS, task_relations, tasks_to_response
+from app.services.system_comments import (
+    log_assignee_change,
+    log_assignee_changes,
+    log_status_change,
+    log_status_changes,
+)
+from app.services.task_import import IMPORT_OPENAPI, import_format, import_tasks, new_import_key, parse_records
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("", response_model=TaskWithDetails, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     task_data: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_access(db, task_data.project_id, current_user)
+    await require_project_role(db, task_data.project_id, current_user)
 
     if task_data.parent_task_id:
-        parent = db.query(Task).filter(Task.task_id == task_data.parent_task_id).first()
+        parent = await db.get(Task, task_data.parent_task_id)
         if not parent or parent.project_id != task_data.project_id:
             raise HTTPException(status_code=400, detail="Invalid parent task")
 
     if task_data.assignee_id:
-        assignee = db.query(Person).filter(Person.person_id == task_data.assignee_id).first()
+        assignee = await db.get(Person, task_data.assignee_id)
         if not assignee:
             raise HTTPException(status_code=404, detail="Assignee not found")
 
@@ -51,7 +86,7 @@ def create_task(
         created_by=current_user.person_id,
     )
     db.add(task)
-    db.flush()
+    await db.flush()
 
     # Add tags
     for tag_name in task_data.tags:
@@ -67,64 +102,313 @@ def create_task(
     )
     db.add(history)
 
-    db.commit()
-    db.refresh(task)
+    await record_change(db, task.project_id, ChangeEntity.TASK, task.task_id)
+    enqueue(db, "task.created", {
+        **_task_snapshot(task),
+        "task_id": task.task_id,
+        "project_id": task.project_id,
+        "tags": task_data.tags,
+        "created_by": current_user.person_id,
+    })
+    await db.commit()
 
-    return _task_to_response(db, task)
+    return await _task_to_response(db, task)
 
 
 @router.get("", response_model=list[TaskWithDetails])
-def list_tasks(
+async def list_tasks(
+    response: Response,
     project_id: int,
     status: Optional[TaskStatus] = None,
     assignee_id: Optional[int] = None,
     severity: Optional[int] = None,
     include_archived: bool = False,
     parent_task_id: Optional[int] = Query(None, description="Filter by parent task (null for root tasks)"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size, capped server-side"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_project_access(db, project_id, current_user)
+    """List tasks ordered by priority, newest first, one keyset page at a time.
 
-    query = db.query(Task).filter(Task.project_id == project_id)
+    When more rows are available the cursor for the next page is returned in
+    the X-Next-Cursor header.
+    """
+    await require_project_role(db, project_id, current_user)
+
+    query = select(Task).where(Task.project_id == project_id)
 
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if assignee_id:
-        query = query.filter(Task.assignee_id == assignee_id)
+        query = query.where(Task.assignee_id == assignee_id)
     if severity:
-        query = query.filter(Task.severity == severity)
+        query = query.where(Task.severity == severity)
     if not include_archived:
-        query = query.filter(Task.is_archived == False)
+        query = query.where(Task.is_archived == False)
     if parent_task_id is not None:
-        query = query.filter(Task.parent_task_id == parent_task_id)
+        query = query.where(Task.parent_task_id == parent_task_id)
+
+    if cursor:
+        after = decode_cursor(cursor, int, datetime, int)
+        query = query.where(tuple_(Task.priority, Task.created_at, Task.task_id) < after)
+
+    page_size = clamp_page_size(limit, settings.task_page_size, settings.task_page_size_max)
+    result = await db.scalars(
+        query.options(*task_relations())
+        .order_by(Task.priority.desc(), Task.created_at.desc(), Task.task_id.desc())
+        .limit(page_size + 1)
+    )
+    tasks = result.all()
+
+    if len(tasks) > page_size:
+        tasks = tasks[:page_size]
+        last = tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.priority, last.created_at, last.task_id)
 
-    tasks = query.order_by(Task.priority.desc(), Task.created_at.desc()).all()
-    return [_task_to_response(db, t) for t in tasks]
+    return await tasks_to_response(db, tasks)
+
+
+@router.post("/bulk", response_model=TaskBulkResult)
+async def bulk_update_tasks(
+    body: TaskBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Apply one change to many tasks in a single transaction.
+
+    Access is checked once per project; ids that don't exist or aren't
+    visible are reported per item rather than failing the request. Status
+    and assignee changes get their history rows and system comments as in
+    update_task, written with one INSERT ... SELECT each.
+    """
+    requested = list(dict.fromkeys(body.task_ids))
+    outcomes = {task_id: BulkOutcome.NOT_FOUND for task_id in requested}
+    # Access is settled before anything is locked, so ids from other
+    # people's projects can't be used to hold up writes there
+    project_of = dict((await db.execute(
+        select(Task.task_id, Task.project_id).where(Task.task_id.in_(requested))
+    )).all())
+    readable = set()
+    for project_id in sorted(set(project_of.values())):
+        try:
+            await require_project_role(db, project_id, current_user)
+            readable.add(project_id)
+        except HTTPException:
+            pass
+    outcomes.update(
+        (task_id, BulkOutcome.FORBIDDEN) for task_id, project_id in project_of.items() if project_id not in readable
+    )
+
+    # Locked in id order so concurrent bulk updates can't deadlock
+    rows = []
+    if readable:
+        rows = (await db.execute(
+            select(Task.task_id, Task.project_id, Task.status, Task.assignee_id, Task.priority, Task.is_archived)
+            .where(Task.task_id.in_(requested), Task.project_id.in_(readable))
+            .order_by(Task.task_id)
+            .with_for_update()
+        )).all()
+
+    new_assignee = None
+    new_assignee_id = body.assignee_id or None
+    if new_assignee_id:
+        new_assignee = await db.get(Person, new_assignee_id)
+        if not new_assignee:
+            raise HTTPException(status_code=404, detail="Assignee not found")
+
+    changes: dict[int, dict] = {}
+    status_ids, assignee_ids = [], []
+    for row in rows:
+        outcomes[row.task_id] = BulkOutcome.UNCHANGED
+        task_changes = {}
+        if body.status is not None and row.status != body.status:
+            task_changes["status"] = [row.status.value, body.status.value]
+            status_ids.append(row.task_id)
+        if body.assignee_id is not None and row.assignee_id != new_assignee_id:
+            task_changes["assignee_id"] = [row.assignee_id, new_assignee_id]
+            assignee_ids.append(row.task_id)
+        if body.priority is not None and row.priority != body.priority:
+            task_changes["priority"] = [row.priority, body.priority]
+        if body.is_archived is not None and row.is_archived != body.is_archived:
+            task_changes["is_archived"] = [row.is_archived, body.is_archived]
+        changes[row.task_id] = task_changes
+    allowed_ids = list(changes)
+
+    # History and system comments read the old values, so they go first
+    now = datetime.utcnow()
+    new_comments = []
+    if status_ids:
+        await db.execute(
+            insert(TaskStatusHistory).from_select(
+                ["task_id", "old_status", "new_status", "changed_by", "changed_at"],
+                select(
+                    Task.task_id,
+                    Task.status,
+                    literal(body.status, TaskStatusHistory.new_status.type),
+                    literal(current_user.person_id),
+                    literal(now),
+                ).where(Task.task_id.in_(status_ids)),
+            )
+        )
+        new_comments += await log_status_changes(db, status_ids, body.status, current_user)
+    if assignee_ids:
+        new_comments += await log_assignee_changes(db, assignee_ids, new_assignee, current_user)
+
+    field_ids = [task_id for task_id in allowed_ids if changes[task_id]]
+    if field_ids:
+        values = {"updated_at": now}
+        if body.status is not None:
+            values["status"] = body.status
+        if body.assignee_id is not None:
+            values["assignee_id"] = new_assignee_id
+        if body.priority is not None:
+            values["priority"] = body.priority
+        if body.is_archived is not None:
+            values["is_archived"] = body.is_archived
+        await db.execute(
+            update(Task).where(Task.task_id.in_(field_ids)).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    tagged_ids = set()
+    if allowed_ids and body.add_tags:
+        tags = func.unnest(cast(list(dict.fromkeys(body.add_tags)), ARRAY(String))).table_valued("tag").render_derived()
+        tagged_ids.update((await db.scalars(
+            pg_insert(TaskTag)
+            .from_select(
+                ["task_id", "tag"],
+                select(Task.task_id, tags.c.tag).join(tags, true()).where(Task.task_id.in_(allowed_ids)),
+            )
+            .on_conflict_do_nothing()
+            .returning(TaskTag.task_id)
+        )).all())
+    if allowed_ids and body.remove_tags:
+        tagged_ids.update((await db.scalars(
+            delete(TaskTag)
+            .where(TaskTag.task_id.in_(allowed_ids), TaskTag.tag.in_(body.remove_tags))
+            .returning(TaskTag.task_id)
+            .execution_options(synchronize_session=False)
+        )).all())
+    # As in update_task, touch tasks whose tags changed so board ETags notice
+    tag_only_ids = tagged_ids.difference(field_ids)
+    if tag_only_ids:
+        await db.execute(
+            update(Task).where(Task.task_id.in_(tag_only_ids)).values(updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    updated_ids = [task_id for task_id in allowed_ids if changes[task_id] or task_id in tagged_ids]
+    if updated_ids:
+        await _record_bulk_update(db, rows, updated_ids, changes, tagged_ids, new_comments, current_user)
+        await db.commit()
+        outcomes.update((task_id, BulkOutcome.UPDATED) for task_id in updated_ids)
+    else:
+        # Only the row locks to let go of
+        await db.rollback()
+
+    return TaskBulkResult(
+        updated=len(updated_ids),
+        results=[TaskBulkItem(task_id=i, outcome=outcomes[i]) for i in requested],
+    )
+
+
+@router.post("/import", response_model=TaskImportResult, openapi_extra=IMPORT_OPENAPI)
+async def import_project_tasks(
+    request: Request,
+    project_id: int,
+    key: Optional[str] = Query(
+        None, max_length=100, description="Key chosen by the client; re-sending the same body with it resumes an interrupted import"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    """Create tasks from a CSV or NDJSON body, streamed and written in batches.
+
+    Rows take TaskCreate's fields, with ``assignee_email`` as an
+    alternative to ``assignee_id``. Bad rows are reported by number and
+    don't stop the rest. If the upload breaks off, send the same body with
+    the same key and rows that already went in are skipped.
+    """
+    await require_project_role(db, project_id, current_user)
+    fmt = import_format(request.headers.get("content-type", ""))
+    try:
+        return await import_tasks(
+            db, project_id, current_user.person_id, parse_records(request.stream(), fmt), key or new_import_key()
+        )
+    except ClientDisconnect:
+        # Nobody is listening; batches committed so far are kept for a retry
+        raise HTTPException(status_code=400, detail="Upload interrupted")
 
 
 @router.get("/{task_id}", response_model=TaskWithDetails)
-def get_task(
+async def get_task(
+    task_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Person = Depends(get_current_user),
+):
+    task = await check_task_access(db, task_id, current_user)
+    return await _task_to_response(db, task)
+
+
+@router.get("/{task_id}/tree", response_model=TaskTreeNode)
+async def get_task_tree(
     task_id: int,
-    db: Session = Depends(get_db),
+    max_depth: Optional[int] = Query(None, ge=0, description="Levels of subtasks to return, capped server-side"),
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    task = check_task_access(db, task_id, current_user)
-    return _task_to_response(db, task)
+    """A task and its subtasks, nested, with per-status counts of every descendant.
+
+    The whole tree comes from one recursive query. Subtasks deeper than
+    max_depth are left out of ``children`` but still counted in their
+    ancestors' ``status_counts``. Archived subtasks, and everything below
+    them, are skipped unless include_archived is set.
+    """
+    await check_task_access(db, task_id, current_user)
+    depth_limit = settings.task_tree_max_depth
+    max_depth = depth_limit if max_depth is None else min(max_depth, depth_limit)
+
+    rows = (await db.execute(_subtree_query(task_id, max_depth, depth_limit, include_archived))).all()
+
+    nodes: dict[int, TaskTreeNode] = {}
+    for row in rows:
+        task = row.Task
+        node = TaskTreeNode(
+            task_id=task.task_id,
+            parent_task_id=task.parent_task_id,
+            name=task.name,
+            status=task.status,
+            assignee_id=task.assignee_id,
+            priority=task.priority,
+            severity=task.severity,
+            due_date=task.due_date,
+            is_archived=task.is_archived,
+            depth=row.depth,
+            subtask_count=row.subtask_count or 0,
+            status_counts={s: getattr(row, s.value) or 0 for s in TaskStatus},
+        )
+        nodes[task.task_id] = node
+        # Rows come parents first, so the parent is already there
+        if row.depth > 0:
+            nodes[task.parent_task_id].children.append(node)
+    return nodes[task_id]
 
 
 @router.patch("/{task_id}", response_model=TaskWithDetails)
-def update_task(
+async def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    task = check_task_access(db, task_id, current_user)
+    task = await check_task_access(db, task_id, current_user)
 
-    # Track changes for system comments
+    # Track changes for system comments and the task.updated event
+    before = _task_snapshot(task)
     old_status = task.status
-    old_assignee = task.assignee
+    system_comments = []
 
     if task_data.name is not None:
         task.name = task_data.name
@@ -149,7 +433,7 @@ def update_task(
             changed_by=current_user.person_id,
         )
         db.add(history)
-        log_status_change(db, task, old_status, task.status, current_user)
+        system_comments.append(log_status_change(db, task, old_status, task.status, current_user))
 
     # Handle assignee change
     if task_data.assignee_id is not None:
@@ -157,83 +441,184 @@ def update_task(
         old_assignee_id = task.assignee_id
 
         if new_assignee_id != old_assignee_id:
+            new_assignee = None
             if new_assignee_id:
-                assignee = db.query(Person).filter(Person.person_id == new_assignee_id).first()
-                if not assignee:
+                new_assignee = await db.get(Person, new_assignee_id)
+                if not new_assignee:
                     raise HTTPException(status_code=404, detail="Assignee not found")
-                task.assignee_id = new_assignee_id
-            else:
-                task.assignee_id = None
+            task.assignee_id = new_assignee_id
 
-            new_assignee = db.query(Person).filter(Person.person_id == task.assignee_id).first() if task.assignee_id else None
-            log_assignee_change(db, task, old_assignee, new_assignee, current_user)
+            old_assignee = await db.get(Person, old_assignee_id) if old_assignee_id else None
+            system_comments.append(log_assignee_change(db, task, old_assignee, new_assignee, current_user))
 
     # Handle tags
     if task_data.tags is not None:
-        db.query(TaskTag).filter(TaskTag.task_id == task.task_id).delete()
+        await db.execute(delete(TaskTag).where(TaskTag.task_id == task.task_id))
+        # Tag rows live in their own table; touch the task so readers keyed on
+        # updated_at (board ETags) see the change.
+        task.updated_at = datetime.utcnow()
         for tag_name in task_data.tags:
             tag = TaskTag(task_id=task.task_id, tag=tag_name)
             db.add(tag)
 
-    db.commit()
-    db.refresh(task)
-    return _task_to_response(db, task)
+    await db.flush()
+    await record_change(db, task.project_id, ChangeEntity.TASK, task.task_id)
+    for comment in system_comments:
+        await record_change(db, task.project_id, ChangeEntity.COMMENT, comment.comment_id)
+    after = _task_snapshot(task)
+    changes = {field: [before[field], after[field]] for field in before if before[field] != after[field]}
+    if changes or task_data.tags is not None:
+        enqueue(db, "task.updated", {
+            "task_id": task.task_id,
+            "project_id": task.project_id,
+            "changes": changes,
+            "tags": task_data.tags,
+            "changed_by": current_user.person_id,
+        })
+    await db.commit()
+    return await _task_to_response(db, task)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    task = check_task_access(db, task_id, current_user)
-    db.delete(task)
-    db.commit()
-
-
-def _task_to_response(db: Session, task: Task) -> TaskWithDetails:
-    """Convert task to response with all details."""
-    subtask_count = db.query(func.count(Task.task_id)).filter(Task.parent_task_id == task.task_id).scalar()
-
-    task_with_relations = (
-        db.query(Task)
-        .options(
-            joinedload(Task.assignee),
-            joinedload(Task.creator),
-            joinedload(Task.tags),
-            joinedload(Task.attachments),
+    task = await check_task_access(db, task_id, current_user)
+    # Subtasks lose their parent (the delete sets parent_task_id to NULL), so
+    # feed readers need them as changed too
+    child_ids = (await db.scalars(
+        select(Task.task_id).where(Task.parent_task_id == task.task_id).order_by(Task.task_id)
+    )).all()
+    await record_change(db, task.project_id, ChangeEntity.TASK, task.task_id, deleted=True)
+    await record_changes(db, task.project_id, ChangeEntity.TASK, list(child_ids))
+    enqueue(db, "task.deleted", {
+        "task_id": task.task_id,
+        "project_id": task.project_id,
+        "name": task.name,
+        "deleted_by": current_user.person_id,
+    })
+    await db.delete(task)
+    await db.commit()
+
+
+TASK_EVENT_FIELDS = ("name", "description", "status", "assignee_id", "severity", "priority", "due_date", "is_archived")
+
+
+def _task_snapshot(task: Task) -> dict:
+    """JSON-ready values of the task fields reported in outbox events."""
+    snapshot = {}
+    for field in TASK_EVENT_FIELDS:
+        value = getattr(task, field)
+        if isinstance(value, TaskStatus):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        snapshot[field] = value
+    return snapshot
+
+
+async def _record_bulk_update(
+    db: AsyncSession,
+    rows: list,
+    updated_ids: list[int],
+    changes: dict[int, dict],
+    tagged_ids: set[int],
+    new_comments: list,
+    current_user: Person,
+) -> None:
+    """Change-feed entries and task.updated events for a bulk update."""
+    tag_lists = {}
+    if tagged_ids:
+        tag_lists = dict((await db.execute(
+            select(TaskTag.task_id, func.array_agg(TaskTag.tag))
+            .where(TaskTag.task_id.in_(tagged_ids))
+            .group_by(TaskTag.task_id)
+        )).all())
+
+    project_of = {row.task_id: row.project_id for row in rows}
+    for project_id in sorted({project_of[task_id] for task_id in updated_ids}):
+        await record_changes(
+            db, project_id, ChangeEntity.TASK,
+            [task_id for task_id in updated_ids if project_of[task_id] == project_id],
+        )
+        await record_changes(
+            db, project_id, ChangeEntity.COMMENT,
+            [c.comment_id for c in new_comments if project_of[c.task_id] == project_id],
+        )
+    for task_id in updated_ids:
+        enqueue(db, "task.updated", {
+            "task_id": task_id,
+            "project_id": project_of[task_id],
+            "changes": changes[task_id],
+            "tags": sorted(tag_lists.get(task_id, [])) if task_id in tagged_ids else None,
+            "changed_by": current_user.person_id,
+        })
+
+
+def _subtree_query(task_id: int, max_depth: int, depth_limit: int, include_archived: bool):
+    """Tasks of a subtree down to max_depth, each with rollups over its descendants.
+
+    A recursive CTE walks the tree to depth_limit, carrying every row's
+    ancestor ids. Unnesting those gives one (ancestor, descendant) pair per
+    level, which is all the rollups need: per-status counts and, where the
+    ancestor is the direct parent, the subtask count.
+    """
+    root = (
+        select(
+            Task.task_id,
+            Task.parent_task_id,
+            Task.status,
+            literal(0).label("depth"),
+            cast(literal_column("'{}'"), ARRAY(Integer)).label("ancestors"),
         )
-        .filter(Task.task_id == task.task_id)
-        .first()
+        .where(Task.task_id == task_id)
+        .cte("subtree", recursive=True)
     )
-
-    return TaskWithDetails(
-        task_id=task_with_relations.task_id,
-        project_id=task_with_relations.project_id,
-        parent_task_id=task_with_relations.parent_task_id,
-        name=task_with_relations.name,
-        description=task_with_relations.description,
-        assignee_id=task_with_relations.assignee_id,
-        status=task_with_relations.status,
-        severity=task_with_relations.severity,
-        priority=task_with_relations.priority,
-        due_date=task_with_relations.due_date,
-        created_by=task_with_relations.created_by,
-        created_at=task_with_relations.created_at,
-        updated_at=task_with_relations.updated_at,
-        is_archived=task_with_relations.is_archived,
-        tags=[TaskTagResponse(tag=t.tag) for t in task_with_relations.tags],
-        assignee=PersonBrief.model_validate(task_with_relations.assignee) if task_with_relations.assignee else None,
-        creator=PersonBrief.model_validate(task_with_relations.creator) if task_with_relations.creator else None,
-        attachments=[
-            {
-                "attachment_id": a.attachment_id,
-                "file_name": a.file_name,
-                "file_type": a.file_type,
-                "uploaded_by": a.uploaded_by,
-                "uploaded_at": a.uploaded_at,
-            }
-            for a in task_with_relations.attachments
-        ],
-        subtask_count=subtask_count,
+    child = aliased(Task)
+    step = (
+        select(
+            child.task_id,
+            child.parent_task_id,
+            child.status,
+            root.c.depth + 1,
+            func.array_append(root.c.ancestors, root.c.task_id),
+        )
+        .join(root, child.parent_task_id == root.c.task_id)
+        # The cycle check only guards against bad data; the API can't create cycles
+        .where(root.c.depth < depth_limit, not_(child.task_id == any_(root.c.ancestors)))
+    )
+    if not include_archived:
+        step = step.where(child.is_archived == False)
+    subtree = root.union_all(step)
+
+    pairs = select(
+        func.unnest(subtree.c.ancestors).label("ancestor_id"),
+        subtree.c.parent_task_id,
+        subtree.c.status,
+    ).subquery()
+    rollups = (
+        select(
+            pairs.c.ancestor_id,
+            func.count().filter(pairs.c.parent_task_id == pairs.c.ancestor_id).label("subtask_count"),
+            *(func.count().filter(pairs.c.status == s).label(s.value) for s in TaskStatus),
+        )
+        .group_by(pairs.c.ancestor_id)
+        .subquery()
+    )
+    return (
+        select(Task, subtree.c.depth, *(c for c in rollups.c if c.name != "ancestor_id"))
+        .join(subtree, subtree.c.task_id == Task.task_id)
+        .outerjoin(rollups, rollups.c.ancestor_id == Task.task_id)
+        .where(subtree.c.depth <= max_depth)
+        .order_by(subtree.c.depth, Task.priority.desc(), Task.created_at.desc(), Task.task_id.desc())
     )
+
+
+async def _task_to_response(db: AsyncSession, task: Task) -> TaskWithDetails:
+    """Convert task to response with all details."""
+    # Load the relations onto the task the caller already has, rather than
+    # selecting it again
+    await db.refresh(task, list(TASK_RELATIONS))
+    return (await tasks_to_response(db, [task]))[0]
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db
-from app.models import Person, Team, TeamMember, TeamRole
+from app.database import get_async_db
+from app.models import ChangeEntity, Person, ProjectTeam, Team, TeamMember, TeamRole
 from app.schemas.team import (
     TeamCreate,
     TeamUpdate,
@@ -14,15 +16,16 @@ from app.schemas.team import (
 )
 from app.schemas.person import PersonBrief
 from app.services.auth import get_current_user
-from app.services.permissions import check_team_access
+from app.services.changes import record_change
+from app.services.permissions import check_team_access, invalidate_project_roles
 
 router = APIRouter()
 
 
 @router.post("", response_model=TeamResponse, status_code=status.HTTP_201_CREATED)
-def create_team(
+async def create_team(
     team_data: TeamCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
     team = Team(
@@ -31,7 +34,7 @@ def create_team(
         created_by=current_user.person_id,
     )
     db.add(team)
-    db.flush()
+    await db.flush()
 
     # Add creator as owner
     member = TeamMember(
@@ -40,38 +43,36 @@ def create_team(
         role=TeamRole.OWNER,
     )
     db.add(member)
-    db.commit()
-    db.refresh(team)
+    await db.commit()
     return team
 
 
 @router.get("", response_model=list[TeamResponse])
-def list_teams(
-    db: Session = Depends(get_db),
+async def list_teams(
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
     # Return teams user is member of
     team_ids = (
-        db.query(TeamMember.team_id)
-        .filter(TeamMember.person_id == current_user.person_id)
-        .subquery()
+        select(TeamMember.team_id)
+        .where(TeamMember.person_id == current_user.person_id)
     )
-    teams = db.query(Team).filter(Team.team_id.in_(team_ids)).all()
-    return teams
+    teams = await db.scalars(select(Team).where(Team.team_id.in_(team_ids)))
+    return teams.all()
 
 
 @router.get("/{team_id}", response_model=TeamWithMembers)
-def get_team(
+async def get_team(
     team_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    team = check_team_access(db, team_id, current_user)
-    team = (
-        db.query(Team)
-        .options(joinedload(Team.members).joinedload(TeamMember.person))
-        .filter(Team.team_id == team_id)
-        .first()
+    await check_team_access(db, team_id, current_user)
+    team = await db.scalar(
+        select(Team)
+        .options(selectinload(Team.members).selectinload(TeamMember.person))
+        .where(Team.team_id == team_id)
+        .execution_options(populate_existing=True)
     )
 
     members = []
@@ -94,56 +95,52 @@ def get_team(
 
 
 @router.patch("/{team_id}", response_model=TeamResponse)
-def update_team(
+async def update_team(
     team_id: int,
     team_data: TeamUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    team = check_team_access(db, team_id, current_user, require_owner=True)
+    team = await check_team_access(db, team_id, current_user, require_owner=True)
 
     if team_data.name is not None:
         team.name = team_data.name
     if team_data.description is not None:
         team.description = team_data.description
 
-    db.commit()
-    db.refresh(team)
+    await _record_team_change(db, team_id)
+    await db.commit()
     return team
 
 
 @router.delete("/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_team(
+async def delete_team(
     team_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    team = check_team_access(db, team_id, current_user, require_owner=True)
-    db.delete(team)
-    db.commit()
+    team = await check_team_access(db, team_id, current_user, require_owner=True)
+    await _record_team_change(db, team_id, deleted=True)
+    await db.delete(team)
+    await db.commit()
+    # Every member may have lost access to every project of the team
+    await invalidate_project_roles()
 
 
 @router.post("/{team_id}/members", response_model=TeamMemberResponse, status_code=status.HTTP_201_CREATED)
-def add_team_member(
+async def add_team_member(
     team_id: int,
     member_data: TeamMemberAdd,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_team_access(db, team_id, current_user, require_owner=True)
+    await check_team_access(db, team_id, current_user, require_owner=True)
 
-    person = db.query(Person).filter(Person.person_id == member_data.person_id).first()
+    person = await db.get(Person, member_data.person_id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
 
-    existing = (
-        db.query(TeamMember)
-        .filter(
-            TeamMember.team_id == team_id,
-            TeamMember.person_id == member_data.person_id,
-        )
-        .first()
-    )
+    existing = await db.get(TeamMember, (team_id, member_data.person_id))
     if existing:
         raise HTTPException(status_code=400, detail="Already a member")
 
@@ -153,7 +150,8 @@ def add_team_member(
         role=member_data.role,
     )
     db.add(member)
-    db.commit()
+    await db.commit()
+    await invalidate_project_roles(person_id=member_data.person_id)
 
     return TeamMemberResponse(
         person=PersonBrief.model_validate(person),
@@ -162,30 +160,23 @@ def add_team_member(
 
 
 @router.patch("/{team_id}/members/{person_id}", response_model=TeamMemberResponse)
-def update_team_member(
+async def update_team_member(
     team_id: int,
     person_id: int,
     member_data: TeamMemberUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_team_access(db, team_id, current_user, require_owner=True)
+    await check_team_access(db, team_id, current_user, require_owner=True)
 
-    member = (
-        db.query(TeamMember)
-        .filter(
-            TeamMember.team_id == team_id,
-            TeamMember.person_id == person_id,
-        )
-        .first()
-    )
+    member = await db.get(TeamMember, (team_id, person_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
     member.role = member_data.role
-    db.commit()
+    await db.commit()
 
-    person = db.query(Person).filter(Person.person_id == person_id).first()
+    person = await db.get(Person, person_id)
     return TeamMemberResponse(
         person=PersonBrief.model_validate(person),
         role=member.role,
@@ -193,24 +184,30 @@ def update_team_member(
 
 
 @router.delete("/{team_id}/members/{person_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_team_member(
+async def remove_team_member(
     team_id: int,
     person_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Person = Depends(get_current_user),
 ):
-    check_team_access(db, team_id, current_user, require_owner=True)
+    await check_team_access(db, team_id, current_user, require_owner=True)
 
-    member = (
-        db.query(TeamMember)
-        .filter(
-            TeamMember.team_id == team_id,
-            TeamMember.person_id == person_id,
-        )
-        .first()
-    )
+    member = await db.get(TeamMember, (team_id, person_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await db.commit()
+    await invalidate_project_roles(person_id=person_id)
+
+
+async def _record_team_change(db: AsyncSession, team_id: int, deleted: bool = False) -> None:
+    """Add the team change to the feed of every project it is assigned to."""
+    # Lock projects in a stable order so concurrent team edits cannot deadlock
+    project_ids = await db.scalars(
+        select(ProjectTeam.project_id)
+        .where(ProjectTeam.team_id == team_id)
+        .order_by(ProjectTeam.project_id)
+    )
+    for project_id in project_ids.all():
+        await record_change(db, project_id, ChangeEntity.TEAM, team_id, deleted=deleted)
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class AttachmentLink(BaseModel):
+    # Relative to the API's origin with local storage, absolute with object storage
+    url: str
+    expires_at: datetime
+
+
+class DirectUploadCreate(BaseModel):
+    file_name: str = Field(min_length=1, max_length=255)
+    file_size: int = Field(ge=0)
+    # Hex; the store rejects a PUT whose content doesn't hash to it
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$")
+
+
+class DirectUpload(BaseModel):
+    upload_token: str
+    # PUT the file here with exactly these headers, then complete the upload
+    url: str
+    headers: dict[str, str]
+    expires_at: datetime
+
+
+class DirectUploadComplete(BaseModel):
+    upload_token: str
@@ -20,3 +20,4 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     person_id: int | None = None
+    token_version: int | None = None
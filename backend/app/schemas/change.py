@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from app.models.project import ChangeEntity
+from app.schemas.comment import CommentResponse
+from app.schemas.project import ProjectMemberResponse, ProjectTeamResponse
+from app.schemas.task import TaskWithDetails
+
+
+class ChangeTombstone(BaseModel):
+    entity: ChangeEntity
+    id: int
+
+
+class ProjectChanges(BaseModel):
+    # Pass back as ?since= to continue from here
+    cursor: str
+    has_more: bool = False
+    tasks: list[TaskWithDetails] = []
+    comments: list[CommentResponse] = []
+    members: list[ProjectMemberResponse] = []
+    teams: list[ProjectTeamResponse] = []
+    deleted: list[ChangeTombstone] = []
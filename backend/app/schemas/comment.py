@@ -19,6 +19,7 @@ class CommentAttachmentResponse(BaseModel):
     attachment_id: int
     file_name: str
     file_type: str
+    file_size: int | None = None
     uploaded_at: datetime
 
     class Config:
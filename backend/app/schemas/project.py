@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from datetime import datetime
 from app.models.project import ProjectRole
+from app.models.task import TaskStatus
 from app.schemas.person import PersonBrief
 from app.schemas.team import TeamResponse
+from app.schemas.task import TaskCard
 
 
 class ProjectBase(BaseModel):
@@ -61,3 +63,15 @@ class ProjectResponse(ProjectBase):
 class ProjectWithDetails(ProjectResponse):
     members: list[ProjectMemberResponse] = []
     teams: list[ProjectTeamResponse] = []
+
+
+class BoardColumn(BaseModel):
+    status: TaskStatus
+    count: int
+    tasks: list[TaskCard] = []
+
+
+class ProjectBoard(BaseModel):
+    project_id: int
+    columns: list[BoardColumn] = []
+    members: list[ProjectMemberResponse] = []
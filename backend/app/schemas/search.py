@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import datetime
+import enum
+
+
+class SearchKind(str, enum.Enum):
+    TASK = "task"
+    COMMENT = "comment"
+
+
+class SearchResult(BaseModel):
+    kind: SearchKind
+    task_id: int
+    comment_id: int | None = None
+    project_id: int
+    # Name of the task, or of the task the comment is on
+    title: str
+    # Matching fragments with terms wrapped in <mark>; the rest is raw user text
+    headline: str
+    rank: float
+    created_at: datetime
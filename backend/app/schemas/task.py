@@ -1,9 +1,17 @@
-from pydantic import BaseModel, field_validator
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
+import enum
 from app.models.task import TaskStatus
 from app.schemas.person import PersonBrief
 
 
+def _validate_tags(tags: list[str]) -> list[str]:
+    """Tags fit TaskTag.tag; duplicates are dropped."""
+    if any(len(tag) > 100 for tag in tags):
+        raise ValueError("Tags are at most 100 characters")
+    return list(dict.fromkeys(tags))
+
+
 class TaskBase(BaseModel):
     name: str
     description: str | None = None
@@ -46,6 +54,112 @@ class TaskUpdate(BaseModel):
         return v
 
 
+class TaskBulkUpdate(BaseModel):
+    """The same change applied to many tasks; fields left out are not touched."""
+
+    task_ids: list[int] = Field(min_length=1, max_length=1000)
+    status: TaskStatus | None = None
+    # 0 unassigns, as in TaskUpdate
+    assignee_id: int | None = None
+    priority: int | None = None
+    is_archived: bool | None = None
+    add_tags: list[str] = []
+    remove_tags: list[str] = []
+
+    @field_validator("priority")
+    @classmethod
+    def validate_range(cls, v: int | None) -> int | None:
+        if v is not None and not 1 <= v <= 5:
+            raise ValueError("Must be between 1 and 5")
+        return v
+
+    @field_validator("add_tags", "remove_tags")
+    @classmethod
+    def validate_tags(cls, v: list[str]) -> list[str]:
+        return _validate_tags(v)
+
+
+class BulkOutcome(str, enum.Enum):
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+
+
+class TaskBulkItem(BaseModel):
+    task_id: int
+    outcome: BulkOutcome
+
+
+class TaskBulkResult(BaseModel):
+    updated: int
+    # One entry per requested id, in request order
+    results: list[TaskBulkItem]
+
+
+class TaskImportRow(TaskBase):
+    """One row of a task import.
+
+    ``assignee_email`` is an alternative to ``assignee_id``, and a CSV
+    ``tags`` cell holds a comma-separated list.
+    """
+
+    name: str = Field(min_length=1, max_length=500)
+    assignee_email: str | None = None
+    tags: list[str] = []
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def split_tags(cls, v):
+        if isinstance(v, str):
+            return [tag.strip() for tag in v.split(",") if tag.strip()]
+        return v
+
+    @field_validator("tags")
+    @classmethod
+    def validate_tags(cls, v: list[str]) -> list[str]:
+        return _validate_tags(v)
+
+    @field_validator("due_date", mode="before")
+    @classmethod
+    def parse_date(cls, v):
+        # Spreadsheets tend to export plain dates, which pydantic rejects for datetimes
+        if isinstance(v, str):
+            try:
+                return datetime.fromisoformat(v.strip())
+            except ValueError:
+                pass
+        return v
+
+    @field_validator("due_date")
+    @classmethod
+    def naive_utc(cls, v: datetime | None) -> datetime | None:
+        # Stored without a time zone, like every other timestamp
+        if v is not None and v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+
+class TaskImportError(BaseModel):
+    # 1-based, not counting the CSV header or blank lines
+    row: int
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    import_key: str
+    # Rows handled under this key so far, by this run and earlier ones
+    rows: int
+    # Tasks this run created
+    created: int
+    # Rows an earlier run with the same key already handled
+    skipped: int
+    # Rows this run rejected; errors lists the first of them
+    failed: int
+    errors: list[TaskImportError] = []
+    finished: bool
+
+
 class TaskTagResponse(BaseModel):
     tag: str
 
@@ -57,6 +171,7 @@ class TaskAttachmentResponse(BaseModel):
     attachment_id: int
     file_name: str
     file_type: str
+    file_size: int | None = None
     uploaded_by: int
     uploaded_at: datetime
 
@@ -82,6 +197,7 @@ class TaskWithDetails(TaskResponse):
     creator: PersonBrief | None = None
     attachments: list[TaskAttachmentResponse] = []
     subtask_count: int = 0
+    comment_count: int = 0
 
 
 class TaskBrief(BaseModel):
@@ -94,3 +210,31 @@ class TaskBrief(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TaskTreeNode(BaseModel):
+    """A task in a subtask tree, with progress rolled up over everything below it."""
+
+    task_id: int
+    parent_task_id: int | None = None
+    name: str
+    status: TaskStatus
+    assignee_id: int | None = None
+    priority: int
+    severity: int
+    due_date: datetime | None = None
+    is_archived: bool
+    # Levels below the requested task
+    depth: int
+    # Direct subtasks, including any beyond the depth limit and left out of children
+    subtask_count: int = 0
+    # All descendants by status, at any depth down to the server's limit
+    status_counts: dict[TaskStatus, int] = {}
+    children: list["TaskTreeNode"] = []
+
+
+class TaskCard(TaskBrief):
+    """Fields a Kanban card renders."""
+
+    tags: list[TaskTagResponse] = []
+    comment_count: int = 0
@@ -1,20 +1,43 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Person
 from app.schemas.auth import TokenData
+from app.services.cache import MISSING, TTLCache
+from app.services.passwords import pwd_context, password_hasher
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+token_version_cache = TTLCache(
+    "token_versions",
+    key_fields=("person_id",),
+    ttl=settings.token_version_cache_ttl_seconds,
+    max_entries=settings.permission_cache_max_entries,
+)
+
+
+@dataclass(frozen=True)
+class TokenIdentity:
+    """Caller identity rebuilt from token claims.
+
+    Returned by get_current_user instead of Person when STATELESS_AUTH is
+    enabled; it carries only the fields request handlers read.
+    """
+
+    person_id: int
+    name: str
+    email: str
+    nickname: str | None = None
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,10 +58,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_current_user(
+def token_claims(person: Person) -> dict:
+    """Claims needed to serve requests without loading the Person row."""
+    return {
+        "sub": str(person.person_id),
+        "name": person.name,
+        "email": person.email,
+        "nickname": person.nickname,
+        "ver": person.token_version,
+    }
+
+
+async def current_token_version(db: AsyncSession, person_id: int) -> int | None:
+    """Current token version for a person, served from cache when possible."""
+    version = token_version_cache.get((person_id,))
+    if version is MISSING:
+        generation = token_version_cache.generation
+        version = await db.scalar(select(Person.token_version).where(Person.person_id == person_id))
+        if version is not None:
+            token_version_cache.set((person_id,), version, generation)
+    return version
+
+
+async def revoke_tokens(db: AsyncSession, person_id: int) -> None:
+    """Invalidate every token issued to a person so far."""
+    await db.execute(
+        update(Person)
+        .where(Person.person_id == person_id)
+        .values(token_version=Person.token_version + 1)
+    )
+    await db.commit()
+    await token_version_cache.invalidate(person_id=person_id)
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> Person:
+    db: AsyncSession = Depends(get_async_db),
+) -> Person | TokenIdentity:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -49,20 +105,39 @@ def get_current_user(
         person_id: int = payload.get("sub")
         if person_id is None:
             raise credentials_exception
-        token_data = TokenData(person_id=int(person_id))
+        token_data = TokenData(person_id=int(person_id), token_version=payload.get("ver"))
     except JWTError:
         raise credentials_exception
 
-    user = db.query(Person).filter(Person.person_id == token_data.person_id).first()
+    # Tokens issued before claims were added fall through to the DB lookup
+    if settings.stateless_auth and token_data.token_version is not None:
+        if await current_token_version(db, token_data.person_id) != token_data.token_version:
+            raise credentials_exception
+        return TokenIdentity(
+            person_id=token_data.person_id,
+            name=payload.get("name", ""),
+            email=payload.get("email", ""),
+            nickname=payload.get("nickname"),
+        )
+
+    user = await db.get(Person, token_data.person_id)
     if user is None:
         raise credentials_exception
+    if token_data.token_version is not None and token_data.token_version != user.token_version:
+        raise credentials_exception
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[Person]:
-    user = db.query(Person).filter(Person.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[Person]:
+    """Check credentials, hashing on the password pool rather than a request thread."""
+    user = await db.scalar(select(Person).where(Person.email == email))
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    if not valid:
         return None
+    if new_hash:
+        # Configured work factor changed since this hash was made
+        user.password_hash = new_hash
+        await db.commit()
     return user
@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import AttachmentBlob
+from app.services.storage import Storage, get_storage, sha256_checksum
+from app.services.uploads import UPLOAD_CHUNK_SIZE, ReceivedUpload, upload_temp_dir
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Key prefixes in storage
+BLOB_PREFIX = "blobs"
+# Direct uploads land here until verified and copied under their hash
+STAGING_PREFIX = "uploads"
+# Where attachment files lived under UPLOAD_DIR before migration 010
+LEGACY_DIRS = ("tasks", "comments")
+
+
+def blob_key(sha256: str) -> str:
+    """Files are stored under their hash, fanned out by its first two characters."""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}"
+
+
+def staging_key() -> str:
+    return f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+
+
+async def _lock_blob(db: AsyncSession, sha256: str, size: int) -> None:
+    """Upsert the blob row, which row-locks it until commit.
+
+    Garbage collection skips locked rows, so from here on the stored file
+    can't be deleted before the attachment row that references it commits.
+    That row bumps ref_count through its trigger; until then a new blob
+    counts as orphaned.
+    """
+    stmt = insert(AttachmentBlob).values(
+        sha256=sha256,
+        size=size,
+        ref_count=0,
+        created_at=datetime.utcnow(),
+        orphaned_at=datetime.utcnow(),
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[AttachmentBlob.sha256],
+        set_={"size": stmt.excluded.size},
+    ))
+
+
+def _place(storage: Storage, key: str, write: Callable[[], None]) -> None:
+    """Store a blob with ``write`` unless it is there already, in which case touch it.
+
+    Until the row that accounts for the file commits, only its modification
+    time keeps sweep_stray_files() off it, and a file already stored may be
+    old: left behind by an upload that rolled back, say.
+    """
+    if storage.exists(key):
+        storage.touch(key)
+    else:
+        write()
+
+
+async def store_blob(db: AsyncSession, upload: ReceivedUpload) -> None:
+    """Put a received upload in storage under its hash, unless already there.
+
+    The copy happens before the row lock so no connection is held while it
+    runs; the check after the lock catches a blob that garbage collection
+    removed in between.
+    """
+    storage = get_storage()
+    key = blob_key(upload.sha256)
+    try:
+        await run_in_threadpool(_place, storage, key, partial(storage.put_file, upload.temp_path, key))
+        await _lock_blob(db, upload.sha256, upload.size)
+        if not await run_in_threadpool(storage.exists, key):
+            await run_in_threadpool(storage.put_file, upload.temp_path, key)
+    finally:
+        await run_in_threadpool(_remove, upload.temp_path)
+
+
+async def adopt_staged_upload(db: AsyncSession, staged_key: str, sha256: str, size: int) -> None:
+    """Verify a direct upload and move it under its hash, like store_blob().
+
+    The store checked the SHA-256 the client declared when it accepted the
+    PUT; the object is only trusted if it reports that checksum back.
+    """
+    storage = get_storage()
+    staged = await run_in_threadpool(storage.stat, staged_key)
+    if staged is None:
+        raise HTTPException(status_code=409, detail="Nothing was uploaded for this ticket")
+    if staged.size != size or staged.checksum_sha256 != sha256_checksum(sha256):
+        await run_in_threadpool(storage.delete, staged_key)
+        raise HTTPException(status_code=422, detail="Uploaded file does not match its declared size and SHA-256")
+
+    key = blob_key(sha256)
+    await run_in_threadpool(_place, storage, key, partial(storage.copy, staged_key, key))
+    await _lock_blob(db, sha256, size)
+    if not await run_in_threadpool(storage.exists, key):
+        await run_in_threadpool(storage.copy, staged_key, key)
+    await run_in_threadpool(storage.delete, staged_key)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def collect_garbage(db: Session, batch_size: int = 500) -> int:
+    """Delete blobs unreferenced for longer than the grace period; returns how many.
+
+    Rows are locked with SKIP LOCKED, so a blob an upload is re-referencing
+    right now is left alone. The file goes before its row: a crash in
+    between leaves a row the next run deletes, never an untracked file.
+    """
+    storage = get_storage()
+    cutoff = datetime.utcnow() - timedelta(hours=settings.blob_gc_grace_hours)
+    removed = 0
+    while True:
+        shas = db.scalars(
+            select(AttachmentBlob.sha256)
+            .where(AttachmentBlob.ref_count == 0, AttachmentBlob.orphaned_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        for sha256 in shas:
+            storage.delete(blob_key(sha256))
+        if shas:
+            db.execute(
+                delete(AttachmentBlob)
+                .where(AttachmentBlob.sha256.in_(shas))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        removed += len(shas)
+        if len(shas) < batch_size:
+            return removed
+
+
+def _stale_files(directory: str, cutoff: float) -> list[os.DirEntry]:
+    try:
+        with os.scandir(directory) as entries:
+            return [e for e in entries if e.is_file() and e.stat().st_mtime < cutoff]
+    except FileNotFoundError:
+        return []
+
+
+def _delete_untracked(db: Session, storage: Storage, keys: list[str]) -> int:
+    known = set(db.scalars(
+        select(AttachmentBlob.sha256).where(AttachmentBlob.sha256.in_([k.rsplit("/", 1)[1] for k in keys]))
+    ))
+    stray = [k for k in keys if k.rsplit("/", 1)[1] not in known]
+    for key in stray:
+        storage.delete(key)
+    return len(stray)
+
+
+def sweep_stray_files(db: Session, batch_size: int = 1000) -> int:
+    """Remove files no row accounts for; returns how many.
+
+    That is temp files of uploads abandoned mid-stream by a killed worker,
+    direct uploads that were never completed, and blobs stored by a
+    transaction that then rolled back. Lists the whole store, so run it far
+    less often than collect_garbage().
+    """
+    storage = get_storage()
+    cutoff = time.time() - settings.blob_gc_grace_hours * 3600
+    removed = 0
+    for entry in _stale_files(upload_temp_dir(), cutoff):
+        os.remove(entry.path)
+        removed += 1
+
+    for obj in storage.list(STAGING_PREFIX):
+        if obj.modified_at < cutoff:
+            storage.delete(obj.key)
+            removed += 1
+
+    stale = []
+    for obj in storage.list(BLOB_PREFIX):
+        if obj.modified_at < cutoff:
+            stale.append(obj.key)
+        if len(stale) >= batch_size:
+            removed += _delete_untracked(db, storage, stale)
+            stale = []
+    if stale:
+        removed += _delete_untracked(db, storage, stale)
+    db.rollback()
+    return removed
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_legacy_files(db: Session) -> int:
+    """Delete attachment files from before content addressing once the store has them; returns how many.
+
+    Migration 010 links every file into the blob store but leaves the
+    original, as its transaction may still roll back. A file is only removed
+    when its content has a committed blob row and a stored copy; anything
+    else is kept and reported.
+    """
+    storage = get_storage()
+    removed = kept = 0
+    for legacy_dir in LEGACY_DIRS:
+        for root, _, names in os.walk(os.path.join(settings.upload_dir, legacy_dir), topdown=False):
+            for name in names:
+                path = os.path.join(root, name)
+                sha256 = _hash_file(path)
+                if db.get(AttachmentBlob, sha256) is not None and storage.exists(blob_key(sha256)):
+                    _remove(path)
+                    removed += 1
+                else:
+                    kept += 1
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass  # not empty
+    db.rollback()
+    if kept:
+        logger.warning("Kept %s legacy attachment files whose content is not in the blob store", kept)
+    return removed
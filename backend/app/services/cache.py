@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MISSING = object()
+
+_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Keys are tuples described by ``key_fields`` so entries can be invalidated
+    by any subset of fields, e.g. every entry for one project. Invalidations
+    go through the configured broker so every worker drops the entry.
+    """
+
+    def __init__(self, name: str, key_fields: tuple[str, ...], ttl: float, max_entries: int):
+        self.name = name
+        self.key_fields = key_fields
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every eviction; pass to set() to drop values read before it."""
+        return self._generation
+
+    def get(self, key: Hashable) -> Any:
+        if not self.enabled:
+            return MISSING
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # An invalidation landed while the value was being computed
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, **match: Any) -> int:
+        """Drop entries in this worker whose key fields equal ``match`` (all if empty)."""
+        with self._lock:
+            self._generation += 1
+            if not match:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                positions = [(self.key_fields.index(field), value) for field, value in match.items()]
+                stale = [
+                    key for key in self._entries
+                    if all(key[i] == value for i, value in positions)
+                ]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self.evictions += removed
+            return removed
+
+    async def invalidate(self, **match: Any) -> None:
+        """Evict matching entries in every worker."""
+        await get_broker().publish({"cache": self.name, "match": match})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def apply_invalidation(message: dict) -> None:
+    """Apply an invalidation message; ``"*"`` targets every cache."""
+    name = message.get("cache")
+    if name == "*":
+        targets = list(_caches.values())
+    else:
+        targets = [_caches[name]] if name in _caches else []
+    for cache in targets:
+        cache.evict(**message.get("match", {}))
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+class InvalidationBroker(ABC):
+    """Delivers cache invalidation messages to this and every other worker."""
+
+    @abstractmethod
+    async def publish(self, message: dict) -> None:
+        """Apply ``message`` here and send it to the other workers."""
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalBroker(InvalidationBroker):
+    """In-process delivery only; for a single worker and for tests."""
+
+    async def publish(self, message: dict) -> None:
+        apply_invalidation(message)
+
+
+class PostgresBroker(InvalidationBroker):
+    """Shares invalidations between workers through Postgres LISTEN/NOTIFY."""
+
+    channel = "cache_invalidation"
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def publish(self, message: dict) -> None:
+        from sqlalchemy import text
+        from app.database import async_engine
+
+        apply_invalidation(message)
+        payload = json.dumps({**message, "origin": self.origin})
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload},
+            )
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _listen(self) -> None:
+        import psycopg2
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                # Messages may have been missed while disconnected
+                apply_invalidation({"cache": "*"})
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            message = json.loads(conn.notifies.pop(0).payload)
+                            if message.pop("origin", None) != self.origin:
+                                apply_invalidation(message)
+            except Exception:
+                logger.exception("Cache invalidation listener failed, reconnecting in %.0fs", backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+@lru_cache
+def get_broker() -> InvalidationBroker:
+    if settings.cache_broker == "postgres":
+        return PostgresBroker(settings.database_url)
+    return LocalBroker()
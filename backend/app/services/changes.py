@@ -0,0 +1,220 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Integer, String, Text, Update, cast, false, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import get_settings
+from app.models import (
+    ChangeEntity,
+    Comment,
+    Project,
+    ProjectChange,
+    ProjectMember,
+    ProjectTeam,
+    Task,
+)
+from app.schemas.change import ChangeTombstone, ProjectChanges
+from app.schemas.person import PersonBrief
+from app.schemas.project import ProjectMemberResponse, ProjectTeamResponse
+from app.schemas.team import TeamResponse
+from app.services.events import EVENTS_CHANNEL
+from app.services.pagination import encode_cursor
+from app.services.responses import comment_relations, comments_to_response, task_relations, tasks_to_response
+
+settings = get_settings()
+
+
+def comment_project(comment_id: int) -> ColumnElement:
+    """Project of a comment, for recording changes without loading the task."""
+    return (
+        select(Task.project_id)
+        .join(Comment, Comment.task_id == Task.task_id)
+        .where(Comment.comment_id == comment_id)
+        .scalar_subquery()
+    )
+
+
+async def record_change(
+    db: AsyncSession,
+    project_id: int | ColumnElement,
+    entity: ChangeEntity,
+    entity_id: int,
+    deleted: bool = False,
+) -> None:
+    """Append an entry to a project's change feed in the current transaction.
+
+    Bumping the project's counter row-locks the project until commit, so
+    writers within one project commit in sequence order and a reader never
+    sees seq N+1 before N. Call it just before commit to keep the lock short.
+    The same statement queues the project event for subscribers.
+    """
+    row = (await db.execute(change_seq_update(project_id, entity, entity_id, deleted))).one()
+    db.add(ProjectChange(
+        project_id=row.project_id,
+        seq=row.change_seq,
+        entity=entity,
+        entity_id=entity_id,
+        deleted=deleted,
+    ))
+
+
+def change_seq_update(
+    project_id: int | ColumnElement, entity: ChangeEntity, entity_id: int, deleted: bool = False
+) -> Update:
+    """The counter bump behind record_change(), returning the project id and new seq."""
+    returning = [Project.project_id, Project.change_seq]
+    if settings.project_events:
+        # Notifying from RETURNING saves a round trip; Postgres delivers it on commit
+        returning.append(func.pg_notify(EVENTS_CHANNEL, cast(func.json_build_object(
+            "project_id", Project.project_id,
+            "seq", Project.change_seq,
+            "entity", cast(literal(entity.value), String),
+            "id", cast(literal(entity_id), Integer),
+            "deleted", cast(literal(deleted), Boolean),
+        ), Text)))
+    return (
+        update(Project)
+        .where(Project.project_id == project_id)
+        .values(change_seq=Project.change_seq + 1)
+        .returning(*returning)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def record_changes(
+    db: AsyncSession,
+    project_id: int,
+    entity: ChangeEntity,
+    entity_ids: list[int],
+) -> None:
+    """record_change() for many entities of one project in two statements.
+
+    Takes a block of sequence numbers with one counter bump, then inserts
+    the entries (and queues their events) with a single INSERT ... SELECT.
+    """
+    if not entity_ids:
+        return
+    last_seq = (await db.execute(
+        update(Project)
+        .where(Project.project_id == project_id)
+        .values(change_seq=Project.change_seq + len(entity_ids))
+        .returning(Project.change_seq)
+        .execution_options(synchronize_session=False)
+    )).scalar_one()
+
+    ids = func.unnest(cast(entity_ids, ARRAY(Integer))).table_valued("entity_id", with_ordinality="n").render_derived()
+    entries = (
+        select(
+            literal(project_id),
+            ids.c.n + (last_seq - len(entity_ids)),
+            literal(entity, ProjectChange.entity.type),
+            ids.c.entity_id,
+            false(),
+            literal(datetime.utcnow()),
+        )
+        .select_from(ids)
+        .order_by(ids.c.n)
+    )
+    statement = insert(ProjectChange).from_select(
+        ["project_id", "seq", "entity", "entity_id", "deleted", "changed_at"], entries
+    )
+    if settings.project_events:
+        # Queued in seq order, which subscribers rely on
+        statement = statement.returning(func.pg_notify(EVENTS_CHANNEL, cast(func.json_build_object(
+            "project_id", ProjectChange.project_id,
+            "seq", ProjectChange.seq,
+            "entity", ProjectChange.entity,
+            "id", ProjectChange.entity_id,
+            "deleted", ProjectChange.deleted,
+        ), Text)))
+    await db.execute(statement)
+
+
+async def load_changes(db: AsyncSession, project_id: int, since: int, limit: int) -> ProjectChanges:
+    """Current state of everything changed after ``since``, plus tombstones.
+
+    Several changes to one entity collapse into its latest state, so the
+    payload grows with the number of entities touched rather than edits made.
+    A task tombstone implies the task's comments are gone too.
+    """
+    entries = (await db.scalars(
+        select(ProjectChange)
+        .where(ProjectChange.project_id == project_id, ProjectChange.seq > since)
+        .order_by(ProjectChange.seq)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest: dict[tuple[ChangeEntity, int], bool] = {}
+    for entry in entries:
+        latest[(entry.entity, entry.entity_id)] = entry.deleted
+
+    upserts: dict[ChangeEntity, list[int]] = {entity: [] for entity in ChangeEntity}
+    deleted: list[ChangeTombstone] = []
+    for (entity, entity_id), is_deleted in latest.items():
+        if is_deleted:
+            deleted.append(ChangeTombstone(entity=entity, id=entity_id))
+        else:
+            upserts[entity].append(entity_id)
+
+    changes = ProjectChanges(
+        cursor=encode_cursor(entries[-1].seq if entries else since),
+        has_more=has_more,
+        deleted=deleted,
+    )
+
+    if upserts[ChangeEntity.TASK]:
+        tasks = (await db.scalars(
+            select(Task)
+            .options(*task_relations())
+            .where(Task.project_id == project_id, Task.task_id.in_(upserts[ChangeEntity.TASK]))
+        )).all()
+        changes.tasks = await tasks_to_response(db, tasks)
+
+    if upserts[ChangeEntity.COMMENT]:
+        comments = (await db.scalars(
+            select(Comment)
+            .options(*comment_relations())
+            .join(Task, Task.task_id == Comment.task_id)
+            .where(Task.project_id == project_id, Comment.comment_id.in_(upserts[ChangeEntity.COMMENT]))
+        )).all()
+        changes.comments = comments_to_response(comments)
+
+    if upserts[ChangeEntity.MEMBER]:
+        members = (await db.scalars(
+            select(ProjectMember)
+            .options(joinedload(ProjectMember.person))
+            .where(ProjectMember.project_id == project_id, ProjectMember.person_id.in_(upserts[ChangeEntity.MEMBER]))
+        )).all()
+        changes.members = [
+            ProjectMemberResponse(person=PersonBrief.model_validate(pm.person), role=pm.role)
+            for pm in members
+        ]
+
+    if upserts[ChangeEntity.TEAM]:
+        teams = (await db.scalars(
+            select(ProjectTeam)
+            .options(joinedload(ProjectTeam.team))
+            .where(ProjectTeam.project_id == project_id, ProjectTeam.team_id.in_(upserts[ChangeEntity.TEAM]))
+        )).all()
+        changes.teams = [ProjectTeamResponse(team=TeamResponse.model_validate(pt.team)) for pt in teams]
+
+    # Rows removed by a cascade (e.g. comments of a deleted task) have no
+    # tombstone of their own; report anything that vanished as deleted.
+    found = {
+        ChangeEntity.TASK: {t.task_id for t in changes.tasks},
+        ChangeEntity.COMMENT: {c.comment_id for c in changes.comments},
+        ChangeEntity.MEMBER: {m.person.person_id for m in changes.members},
+        ChangeEntity.TEAM: {t.team.team_id for t in changes.teams},
+    }
+    for entity, ids in upserts.items():
+        changes.deleted.extend(
+            ChangeTombstone(entity=entity, id=entity_id)
+            for entity_id in ids
+            if entity_id not in found[entity]
+        )
+    return changes
@@ -0,0 +1,192 @@
+"""Serving attachment files: conditional GET, byte ranges and X-Accel-Redirect."""
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.services.http_cache import etag_matches
+
+settings = get_settings()
+
+# An attachment's bytes never change (a new upload is a new attachment), so
+# browsers reuse them for a day without asking; lost access takes effect
+# within that window
+ATTACHMENT_CACHE_CONTROL = "private, max-age=86400"
+READ_CHUNK_SIZE = 256 * 1024
+
+
+def content_etag(sha256: str) -> str:
+    """Strong ETag: the bytes are identified by their hash."""
+    return f'"{sha256}"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _parse_http_date(value: str) -> datetime | None:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def cache_headers(etag: str, last_modified: datetime) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": _http_date(last_modified),
+        "Cache-Control": ATTACHMENT_CACHE_CONTROL,
+    }
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Whether a GET can be answered with 304; If-None-Match wins over If-Modified-Since."""
+    if "if-none-match" in request.headers:
+        return etag_matches(request, etag)
+    since = _parse_http_date(request.headers.get("if-modified-since", ""))
+    return since is not None and last_modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(etag: str, last_modified: datetime) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, last_modified))
+
+
+def content_disposition(file_name: str) -> str:
+    quoted = quote(file_name)
+    if quoted != file_name:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{file_name}"'
+
+
+def _if_range_matches(request: Request, etag: str, last_modified: datetime) -> bool:
+    """If-Range only allows a partial response for the exact same representation."""
+    validator = request.headers.get("if-range")
+    if validator is None:
+        return True
+    if validator.startswith('"') or validator.startswith("W/"):
+        # Strong comparison; a weak validator never matches
+        return validator == etag
+    return _parse_http_date(validator) == last_modified.replace(microsecond=0)
+
+
+def parse_range(request: Request, size: int, etag: str, last_modified: datetime) -> tuple[int, int] | None:
+    """The single byte range to send, inclusive, or None for the whole file.
+
+    Ranges the server may ignore (malformed, multiple, or failing If-Range)
+    get the whole file. A range entirely past the end is a 416.
+    """
+    header = request.headers.get("range", "")
+    if not header.startswith("bytes=") or "," in header:
+        return None
+    if not _if_range_matches(request, etag, last_modified):
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    if not sep or not (first or last) or not all(p.isdigit() for p in (first, last) if p):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise _range_not_satisfiable(size)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise _range_not_satisfiable(size)
+    return start, min(end, size - 1)
+
+
+def _range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="Requested range is past the end of the file",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def accel_redirect_uri(request: Request, path: str) -> str | None:
+    """The internal nginx URI serving ``path``, if the proxy in front offered one.
+
+    nginx opts in per request, following Rack's convention: it sends
+    ``X-Sendfile-Type: X-Accel-Redirect`` and ``X-Accel-Mapping:
+    <local dir>=<internal location>``. It sets both on every proxied
+    request, so clients can't supply their own.
+    """
+    if not settings.attachment_accel_redirect:
+        return None
+    if request.headers.get("x-sendfile-type") != "X-Accel-Redirect":
+        return None
+    local_root, sep, internal_root = request.headers.get("x-accel-mapping", "").partition("=")
+    if not sep:
+        return None
+    local_root = local_root.strip().rstrip("/") + "/"
+    path = os.path.abspath(path)
+    if not path.startswith(local_root):
+        return None
+    return internal_root.strip().rstrip("/") + "/" + quote(path[len(local_root):])
+
+
+async def _read_file(path: str, start: int, length: int):
+    f = await run_in_threadpool(open, path, "rb")
+    try:
+        await run_in_threadpool(f.seek, start)
+        while length > 0:
+            chunk = await run_in_threadpool(f.read, min(READ_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await run_in_threadpool(f.close)
+
+
+def send_file(
+    request: Request,
+    path: str,
+    size: int,
+    *,
+    etag: str,
+    last_modified: datetime,
+    file_name: str,
+    media_type: str,
+) -> Response:
+    """Send a local file, or the part of it the Range header asks for.
+
+    Conditional requests should already have been answered with
+    is_not_modified(), which needs no file access.
+    """
+    headers = {
+        **cache_headers(etag, last_modified),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(file_name),
+    }
+    internal_uri = accel_redirect_uri(request, path)
+    if internal_uri is not None:
+        # nginx serves the bytes, and any range, with sendfile
+        return Response(headers={**headers, "X-Accel-Redirect": internal_uri}, media_type=media_type)
+
+    byte_range = parse_range(request, size, etag, last_modified)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read_file(path, start, end - start + 1),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.config import get_settings
+from app.services.pagination import encode_cursor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Notified by record_change() inside the writing transaction, so Postgres
+# delivers each event once, on commit, to every worker.
+EVENTS_CHANNEL = "project_events"
+
+# Queued instead of an event when a subscriber falls behind or messages may
+# have been lost; the client should catch up through the change feed.
+RESYNC = {"type": "resync"}
+
+# Change-feed entities whose events can grant or revoke access to the project
+ACCESS_ENTITIES = ("MEMBER", "TEAM")
+
+
+class Subscription:
+    """One client connection's view of a project's events.
+
+    The buffer is bounded: a client that stops reading loses its backlog and
+    gets a single resync marker instead, so a slow reader costs at most
+    ``maxsize`` small dicts.
+    """
+
+    def __init__(self, project_id: int, person_id: int, maxsize: int):
+        self.project_id = project_id
+        self.person_id = person_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event: dict) -> bool:
+        """Queue an event without blocking; returns False if it overflowed."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.resync()
+            return False
+
+    def resync(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+
+class EventHub:
+    """Fans project change events out to the connections of this worker.
+
+    A daemon thread LISTENs on a dedicated psycopg2 connection and hands each
+    notification to the event loop; connections only wait on their in-memory
+    queue, so an idle subscriber holds no database connection.
+    """
+
+    def __init__(self, dsn: str, buffer_size: int):
+        self.dsn = dsn
+        self.buffer_size = buffer_size
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, project_id: int, person_id: int) -> Subscription:
+        subscription = Subscription(project_id, person_id, self.buffer_size)
+        self._subscriptions[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscriptions.get(subscription.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.project_id]
+
+    def dispatch(self, event: dict) -> None:
+        """Deliver an event to local subscribers; must run on the event loop."""
+        for subscription in list(self._subscriptions.get(event["project_id"], ())):
+            if subscription.offer(event):
+                self.delivered += 1
+            else:
+                self.overflows += 1
+
+    async def stream(
+        self,
+        subscription: Subscription,
+        backlog: list[dict],
+        heartbeat: float,
+        has_access: Callable[[], Awaitable[bool]],
+        access_check_interval: float,
+    ) -> AsyncIterator[str]:
+        """Render a subscription as Server-Sent Events until the client leaves.
+
+        ``backlog`` holds events replayed from the change feed; live events
+        already covered by it are skipped. Each event id is a change-feed cursor,
+        so a reconnecting EventSource resumes from Last-Event-ID.
+
+        Access was checked when the stream opened. ``has_access`` is asked
+        again after every member or team event and at least every
+        ``access_check_interval`` seconds, and the stream ends once it says no.
+        The client's reconnect then gets the 403.
+        """
+        last_seq = 0
+        pending = list(backlog)
+        next_check = time.monotonic() + access_check_interval
+        try:
+            while True:
+                if time.monotonic() >= next_check:
+                    if not await has_access():
+                        return
+                    next_check = time.monotonic() + access_check_interval
+                if pending:
+                    event = pending.pop(0)
+                else:
+                    try:
+                        event = await asyncio.wait_for(
+                            subscription.queue.get(), min(heartbeat, max(next_check - time.monotonic(), 0))
+                        )
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                if event is RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield f"id: {encode_cursor(event['seq'])}\nevent: change\ndata: {json.dumps(event)}\n\n"
+                if event["entity"] == "MEMBER" and event["deleted"] and event["id"] == subscription.person_id:
+                    return
+                if event["entity"] in ACCESS_ENTITIES:
+                    # Someone's access changed; check the subscriber's before the next event
+                    next_check = 0
+        finally:
+            self.unsubscribe(subscription)
+
+    def _resync_all(self) -> None:
+        for subscribers in list(self._subscriptions.values()):
+            for subscription in list(subscribers):
+                subscription.resync()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="project-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        return {
+            "projects": len(self._subscriptions),
+            "subscribers": sum(len(s) for s in self._subscriptions.values()),
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+    def _listen(self) -> None:
+        import psycopg2
+
+        backoff = 1.0
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {EVENTS_CHANNEL}")
+                if connected_before:
+                    # Events may have been missed while disconnected
+                    self._loop.call_soon_threadsafe(self._resync_all)
+                connected_before = True
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            event = json.loads(conn.notifies.pop(0).payload)
+                            self._loop.call_soon_threadsafe(self.dispatch, event)
+            except Exception:
+                logger.exception("Project event listener failed, reconnecting in %.0fs", backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+event_hub = EventHub(settings.database_url, settings.event_buffer_size)
@@ -0,0 +1,215 @@
+"""Streaming project export as NDJSON or CSV.
+
+Every query runs through a server-side cursor (yield_per) inside one
+read-only REPEATABLE READ transaction. The export is a consistent snapshot,
+memory stays flat however large the project is, and bytes go out as soon
+as the first rows are fetched.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Select, String, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+
+from app.database import AsyncSessionLocal
+from app.models import Comment, CommentAttachment, Person, Project, Task, TaskAttachment, TaskStatusHistory, TaskTag
+
+# Rows fetched from the cursor, and encoded into one chunk of the response, at a time
+EXPORT_FETCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportEntity(str, enum.Enum):
+    TASKS = "tasks"
+    COMMENTS = "comments"
+    STATUS_HISTORY = "status_history"
+    ATTACHMENTS = "attachments"
+
+
+# The "type" of each NDJSON line
+RECORD_TYPES = {
+    ExportEntity.TASKS: "task",
+    ExportEntity.COMMENTS: "comment",
+    ExportEntity.STATUS_HISTORY: "status_change",
+    ExportEntity.ATTACHMENTS: "attachment",
+}
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _queries(project_id: int, entity: ExportEntity) -> list[Select]:
+    """The statements producing an entity's rows, in primary key order."""
+    if entity is ExportEntity.TASKS:
+        # Column names match what POST /api/tasks/import reads
+        tags = (
+            select(func.array_agg(aggregate_order_by(TaskTag.tag, TaskTag.tag)))
+            .where(TaskTag.task_id == Task.task_id)
+            .scalar_subquery()
+        )
+        return [
+            select(
+                Task.task_id,
+                Task.parent_task_id,
+                Task.name,
+                Task.description,
+                Task.status,
+                Task.severity,
+                Task.priority,
+                Task.due_date,
+                Task.assignee_id,
+                Person.email.label("assignee_email"),
+                func.coalesce(tags, cast(literal_column("'{}'"), ARRAY(String))).label("tags"),
+                Task.is_archived,
+                Task.comment_count,
+                Task.created_by,
+                Task.created_at,
+                Task.updated_at,
+            )
+            .outerjoin(Person, Person.person_id == Task.assignee_id)
+            .where(Task.project_id == project_id)
+            .order_by(Task.task_id)
+        ]
+    if entity is ExportEntity.COMMENTS:
+        return [
+            select(
+                Comment.comment_id,
+                Comment.task_id,
+                Comment.person_id,
+                Person.email.label("author_email"),
+                Comment.text,
+                Comment.is_system_comment,
+                Comment.created_at,
+                Comment.edited_at,
+            )
+            .join(Task, Task.task_id == Comment.task_id)
+            .join(Person, Person.person_id == Comment.person_id)
+            .where(Task.project_id == project_id)
+            .order_by(Comment.comment_id)
+        ]
+    if entity is ExportEntity.STATUS_HISTORY:
+        return [
+            select(
+                TaskStatusHistory.id,
+                TaskStatusHistory.task_id,
+                TaskStatusHistory.old_status,
+                TaskStatusHistory.new_status,
+                TaskStatusHistory.changed_by,
+                TaskStatusHistory.changed_at,
+            )
+            .join(Task, Task.task_id == TaskStatusHistory.task_id)
+            .where(Task.project_id == project_id)
+            .order_by(TaskStatusHistory.id)
+        ]
+    # Task and comment attachments number their ids separately; "kind" tells them apart
+    return [
+        select(
+            literal("task").label("kind"),
+            TaskAttachment.attachment_id,
+            TaskAttachment.task_id,
+            literal(None).label("comment_id"),
+            TaskAttachment.file_name,
+            TaskAttachment.file_type,
+            TaskAttachment.file_size,
+            TaskAttachment.sha256,
+            TaskAttachment.uploaded_by,
+            TaskAttachment.uploaded_at,
+        )
+        .join(Task, Task.task_id == TaskAttachment.task_id)
+        .where(Task.project_id == project_id)
+        .order_by(TaskAttachment.attachment_id),
+        select(
+            literal("comment").label("kind"),
+            CommentAttachment.attachment_id,
+            Comment.task_id,
+            CommentAttachment.comment_id,
+            CommentAttachment.file_name,
+            CommentAttachment.file_type,
+            CommentAttachment.file_size,
+            CommentAttachment.sha256,
+            Comment.person_id.label("uploaded_by"),
+            CommentAttachment.uploaded_at,
+        )
+        .join(Comment, Comment.comment_id == CommentAttachment.comment_id)
+        .join(Task, Task.task_id == Comment.task_id)
+        .where(Task.project_id == project_id)
+        .order_by(CommentAttachment.attachment_id),
+    ]
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Can't export {type(value).__name__}")
+
+
+def _json_line(record: dict) -> str:
+    return json.dumps(record, default=_json_value, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        # Tags, comma-separated as the importer reads them
+        return ",".join(value)
+    return value
+
+
+async def export_project(project_id: int, fmt: ExportFormat, entities: list[ExportEntity]) -> AsyncIterator[bytes]:
+    """Encoded export of a project, a chunk per fetch from the cursor.
+
+    NDJSON starts with a project line, followed by one line per record with
+    a ``type`` field. CSV holds a single entity, with a header row. Access
+    must be checked before streaming starts; this opens its own session, as
+    the request's is gone by the time the body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True})
+        if fmt is ExportFormat.NDJSON:
+            project = (await db.execute(
+                select(Project.project_id, Project.name, Project.description, Project.is_archived, Project.created_at)
+                .where(Project.project_id == project_id)
+            )).one()
+            yield _json_line({"type": "project", **project._mapping, "exported_at": datetime.utcnow()}).encode()
+
+        for entity in entities:
+            header_written = False
+            for query in _queries(project_id, entity):
+                result = await db.stream(query, execution_options={"yield_per": EXPORT_FETCH_SIZE})
+                if fmt is ExportFormat.CSV:
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    if not header_written:
+                        writer.writerow(result.keys())
+                        header_written = True
+                    async for rows in result.partitions():
+                        writer.writerows([_csv_cell(value) for value in row] for row in rows)
+                        yield buffer.getvalue().encode()
+                        buffer.seek(0)
+                        buffer.truncate()
+                    if buffer.tell():
+                        # Only the header; the query had no rows
+                        yield buffer.getvalue().encode()
+                else:
+                    record_type = RECORD_TYPES[entity]
+                    async for rows in result.partitions():
+                        yield "".join(
+                            _json_line({"type": record_type, **row._mapping}) for row in rows
+                        ).encode()
@@ -0,0 +1,27 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag derived from the values a representation depends on."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers the given ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
@@ -0,0 +1,178 @@
+import logging
+import random
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import Row, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Handler = Callable[[str, dict], None]
+_handlers: dict[str, list[Handler]] = defaultdict(list)
+
+
+def enqueue(db, topic: str, payload: dict[str, Any]) -> None:
+    """Queue a side effect in the caller's transaction; nothing runs until it commits."""
+    db.add(OutboxMessage(topic=topic, payload=payload))
+
+
+def handler(*topics: str) -> Callable[[Handler], Handler]:
+    """Register a function to run for outbox messages on the given topics.
+
+    Delivery is at-least-once, so handlers must tolerate repeats.
+    """
+
+    def register(fn: Handler) -> Handler:
+        for topic in topics:
+            _handlers[topic].append(fn)
+        return fn
+
+    return register
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter, capped at one hour."""
+    base = min(2 ** attempts, 3600)
+    return timedelta(seconds=base * random.uniform(0.5, 1.0))
+
+
+def claim_batch(db: Session, size: int) -> list[Row]:
+    """Lease up to ``size`` due messages to this worker and commit the lease.
+
+    Handlers then run outside any transaction. If the worker dies, the lease
+    expires and another worker picks the messages up.
+    """
+    now = datetime.utcnow()
+    due = (
+        select(OutboxMessage.outbox_id)
+        .where(OutboxMessage.processed_at.is_(None), OutboxMessage.available_at <= now)
+        .order_by(OutboxMessage.available_at)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+    )
+    # Plain rows rather than ORM objects, which commit() would expire
+    messages = db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.outbox_id.in_(due.scalar_subquery()))
+        .values(
+            available_at=now + timedelta(seconds=settings.outbox_lease_seconds),
+            attempts=OutboxMessage.attempts + 1,
+        )
+        .returning(
+            OutboxMessage.outbox_id,
+            OutboxMessage.topic,
+            OutboxMessage.payload,
+            OutboxMessage.attempts,
+            OutboxMessage.created_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return sorted(messages, key=lambda m: m.outbox_id)
+
+
+def process_batch(db: Session, size: int) -> int:
+    """Run handlers for one batch of due messages; returns how many were claimed.
+
+    The batch has to finish within its lease, or another worker would claim
+    the same messages and run them concurrently. So a message is only started
+    while OUTBOX_HANDLER_SECONDS of the lease is left; those not reached are
+    handed back for the next claim, which may be this worker's.
+    """
+    deadline = time.monotonic() + settings.outbox_lease_seconds
+    messages = claim_batch(db, size)
+    if not messages:
+        return 0
+
+    done: list[int] = []
+    released: list[int] = []
+    now = datetime.utcnow()
+    for i, message in enumerate(messages):
+        if i and time.monotonic() + settings.outbox_handler_seconds > deadline:
+            released = [m.outbox_id for m in messages[i:]]
+            break
+        try:
+            for fn in _handlers.get(message.topic, ()):
+                fn(message.topic, message.payload)
+            done.append(message.outbox_id)
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            gave_up = message.attempts >= settings.outbox_max_attempts
+            logger.warning(
+                "Outbox message %s (%s) failed on attempt %s%s",
+                message.outbox_id, message.topic, message.attempts,
+                ", giving up" if gave_up else "",
+            )
+            db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.outbox_id == message.outbox_id)
+                .values(
+                    last_error=error,
+                    available_at=now + retry_delay(message.attempts),
+                    processed_at=now if gave_up else None,
+                    failed=gave_up,
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    if done:
+        db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.outbox_id.in_(done))
+            .values(processed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    if released:
+        logger.warning("Outbox lease running out; releasing %s unstarted messages", len(released))
+        db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.outbox_id.in_(released))
+            .values(available_at=datetime.utcnow(), attempts=OutboxMessage.attempts - 1)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+    lag = max((now - m.created_at).total_seconds() for m in messages)
+    logger.info(
+        "Outbox batch: %s processed, %s failed, %s released, max lag %.1fs",
+        len(done), len(messages) - len(done) - len(released), len(released), lag,
+    )
+    return len(messages)
+
+
+def purge_processed(db: Session) -> int:
+    """Delete successfully processed messages past the retention window."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.outbox_retention_hours)
+    result = db.execute(
+        delete(OutboxMessage)
+        .where(OutboxMessage.processed_at < cutoff, OutboxMessage.failed == False)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def outbox_stats(db: Session) -> dict:
+    """Backlog size and lag, for /api/metrics."""
+    failed = (
+        select(func.count())
+        .where(OutboxMessage.failed == True)
+        .scalar_subquery()
+    )
+    pending, oldest, failed = db.execute(
+        select(func.count(), func.min(OutboxMessage.created_at), failed)
+        .where(OutboxMessage.processed_at.is_(None))
+    ).one()
+    return {
+        "pending": pending,
+        "failed": failed,
+        "lag_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+    }
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor produced by encode_cursor, coercing each value to the given type."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor arity mismatch")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, values)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def clamp_page_size(limit: int | None, default: int, maximum: int) -> int:
+    """Apply the server-side default and upper bound to a requested page size."""
+    return min(limit or default, maximum)
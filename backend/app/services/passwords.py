@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Hashes with a different work factor are flagged by needs_update() and
+# transparently re-hashed on the next successful login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded worker pool.
+
+    bcrypt releases the GIL, so a small thread pool gives real parallelism
+    without tying up the request threadpool. Once ``max_pending`` jobs are
+    queued or running, new ones are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.hash_seconds_total = 0.0
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many password checks in progress, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def job() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.queue_seconds_total += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.hash_seconds_total += time.perf_counter() - started
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(job))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Verify a password, returning a replacement hash if the work factor changed."""
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_seconds_total": round(self.queue_seconds_total, 3),
+                "hash_seconds_total": round(self.hash_seconds_total, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
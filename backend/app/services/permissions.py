@@ -1,6 +1,8 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import CompoundSelect, Select, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.models import (
     Person,
     Project,
@@ -13,113 +15,218 @@ from app.models import (
     ProjectRole,
     TeamRole,
 )
+from app.services.cache import MISSING, TTLCache
 
+settings = get_settings()
 
-def check_project_access(
-    db: Session, project_id: int, user: Person, min_role: ProjectRole = ProjectRole.VIEWER
-) -> Project:
-    """Check if user has access to project, return project if yes."""
-    project = db.query(Project).filter(Project.project_id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+# Effective role (or None for no access) keyed by (person_id, project_id).
+# Membership mutations must call invalidate_project_roles() after committing.
+role_cache = TTLCache(
+    "project_roles",
+    key_fields=("person_id", "project_id"),
+    ttl=settings.permission_cache_ttl_seconds,
+    max_entries=settings.permission_cache_max_entries,
+)
 
-    # Check direct membership
-    member = (
-        db.query(ProjectMember)
-        .filter(
-            ProjectMember.project_id == project_id,
-            ProjectMember.person_id == user.person_id,
+ROLE_RANK = {ProjectRole.VIEWER: 1, ProjectRole.MEMBER: 2, ProjectRole.ADMIN: 3}
+
+
+def _access_columns(person_id: int) -> tuple:
+    """Correlated columns resolving a person's direct and team access to ``Project``.
+
+    Meant to be selected alongside ``Project`` (or an entity joined to it) so
+    the project row and the caller's membership come back in one round trip.
+    """
+    direct_role = (
+        select(ProjectMember.role)
+        .where(
+            ProjectMember.project_id == Project.project_id,
+            ProjectMember.person_id == person_id,
+        )
+        .scalar_subquery()
+        .label("direct_role")
+    )
+    via_team = (
+        select(ProjectTeam.team_id)
+        .join(TeamMember, TeamMember.team_id == ProjectTeam.team_id)
+        .where(
+            ProjectTeam.project_id == Project.project_id,
+            TeamMember.person_id == person_id,
         )
-        .first()
+        .exists()
+        .label("via_team")
     )
+    return direct_role, via_team
+
 
-    if member:
-        role_hierarchy = {ProjectRole.ADMIN: 3, ProjectRole.MEMBER: 2, ProjectRole.VIEWER: 1}
-        if role_hierarchy.get(member.role, 0) >= role_hierarchy.get(min_role, 0):
-            return project
+def project_access_query(project_id: int, person_id: int) -> Select:
+    """The project with the person's direct role and team access; see effective_role()."""
+    return select(Project, *_access_columns(person_id)).where(Project.project_id == project_id)
 
-    # Check via team membership
-    team_ids = (
-        db.query(ProjectTeam.team_id)
-        .filter(ProjectTeam.project_id == project_id)
-        .subquery()
+
+def task_access_query(task_id: int, person_id: int) -> Select:
+    """The task, its project's creator and the person's direct role and team access."""
+    return (
+        select(Task, Project.created_by, *_access_columns(person_id))
+        .join(Project, Project.project_id == Task.project_id)
+        .where(Task.task_id == task_id)
     )
-    team_member = (
-        db.query(TeamMember)
-        .filter(
-            TeamMember.team_id.in_(team_ids),
-            TeamMember.person_id == user.person_id,
-        )
-        .first()
+
+
+def accessible_project_ids(person_id: int) -> CompoundSelect:
+    """Subquery of the projects a person can see, directly or through a team."""
+    direct = select(ProjectMember.project_id).where(ProjectMember.person_id == person_id)
+    via_team = (
+        select(ProjectTeam.project_id)
+        .join(TeamMember, TeamMember.team_id == ProjectTeam.team_id)
+        .where(TeamMember.person_id == person_id)
     )
+    return direct.union(via_team)
 
-    if team_member:
+
+def effective_role(
+    direct_role: ProjectRole | None, via_team: bool, created_by: int, person_id: int
+) -> ProjectRole | None:
+    """Combine direct membership, team membership and ownership into one role."""
+    candidates = []
+    if direct_role is not None:
+        candidates.append(direct_role)
+    if via_team:
         # Team members get MEMBER-level access
-        if min_role in [ProjectRole.VIEWER, ProjectRole.MEMBER]:
-            return project
+        candidates.append(ProjectRole.MEMBER)
+    if created_by == person_id:
+        # Creator always has access
+        candidates.append(ProjectRole.ADMIN)
+    return max(candidates, key=ROLE_RANK.__getitem__, default=None)
+
 
-    # Creator always has access
-    if project.created_by == user.person_id:
-        return project
+def _require_role(role: ProjectRole | None, min_role: ProjectRole) -> None:
+    if role is None or ROLE_RANK[role] < ROLE_RANK[min_role]:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+async def invalidate_project_roles(person_id: int | None = None, project_id: int | None = None) -> None:
+    """Drop cached roles after a membership change, in every worker."""
+    match = {}
+    if person_id is not None:
+        match["person_id"] = person_id
+    if project_id is not None:
+        match["project_id"] = project_id
+    await role_cache.invalidate(**match)
+
+
+async def resolve_project_access(
+    db: AsyncSession, project_id: int, user: Person
+) -> tuple[Project, ProjectRole | None]:
+    """Return the project and the user's effective role in a single query."""
+    generation = role_cache.generation
+    result = await db.execute(project_access_query(project_id, user.person_id))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    project, direct_role, via_team = row
+    role = effective_role(direct_role, via_team, project.created_by, user.person_id)
+    role_cache.set((user.person_id, project_id), role, generation)
+    return project, role
+
+
+async def require_project_role(
+    db: AsyncSession, project_id: int, user: Person, min_role: ProjectRole = ProjectRole.VIEWER
+) -> ProjectRole:
+    """Like check_project_access for callers that don't need the Project row.
+
+    Served from the role cache when possible, so repeated checks for the same
+    user and project skip the database entirely.
+    """
+    role = role_cache.get((user.person_id, project_id))
+    if role is MISSING:
+        _, role = await resolve_project_access(db, project_id, user)
+    _require_role(role, min_role)
+    return role
 
-    raise HTTPException(status_code=403, detail="Access denied")
 
+async def check_project_access(
+    db: AsyncSession, project_id: int, user: Person, min_role: ProjectRole = ProjectRole.VIEWER
+) -> Project:
+    """Check if user has access to project, return project if yes."""
+    project, role = await resolve_project_access(db, project_id, user)
+    _require_role(role, min_role)
+    return project
 
-def check_project_admin(db: Session, project_id: int, user: Person) -> Project:
+
+async def check_project_admin(db: AsyncSession, project_id: int, user: Person) -> Project:
     """Check if user is project admin."""
-    return check_project_access(db, project_id, user, ProjectRole.ADMIN)
+    return await check_project_access(db, project_id, user, ProjectRole.ADMIN)
 
 
-def check_team_access(
-    db: Session, team_id: int, user: Person, require_owner: bool = False
+async def check_team_access(
+    db: AsyncSession, team_id: int, user: Person, require_owner: bool = False
 ) -> Team:
     """Check if user has access to team."""
-    team = db.query(Team).filter(Team.team_id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-
-    member = (
-        db.query(TeamMember)
-        .filter(
-            TeamMember.team_id == team_id,
-            TeamMember.person_id == user.person_id,
+    result = await db.execute(
+        select(Team, TeamMember.role)
+        .outerjoin(
+            TeamMember,
+            and_(TeamMember.team_id == Team.team_id, TeamMember.person_id == user.person_id),
         )
-        .first()
+        .where(Team.team_id == team_id)
     )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Team not found")
 
-    if not member and team.created_by != user.person_id:
+    team, member_role = row
+
+    if member_role is None and team.created_by != user.person_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
     if require_owner:
-        if team.created_by != user.person_id and (not member or member.role != TeamRole.OWNER):
+        if team.created_by != user.person_id and member_role != TeamRole.OWNER:
             raise HTTPException(status_code=403, detail="Owner access required")
 
     return team
 
 
-def check_task_access(db: Session, task_id: int, user: Person) -> Task:
+async def check_task_access(
+    db: AsyncSession, task_id: int, user: Person, min_role: ProjectRole = ProjectRole.VIEWER
+) -> Task:
     """Check if user has access to task via project."""
-    task = db.query(Task).filter(Task.task_id == task_id).first()
-    if not task:
+    generation = role_cache.generation
+    result = await db.execute(task_access_query(task_id, user.person_id))
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    check_project_access(db, task.project_id, user)
+    task, created_by, direct_role, via_team = row
+    role = effective_role(direct_role, via_team, created_by, user.person_id)
+    role_cache.set((user.person_id, task.project_id), role, generation)
+    _require_role(role, min_role)
     return task
 
 
-def check_comment_access(db: Session, comment_id: int, user: Person) -> Comment:
+async def check_comment_access(
+    db: AsyncSession, comment_id: int, user: Person, min_role: ProjectRole = ProjectRole.VIEWER
+) -> Comment:
     """Check if user can access/modify comment."""
-    comment = db.query(Comment).filter(Comment.comment_id == comment_id).first()
-    if not comment:
+    result = await db.execute(
+        select(Comment, Project.created_by, *_access_columns(user.person_id))
+        .join(Task, Task.task_id == Comment.task_id)
+        .join(Project, Project.project_id == Task.project_id)
+        .where(Comment.comment_id == comment_id)
+    )
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    check_task_access(db, comment.task_id, user)
+    comment, created_by, direct_role, via_team = row
+    _require_role(effective_role(direct_role, via_team, created_by, user.person_id), min_role)
     return comment
 
 
-def check_comment_owner(db: Session, comment_id: int, user: Person) -> Comment:
+async def check_comment_owner(db: AsyncSession, comment_id: int, user: Person) -> Comment:
     """Check if user owns the comment."""
-    comment = check_comment_access(db, comment_id, user)
+    comment = await check_comment_access(db, comment_id, user)
     if comment.person_id != user.person_id:
         raise HTTPException(status_code=403, detail="Not comment owner")
     return comment
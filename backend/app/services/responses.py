@@ -0,0 +1,116 @@
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Comment, Task
+from app.schemas.comment import CommentResponse
+from app.schemas.person import PersonBrief
+from app.schemas.task import TaskWithDetails, TaskTagResponse
+
+
+# The relations rendered in TaskWithDetails
+TASK_RELATIONS = ("assignee", "creator", "tags", "attachments")
+
+
+def task_relations() -> tuple:
+    """Loader options for the relations rendered in TaskWithDetails."""
+    return tuple(selectinload(getattr(Task, name)) for name in TASK_RELATIONS)
+
+
+def subtask_counts_query(task_ids: list[int]) -> Select:
+    """Direct subtask count per parent, for many tasks in one grouped query."""
+    return (
+        select(Task.parent_task_id, func.count(Task.task_id))
+        .where(Task.parent_task_id.in_(task_ids))
+        .group_by(Task.parent_task_id)
+    )
+
+
+async def _subtask_counts(db: AsyncSession, task_ids: list[int]) -> dict[int, int]:
+    if not task_ids:
+        return {}
+    rows = await db.execute(subtask_counts_query(task_ids))
+    return {parent_id: count for parent_id, count in rows}
+
+
+async def tasks_to_response(db: AsyncSession, tasks: list[Task]) -> list[TaskWithDetails]:
+    """Convert tasks to responses.
+
+    Relations are expected to be eager-loaded via ``task_relations()``; subtask
+    counts for the whole batch are fetched in one grouped query.
+    """
+    return task_responses(tasks, await _subtask_counts(db, [t.task_id for t in tasks]))
+
+
+def task_responses(tasks: list[Task], subtask_counts: dict[int, int]) -> list[TaskWithDetails]:
+    """tasks_to_response() for callers that already have the subtask counts."""
+    return [
+        TaskWithDetails(
+            task_id=t.task_id,
+            project_id=t.project_id,
+            parent_task_id=t.parent_task_id,
+            name=t.name,
+            description=t.description,
+            assignee_id=t.assignee_id,
+            status=t.status,
+            severity=t.severity,
+            priority=t.priority,
+            due_date=t.due_date,
+            created_by=t.created_by,
+            created_at=t.created_at,
+            updated_at=t.updated_at,
+            is_archived=t.is_archived,
+            tags=[TaskTagResponse(tag=tag.tag) for tag in t.tags],
+            assignee=PersonBrief.model_validate(t.assignee) if t.assignee else None,
+            creator=PersonBrief.model_validate(t.creator) if t.creator else None,
+            attachments=[
+                {
+                    "attachment_id": a.attachment_id,
+                    "file_name": a.file_name,
+                    "file_type": a.file_type,
+                    "file_size": a.file_size,
+                    "uploaded_by": a.uploaded_by,
+                    "uploaded_at": a.uploaded_at,
+                }
+                for a in t.attachments
+            ],
+            subtask_count=subtask_counts.get(t.task_id, 0),
+            comment_count=t.comment_count,
+        )
+        for t in tasks
+    ]
+
+
+def comment_relations() -> tuple:
+    """Loader options for the relations rendered in CommentResponse."""
+    return (
+        selectinload(Comment.person),
+        selectinload(Comment.attachments),
+    )
+
+
+def comments_to_response(comments: list[Comment]) -> list[CommentResponse]:
+    """Convert comments loaded with ``comment_relations()`` to responses."""
+    return [
+        CommentResponse(
+            comment_id=c.comment_id,
+            task_id=c.task_id,
+            person_id=c.person_id,
+            text=c.text,
+            is_system_comment=c.is_system_comment,
+            created_at=c.created_at,
+            edited_at=c.edited_at,
+            person=PersonBrief.model_validate(c.person) if c.person else None,
+            attachments=[
+                {
+                    "attachment_id": a.attachment_id,
+                    "file_name": a.file_name,
+                    "file_type": a.file_type,
+                    "file_size": a.file_size,
+                    "uploaded_at": a.uploaded_at,
+                }
+                for a in c.attachments
+            ],
+        )
+        for c in comments
+    ]
@@ -0,0 +1,242 @@
+"""Resumable uploads over the tus 1.0 protocol.
+
+Supports the core protocol plus the creation, expiration and termination
+extensions. A session's bytes are appended to UPLOAD_DIR/resumable/<id>,
+and the file's size is the upload offset. So whatever arrived before a
+dropped connection counts, and the client picks up from there with a HEAD
+and another PATCH. With several API nodes, UPLOAD_DIR has to be shared
+between them.
+"""
+import base64
+import binascii
+import fcntl
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+
+from app.config import get_settings
+from app.models import UploadSession
+from app.services.uploads import UPLOAD_CHUNK_SIZE, ReceivedUpload, upload_temp_dir
+
+settings = get_settings()
+
+TUS_VERSION = "1.0.0"
+TUS_EXTENSIONS = "creation,expiration,termination"
+TUS_CONTENT_TYPE = "application/offset+octet-stream"
+# Response headers a cross-origin tus client has to be able to read
+TUS_EXPOSE_HEADERS = ["Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires"]
+
+
+def resumable_dir() -> str:
+    return os.path.join(settings.upload_dir, "resumable")
+
+
+def session_path(upload_id: str) -> str:
+    return os.path.join(resumable_dir(), upload_id)
+
+
+def new_upload_id() -> str:
+    return uuid.uuid4().hex
+
+
+def session_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.resumable_upload_expiry_hours)
+
+
+def require_tus(request: Request) -> None:
+    if request.headers.get("tus-resumable") != TUS_VERSION:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Tus-Resumable: {TUS_VERSION} required",
+            headers={"Tus-Version": TUS_VERSION},
+        )
+
+
+def header_int(request: Request, name: str) -> int:
+    value = request.headers.get(name, "")
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail=f"Missing or invalid {name} header")
+    return int(value)
+
+
+def parse_metadata(header: str) -> dict[str, str]:
+    """Decode Upload-Metadata: comma-separated ``key base64value`` pairs."""
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for {key!r}")
+    return metadata
+
+
+def tus_headers(session: UploadSession, offset: int) -> dict[str, str]:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(session.file_size),
+        "Upload-Expires": format_datetime(session.expires_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def create_session_file(upload_id: str) -> None:
+    os.makedirs(resumable_dir(), exist_ok=True)
+    open(session_path(upload_id), "xb").close()
+
+
+def session_offset(session: UploadSession) -> int | None:
+    """Bytes received so far; None if the session's file is gone."""
+    if session.attachment_id is not None:
+        return session.file_size
+    try:
+        return os.path.getsize(session_path(session.upload_id))
+    except FileNotFoundError:
+        return None
+
+
+def remove_session_file(upload_id: str) -> None:
+    remove_temp_file(session_path(upload_id))
+
+
+def remove_temp_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _open_locked(path: str) -> BinaryIO | None:
+    """Open a session file for appending, or None if another request is writing to it."""
+    f = open(path, "r+b")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def _write(f: BinaryIO, data: bytes) -> None:
+    f.write(data)
+
+
+def _complete(f: BinaryIO, path: str) -> tuple[str, str]:
+    """Hash the finished file and link it into the temp dir, still under its lock.
+
+    store_blob() consumes the link. The session's own file stays until the
+    attachment commits, so if attaching fails the upload is still complete
+    and the client retries with an empty final PATCH.
+    """
+    f.flush()
+    os.fsync(f.fileno())
+    f.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    os.makedirs(upload_temp_dir(), exist_ok=True)
+    temp_path = os.path.join(upload_temp_dir(), f"{uuid.uuid4().hex}.part")
+    os.link(path, temp_path)
+    return temp_path, digest.hexdigest()
+
+
+async def receive_chunk(request: Request, session: UploadSession, offset: int) -> tuple[int, ReceivedUpload | None]:
+    """Append a PATCH body to the session at ``offset``.
+
+    Returns the new offset. Once the last byte is in, it also returns the
+    complete file, hashed and ready for store_blob(); an empty PATCH at the
+    final offset returns it again. If the client drops mid-body, everything
+    that arrived is kept.
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and offset + int(declared) > session.file_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Chunk runs past Upload-Length")
+
+    path = session_path(session.upload_id)
+    try:
+        f = await run_in_threadpool(_open_locked, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if f is None:
+        raise HTTPException(status_code=status.HTTP_423_LOCKED, detail="Another request is writing to this upload")
+
+    try:
+        current = os.fstat(f.fileno()).st_size
+        if current != offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload-Offset {offset} does not match the {current} bytes received",
+                headers={"Upload-Offset": str(current), "Tus-Resumable": TUS_VERSION},
+            )
+        f.seek(offset)
+        pending = bytearray()
+        try:
+            async for chunk in request.stream():
+                if offset + len(pending) + len(chunk) > session.file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Chunk runs past Upload-Length",
+                    )
+                pending += chunk
+                if len(pending) >= UPLOAD_CHUNK_SIZE:
+                    await run_in_threadpool(_write, f, bytes(pending))
+                    offset += len(pending)
+                    pending.clear()
+        except ClientDisconnect:
+            pass  # keep what arrived; the client resumes from here
+        if pending:
+            await run_in_threadpool(_write, f, bytes(pending))
+            offset += len(pending)
+
+        if offset < session.file_size:
+            await run_in_threadpool(f.flush)
+            return offset, None
+        temp_path, sha256 = await run_in_threadpool(_complete, f, path)
+        return offset, ReceivedUpload(
+            file_name=session.file_name,
+            temp_path=temp_path,
+            size=offset,
+            sha256=sha256,
+        )
+    finally:
+        await run_in_threadpool(f.close)
+
+
+def purge_expired_sessions(db: Session) -> int:
+    """Delete sessions past their expiry, and files whose session is gone; returns how many sessions.
+
+    A session also disappears without expiring when its task, comment or
+    owner is deleted. Its file is removed here too.
+    """
+    upload_ids = db.scalars(
+        delete(UploadSession)
+        .where(UploadSession.expires_at < datetime.utcnow())
+        .returning(UploadSession.upload_id)
+    ).all()
+    db.commit()
+    for upload_id in upload_ids:
+        remove_session_file(upload_id)
+
+    # A file is only created after its session row commits, so a file with
+    # no row belongs to a session that has gone
+    try:
+        names = os.listdir(resumable_dir())
+    except FileNotFoundError:
+        names = []
+    if names:
+        known = set(db.scalars(select(UploadSession.upload_id).where(UploadSession.upload_id.in_(names))))
+        for name in names:
+            if name not in known:
+                remove_session_file(name)
+    db.rollback()
+    return len(upload_ids)
@@ -0,0 +1,253 @@
+"""Where attachment files live.
+
+Files are addressed by keys like ``blobs/ab/ab12...``. The local driver maps
+keys to paths under UPLOAD_DIR and the S3 driver uses them as object keys,
+so switching between the two is a plain copy of the tree.
+"""
+import base64
+import os
+from abc import ABC, abstractmethod
+import shutil
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
+from urllib.parse import quote
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    # Unix time
+    modified_at: float
+    # Base64 SHA-256 the store verified on upload, if it keeps one
+    checksum_sha256: str | None = None
+
+
+def sha256_checksum(sha256: str) -> str:
+    """Hex digest to the base64 form S3 uses in x-amz-checksum-sha256."""
+    return base64.b64encode(bytes.fromhex(sha256)).decode()
+
+
+class Storage(ABC):
+    """Stores files by key. Methods block, so call them from a threadpool in requests."""
+
+    @abstractmethod
+    def put_file(self, path: str, key: str) -> None:
+        """Store the contents of a local file under ``key``; the file itself stays."""
+
+    @abstractmethod
+    def copy(self, source_key: str, key: str) -> None:
+        """Store the object at ``source_key`` under ``key`` as well."""
+
+    @abstractmethod
+    def stat(self, key: str) -> StoredObject | None:
+        """Size and modification time of ``key``, or None if there's no such object."""
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def touch(self, key: str) -> None:
+        """Set the modification time of ``key`` to now; a missing key is left missing."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete ``key``; deleting a missing key is not an error."""
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        """Every object whose key starts with ``prefix``."""
+
+    def local_path(self, key: str) -> str | None:
+        """Path to serve the file from directly, when it is on local disk."""
+        return None
+
+    def download_url(self, key: str, file_name: str, media_type: str) -> str | None:
+        """Presigned URL that downloads the file without going through the API."""
+        return None
+
+    def upload_url(self, key: str, size: int, sha256: str) -> tuple[str, dict[str, str]] | None:
+        """Presigned URL a client can PUT exactly this file to, and the headers it must send."""
+        return None
+
+
+class LocalStorage(Storage):
+    """Files under a directory; one node, or several sharing a volume."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _link(self, source: str, key: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source, path)
+        except FileExistsError:
+            pass  # content-addressed: already stored
+        except OSError:
+            # No hard links here (or another filesystem): copy, then rename into place
+            shutil.copyfile(source, path + ".part")
+            os.replace(path + ".part", path)
+        # A link keeps the source's modification time, which may be old
+        self.touch(key)
+
+    def put_file(self, path: str, key: str) -> None:
+        self._link(path, key)
+
+    def copy(self, source_key: str, key: str) -> None:
+        self._link(self._path(source_key), key)
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key=key, size=st.st_size, modified_at=st.st_mtime)
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        for directory, _, files in os.walk(self._path(prefix)):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield StoredObject(key=key, size=st.st_size, modified_at=st.st_mtime)
+
+    def local_path(self, key: str) -> str | None:
+        return self._path(key)
+
+
+class S3Storage(Storage):
+    """An S3-compatible bucket: AWS S3, MinIO, Ceph RGW and the like."""
+
+    def __init__(self):
+        # Only needed with STORAGE_BACKEND=s3
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        self.bucket = settings.s3_bucket
+        options = {
+            "region_name": settings.s3_region or None,
+            "aws_access_key_id": settings.s3_access_key_id or None,
+            "aws_secret_access_key": settings.s3_secret_access_key or None,
+            "config": Config(
+                signature_version="s3v4",
+                s3={"addressing_style": "path" if settings.s3_path_style else "auto"},
+            ),
+        }
+        self.client = boto3.client("s3", endpoint_url=settings.s3_endpoint_url or None, **options)
+        # Presigned URLs are opened by browsers, which may reach the store under another name
+        self.signer = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_public_endpoint_url or settings.s3_endpoint_url or None,
+            **options,
+        )
+        self.transfer = TransferConfig(
+            multipart_threshold=settings.s3_multipart_part_bytes,
+            multipart_chunksize=settings.s3_multipart_part_bytes,
+        )
+        self._client_error = ClientError
+
+    def put_file(self, path: str, key: str) -> None:
+        self.client.upload_file(path, self.bucket, key, Config=self.transfer)
+
+    def copy(self, source_key: str, key: str) -> None:
+        # Server-side; large objects are copied part by part
+        self.client.copy({"Bucket": self.bucket, "Key": source_key}, self.bucket, key, Config=self.transfer)
+
+    def touch(self, key: str) -> None:
+        # No utime in S3: copying the object onto itself gives it a new
+        # LastModified, and copying onto itself needs a metadata directive
+        try:
+            self.client.copy(
+                {"Bucket": self.bucket, "Key": key},
+                self.bucket,
+                key,
+                ExtraArgs={"MetadataDirective": "REPLACE"},
+                Config=self.transfer,
+            )
+        except self._client_error as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                raise
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except self._client_error as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(
+            key=key,
+            size=head["ContentLength"],
+            modified_at=head["LastModified"].timestamp(),
+            checksum_sha256=head.get("ChecksumSHA256"),
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix.rstrip("/") + "/"):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    key=item["Key"],
+                    size=item["Size"],
+                    modified_at=item["LastModified"].timestamp(),
+                )
+
+    def download_url(self, key: str, file_name: str, media_type: str) -> str | None:
+        return self.signer.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentType": media_type,
+                "ResponseContentDisposition": f"attachment; filename*=UTF-8''{quote(file_name)}",
+            },
+            ExpiresIn=settings.presigned_url_expiry_seconds,
+        )
+
+    def upload_url(self, key: str, size: int, sha256: str) -> tuple[str, dict[str, str]] | None:
+        if not settings.s3_direct_uploads:
+            return None
+        checksum = sha256_checksum(sha256)
+        # Length and checksum are signed, so the store rejects any other content
+        url = self.signer.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentLength": size, "ChecksumSHA256": checksum},
+            ExpiresIn=settings.presigned_url_expiry_seconds,
+        )
+        return url, {"x-amz-checksum-sha256": checksum}
+
+
+@lru_cache
+def get_storage() -> Storage:
+    if settings.storage_backend == "s3":
+        return S3Storage()
+    return LocalStorage(settings.upload_dir)
@@ -1,8 +1,11 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from sqlalchemy import Row, String, cast, func, insert, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Comment, Person, Task, TaskStatus
 
 
-def create_system_comment(db: Session, task_id: int, person_id: int, text: str) -> Comment:
+def create_system_comment(db: AsyncSession, task_id: int, person_id: int, text: str) -> Comment:
     """Create a system-generated comment."""
     comment = Comment(
         task_id=task_id,
@@ -15,27 +18,70 @@ def create_system_comment(db: Session, task_id: int, person_id: int, text: str)
 
 
 def log_status_change(
-    db: Session,
+    db: AsyncSession,
     task: Task,
     old_status: TaskStatus | None,
     new_status: TaskStatus,
     changed_by: Person,
-) -> None:
+) -> Comment:
     """Log a status change as system comment."""
     old_name = old_status.value if old_status else "None"
     text = f"Status changed from {old_name} to {new_status.value}"
-    create_system_comment(db, task.task_id, changed_by.person_id, text)
+    return create_system_comment(db, task.task_id, changed_by.person_id, text)
 
 
 def log_assignee_change(
-    db: Session,
+    db: AsyncSession,
     task: Task,
     old_assignee: Person | None,
     new_assignee: Person | None,
     changed_by: Person,
-) -> None:
+) -> Comment:
     """Log an assignee change as system comment."""
     old_name = old_assignee.name if old_assignee else "Unassigned"
     new_name = new_assignee.name if new_assignee else "Unassigned"
     text = f"Assignee changed from {old_name} to {new_name}"
-    create_system_comment(db, task.task_id, changed_by.person_id, text)
+    return create_system_comment(db, task.task_id, changed_by.person_id, text)
+
+
+async def _insert_system_comments(db: AsyncSession, rows) -> list[Row]:
+    """INSERT ... SELECT system comments from (task_id, text) rows; returns (comment_id, task_id)."""
+    rows = rows.add_columns(literal(datetime.utcnow()), true())
+    result = await db.execute(
+        insert(Comment)
+        .from_select(["task_id", "person_id", "text", "created_at", "is_system_comment"], rows)
+        .returning(Comment.comment_id, Comment.task_id)
+    )
+    return result.all()
+
+
+async def log_status_changes(
+    db: AsyncSession, task_ids: list[int], new_status: TaskStatus, changed_by: Person
+) -> list[Row]:
+    """log_status_change() for many tasks in one statement.
+
+    Reads each task's current status, so run it before updating them.
+    """
+    text = "Status changed from " + cast(Task.status, String) + literal(f" to {new_status.value}")
+    return await _insert_system_comments(
+        db, select(Task.task_id, literal(changed_by.person_id), text).where(Task.task_id.in_(task_ids))
+    )
+
+
+async def log_assignee_changes(
+    db: AsyncSession, task_ids: list[int], new_assignee: Person | None, changed_by: Person
+) -> list[Row]:
+    """log_assignee_change() for many tasks in one statement.
+
+    Reads each task's current assignee, so run it before updating them.
+    """
+    new_name = new_assignee.name if new_assignee else "Unassigned"
+    text = (
+        "Assignee changed from " + func.coalesce(Person.name, "Unassigned") + literal(f" to {new_name}")
+    )
+    return await _insert_system_comments(
+        db,
+        select(Task.task_id, literal(changed_by.person_id), text)
+        .outerjoin(Person, Person.person_id == Task.assignee_id)
+        .where(Task.task_id.in_(task_ids)),
+    )
@@ -0,0 +1,358 @@
+"""Bulk task import from CSV or NDJSON, in resumable batches.
+
+Rows are parsed as the input streams in and written a batch at a time: one
+lookup each for the batch's assignees and parent tasks, then one multi-row
+INSERT each for tasks, tags, status history and outbox events, and one
+block of change-feed entries. Every batch commits together with the
+import's checkpoint (the number of input rows handled), so a run that is
+interrupted can be repeated with the same key and picks up after the last
+committed batch.
+"""
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models import ChangeEntity, OutboxMessage, Person, Task, TaskImport, TaskStatusHistory, TaskTag
+from app.schemas.task import TaskImportError, TaskImportResult, TaskImportRow
+from app.services.changes import record_changes
+
+settings = get_settings()
+
+IMPORT_FORMATS = ("csv", "ndjson")
+# Row errors returned in full; any more are only counted
+MAX_REPORTED_ERRORS = 1000
+# Longest row accepted, so a body without line breaks can't fill memory
+MAX_ROW_CHARS = 1024 * 1024
+
+# The handler reads the body itself; this documents it in /docs
+IMPORT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "text/csv": {"schema": {"type": "string"}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+        },
+    },
+}
+
+# A parsed row, or why it couldn't be parsed
+Record = dict | str
+
+
+def new_import_key() -> str:
+    return uuid.uuid4().hex
+
+
+def import_format(content_type: str) -> str:
+    """The import format a Content-Type names."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send text/csv or application/x-ndjson",
+    )
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Lines of a UTF-8 byte stream, without their line endings."""
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.removesuffix("\r")
+            if len(pending) > MAX_ROW_CHARS:
+                raise HTTPException(status_code=400, detail=f"Rows are limited to {MAX_ROW_CHARS} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import must be UTF-8")
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """Rows of a CSV with a header line, keyed by lower-cased column name.
+
+    Quoted cells may span lines: a line that leaves a quote open is joined
+    with the next. Empty cells are left out so the row's defaults apply.
+    """
+    header = None
+    pending: list[str] = []
+    quotes = 0
+    async for line in lines:
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(map(len, pending)) > MAX_ROW_CHARS:
+                raise HTTPException(status_code=400, detail=f"Rows are limited to {MAX_ROW_CHARS} characters")
+            continue
+        text = "\n".join(pending)
+        pending, quotes = [], 0
+        if not text.strip():
+            continue
+        try:
+            cells = next(csv.reader([text], strict=True))
+        except csv.Error as e:
+            if header is None:
+                raise HTTPException(status_code=400, detail=f"Invalid CSV header: {e}")
+            yield f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [cell.strip().lower() for cell in cells]
+            if "name" not in header:
+                raise HTTPException(status_code=400, detail="The CSV header needs a name column")
+            continue
+        if len(cells) != len(header):
+            yield f"Expected {len(header)} fields, got {len(cells)}"
+            continue
+        yield {column: cell for column, cell in zip(header, cells) if cell.strip()}
+    if pending:
+        yield "Quoted field is never closed"
+
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """One JSON object per non-blank line."""
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield f"Invalid JSON: {e}"
+            continue
+        yield value if isinstance(value, dict) else "Expected a JSON object"
+
+
+def parse_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    """The rows of a CSV or NDJSON byte stream, parsed as it arrives."""
+    lines = _lines(chunks)
+    return _csv_records(lines) if fmt == "csv" else _ndjson_records(lines)
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in e.errors()
+    )
+
+
+class _Lookups:
+    """One query per batch for its assignees and parents; people found are kept for later batches."""
+
+    def __init__(self, db: AsyncSession, project_id: int):
+        self.db = db
+        self.project_id = project_id
+        # Assignee email -> person id (None if unknown), and known person ids
+        self.emails: dict[str, int | None] = {}
+        self.people: set[int] = set()
+
+    async def resolve(
+        self, rows: list[tuple[int, TaskImportRow]]
+    ) -> tuple[list[tuple[int, TaskImportRow, int | None]], list[TaskImportError]]:
+        """Rows that can be inserted, with their assignee ids, and errors for the rest."""
+        emails = {row.assignee_email for _, row in rows if row.assignee_email} - self.emails.keys()
+        if emails:
+            found = dict((await self.db.execute(
+                select(Person.email, Person.person_id).where(Person.email.in_(emails))
+            )).all())
+            self.emails.update((email, found.get(email)) for email in emails)
+            self.people.update(found.values())
+
+        person_ids = {row.assignee_id for _, row in rows if row.assignee_id} - self.people
+        if person_ids:
+            self.people.update(await self.db.scalars(select(Person.person_id).where(Person.person_id.in_(person_ids))))
+
+        parent_ids = {row.parent_task_id for _, row in rows if row.parent_task_id}
+        parents = set()
+        if parent_ids:
+            parents = set(await self.db.scalars(
+                select(Task.task_id).where(Task.task_id.in_(parent_ids), Task.project_id == self.project_id)
+            ))
+
+        valid, errors = [], []
+        for n, row in rows:
+            assignee_id = row.assignee_id or None
+            if row.assignee_email:
+                assignee_id = self.emails[row.assignee_email]
+                if assignee_id is None:
+                    errors.append(TaskImportError(row=n, error=f"No user with email {row.assignee_email}"))
+                    continue
+            elif assignee_id is not None and assignee_id not in self.people:
+                errors.append(TaskImportError(row=n, error="Assignee not found"))
+                continue
+            if row.parent_task_id and row.parent_task_id not in parents:
+                errors.append(TaskImportError(row=n, error="Invalid parent task"))
+                continue
+            valid.append((n, row, assignee_id))
+        return valid, errors
+
+
+async def _insert_tasks(
+    db: AsyncSession,
+    project_id: int,
+    person_id: int,
+    rows: list[tuple[int, TaskImportRow, int | None]],
+) -> list[int]:
+    """Create the tasks with their tags, initial status and task.created events; returns their ids."""
+    now = datetime.utcnow()
+    task_ids = (await db.scalars(
+        insert(Task).returning(Task.task_id, sort_by_parameter_order=True),
+        [
+            {
+                "project_id": project_id,
+                "parent_task_id": row.parent_task_id or None,
+                "name": row.name,
+                "description": row.description,
+                "assignee_id": assignee_id,
+                "status": row.status,
+                "severity": row.severity,
+                "priority": row.priority,
+                "due_date": row.due_date,
+                "created_by": person_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for _, row, assignee_id in rows
+        ],
+    )).all()
+
+    tags = [
+        {"task_id": task_id, "tag": tag}
+        for task_id, (_, row, _) in zip(task_ids, rows)
+        for tag in row.tags
+    ]
+    if tags:
+        await db.execute(insert(TaskTag), tags)
+    await db.execute(insert(TaskStatusHistory), [
+        {"task_id": task_id, "old_status": None, "new_status": row.status, "changed_by": person_id, "changed_at": now}
+        for task_id, (_, row, _) in zip(task_ids, rows)
+    ])
+    # Same payload as create_task's
+    await db.execute(insert(OutboxMessage), [
+        {
+            "topic": "task.created",
+            "payload": {
+                "name": row.name,
+                "description": row.description,
+                "status": row.status.value,
+                "assignee_id": assignee_id,
+                "severity": row.severity,
+                "priority": row.priority,
+                "due_date": row.due_date.isoformat() if row.due_date else None,
+                "is_archived": False,
+                "task_id": task_id,
+                "project_id": project_id,
+                "tags": row.tags,
+                "created_by": person_id,
+            },
+        }
+        for task_id, (_, row, assignee_id) in zip(task_ids, rows)
+    ])
+    await record_changes(db, project_id, ChangeEntity.TASK, list(task_ids))
+    return list(task_ids)
+
+
+async def _start(db: AsyncSession, project_id: int, person_id: int, import_key: str) -> TaskImport:
+    await db.execute(
+        pg_insert(TaskImport)
+        .values(project_id=project_id, import_key=import_key, person_id=person_id)
+        .on_conflict_do_nothing()
+    )
+    await db.commit()
+    job = await db.get(TaskImport, (project_id, import_key))
+    if job.person_id != person_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another user's import has this key")
+    return job
+
+
+async def import_tasks(
+    db: AsyncSession,
+    project_id: int,
+    person_id: int,
+    records: AsyncIterator[Record],
+    import_key: str,
+) -> TaskImportResult:
+    """Create a task for each valid row, committing every TASK_IMPORT_BATCH_SIZE rows.
+
+    Rows before the key's checkpoint are read but not imported again. The
+    caller checks access to the project.
+    """
+    job = await _start(db, project_id, person_id, import_key)
+    result = TaskImportResult(import_key=import_key, rows=job.rows_done, created=0, skipped=0, failed=0, finished=False)
+    lookups = _Lookups(db, project_id)
+    pending: list[tuple[int, Record]] = []
+
+    async def flush(last_row: int, finished: bool) -> None:
+        rows, errors = [], []
+        for n, record in pending:
+            if isinstance(record, str):
+                errors.append(TaskImportError(row=n, error=record))
+                continue
+            try:
+                rows.append((n, TaskImportRow.model_validate(record)))
+            except ValidationError as e:
+                errors.append(TaskImportError(row=n, error=_validation_message(e)))
+        valid, lookup_errors = await lookups.resolve(rows) if rows else ([], [])
+        errors = sorted(errors + lookup_errors, key=lambda e: e.row)
+        created = await _insert_tasks(db, project_id, person_id, valid) if valid else []
+
+        now = datetime.utcnow()
+        checkpoint = await db.execute(
+            update(TaskImport)
+            .where(
+                TaskImport.project_id == project_id,
+                TaskImport.import_key == import_key,
+                TaskImport.rows_done == result.rows,
+            )
+            .values(
+                rows_done=last_row,
+                created=TaskImport.created + len(created),
+                failed=TaskImport.failed + len(errors),
+                updated_at=now,
+                finished_at=now if finished else None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if checkpoint.rowcount != 1:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Another run of this import got ahead of this one",
+            )
+        await db.commit()
+
+        result.rows = last_row
+        result.created += len(created)
+        result.failed += len(errors)
+        result.errors.extend(errors[:MAX_REPORTED_ERRORS - len(result.errors)])
+        pending.clear()
+
+    n = 0
+    async for record in records:
+        n += 1
+        if n <= job.rows_done:
+            result.skipped += 1
+            continue
+        pending.append((n, record))
+        if len(pending) >= settings.task_import_batch_size:
+            await flush(n, finished=False)
+    if pending or job.finished_at is None:
+        await flush(max(n, result.rows), finished=True)
+    result.finished = True
+    return result
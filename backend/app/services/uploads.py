@@ -0,0 +1,192 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Bytes buffered before each write; memory per upload stays at about this
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Slack over MAX_UPLOAD_BYTES for boundaries and part headers when
+# rejecting on Content-Length before reading anything
+MULTIPART_OVERHEAD = 64 * 1024
+
+# The handlers read the body themselves; this documents it in /docs
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                },
+            },
+        },
+    },
+}
+
+
+@dataclass
+class ReceivedUpload:
+    file_name: str
+    # Complete and fsynced, but not yet in the blob store; see store_blob()
+    temp_path: str
+    size: int
+    sha256: str
+
+
+def upload_temp_dir() -> str:
+    """Where uploads are written while in flight; on the same filesystem as the blobs."""
+    return os.path.join(settings.upload_dir, "tmp")
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {settings.max_upload_bytes} byte upload limit",
+    )
+
+
+def _write_chunk(f: BinaryIO, digest, data: bytes) -> None:
+    # hashlib releases the GIL for large buffers, so both run off the event loop
+    digest.update(data)
+    f.write(data)
+
+
+def _finish(f: BinaryIO) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def _discard(f: BinaryIO | None, temp_path: str) -> None:
+    if f is not None:
+        f.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+class _FileFieldParser:
+    """Callbacks for MultipartParser that collect the bytes of one file field.
+
+    Data for other fields is dropped; only the first part named ``field``
+    with a filename is kept.
+    """
+
+    def __init__(self, field: str):
+        self.field = field.encode()
+        self.file_name: str | None = None
+        self.pending = bytearray()
+        self.size = 0
+        self.done = False
+        self._capturing = False
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._capturing = (
+            not self.done
+            and options.get(b"name") == self.field
+            and b"filename" in options
+        )
+        if self._capturing:
+            self.file_name = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._capturing:
+            self.pending += data[start:end]
+            self.size += end - start
+
+    def on_part_end(self) -> None:
+        if self._capturing:
+            self._capturing = False
+            self.done = True
+
+
+async def receive_upload(request: Request, field: str = "file") -> ReceivedUpload:
+    """Stream the ``field`` file of a multipart request body to a temp file.
+
+    The body is parsed as it arrives and written through a fixed-size buffer
+    to the upload temp directory, hashing as it goes; store_blob() then stores
+    it under its hash. Bodies over MAX_UPLOAD_BYTES are rejected as
+    soon as they cross the limit.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected a multipart/form-data upload",
+        )
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > settings.max_upload_bytes + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    directory = upload_temp_dir()
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+    handler = _FileFieldParser(field)
+    parser = MultipartParser(params[b"boundary"], handler.callbacks())
+    digest = hashlib.sha256()
+    f = None
+    try:
+        f = await run_in_threadpool(open, temp_path, "wb")
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if handler.size > settings.max_upload_bytes:
+                raise _too_large()
+            if len(handler.pending) >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(_write_chunk, f, digest, bytes(handler.pending))
+                handler.pending.clear()
+        parser.finalize()
+        if not handler.done:
+            raise HTTPException(status_code=422, detail=f"Missing file field '{field}'")
+        if handler.pending:
+            await run_in_threadpool(_write_chunk, f, digest, bytes(handler.pending))
+        await run_in_threadpool(_finish, f)
+    except BaseException:
+        await run_in_threadpool(_discard, f, temp_path)
+        raise
+
+    return ReceivedUpload(
+        file_name=handler.file_name or "unnamed",
+        temp_path=temp_path,
+        size=handler.size,
+        sha256=digest.hexdigest(),
+    )
@@ -0,0 +1,26 @@
+import hashlib
+import hmac
+import json
+import urllib.request
+
+from app.config import get_settings
+from app.services.outbox import handler
+
+settings = get_settings()
+
+WEBHOOK_TOPICS = ("task.created", "task.updated", "task.deleted", "comment.created")
+
+
+@handler(*WEBHOOK_TOPICS)
+def deliver_webhook(topic: str, payload: dict) -> None:
+    """POST the event to WEBHOOK_URL; any non-2xx response is retried by the outbox."""
+    if not settings.webhook_url:
+        return
+    body = json.dumps({"event": topic, "data": payload}, default=str).encode()
+    headers = {"Content-Type": "application/json", "X-Tasker-Event": topic}
+    if settings.webhook_secret:
+        signature = hmac.new(settings.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        headers["X-Tasker-Signature"] = f"sha256={signature}"
+    request = urllib.request.Request(settings.webhook_url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(request, timeout=settings.webhook_timeout_seconds):
+        pass
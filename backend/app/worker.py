@@ -0,0 +1,77 @@
+"""Outbox worker: runs side effects queued by API requests.
+
+    python -m app.worker
+
+Any number of workers can run side by side; messages are leased with
+SKIP LOCKED so each is handled by one worker at a time. The worker also
+garbage-collects attachment blobs, so it needs the same storage settings
+as the API (and the uploads volume with local storage).
+"""
+import logging
+import signal
+import threading
+import time
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services import webhooks  # noqa: F401  (registers handlers)
+from app.services.blobs import collect_garbage, remove_legacy_files, sweep_stray_files
+from app.services.outbox import process_batch, purge_processed
+from app.services.resumable import purge_expired_sessions
+
+logger = logging.getLogger("app.worker")
+settings = get_settings()
+
+PURGE_INTERVAL_SECONDS = 600
+BLOB_GC_INTERVAL_SECONDS = 3600
+# Walks every stored file, so much less often
+STRAY_FILE_SWEEP_INTERVAL_SECONDS = 24 * 3600
+
+
+def run(stop: threading.Event) -> None:
+    next_purge = next_blob_gc = next_sweep = 0.0
+    while not stop.is_set():
+        try:
+            with SessionLocal() as db:
+                # Keep draining while batches come back full
+                while process_batch(db, settings.outbox_batch_size) >= settings.outbox_batch_size:
+                    if stop.is_set():
+                        return
+                if time.monotonic() >= next_purge:
+                    purged = purge_processed(db)
+                    if purged:
+                        logger.info("Purged %s processed outbox messages", purged)
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                if time.monotonic() >= next_blob_gc:
+                    removed = collect_garbage(db)
+                    if removed:
+                        logger.info("Deleted %s unreferenced attachment blobs", removed)
+                    expired = purge_expired_sessions(db)
+                    if expired:
+                        logger.info("Deleted %s expired resumable uploads", expired)
+                    next_blob_gc = time.monotonic() + BLOB_GC_INTERVAL_SECONDS
+                if time.monotonic() >= next_sweep:
+                    removed = sweep_stray_files(db)
+                    if removed:
+                        logger.info("Removed %s stray upload files", removed)
+                    removed = remove_legacy_files(db)
+                    if removed:
+                        logger.info("Removed %s attachment files already moved to the blob store", removed)
+                    next_sweep = time.monotonic() + STRAY_FILE_SWEEP_INTERVAL_SECONDS
+        except Exception:
+            logger.exception("Outbox worker iteration failed")
+        stop.wait(settings.outbox_poll_seconds)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    logger.info("Outbox worker started")
+    run(stop)
+    logger.info("Outbox worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""The API with task list/get/update served the pre-async way, for task_endpoints.py.
+
+Those three endpoints run as plain ``def`` handlers on Starlette's
+threadpool, with a sync Session from get_db and the same queries as the
+async routes. Authentication goes through the sync session too. Every other
+route is the regular app, so the same benchmark seeding works:
+
+    uvicorn benchmarks.sync_app:app --port 8001
+
+Run from backend/; task_endpoints.py --serve starts it alongside the async app.
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from jose import JWTError, jwt
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import get_db
+from app.main import app
+from app.models import ChangeEntity, Person, ProjectChange, Task, TaskStatusHistory
+from app.schemas.task import TaskUpdate, TaskWithDetails
+from app.services.auth import oauth2_scheme
+from app.services.changes import change_seq_update
+from app.services.outbox import enqueue
+from app.services.pagination import NEXT_CURSOR_HEADER, clamp_page_size, decode_cursor, encode_cursor
+from app.services.permissions import effective_role, project_access_query, task_access_query
+from app.services.responses import TASK_RELATIONS, subtask_counts_query, task_relations, task_responses
+from app.services.system_comments import log_status_change
+
+settings = get_settings()
+router = APIRouter()
+
+
+def current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Person:
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        person = db.get(Person, int(payload["sub"]))
+    except (JWTError, KeyError, ValueError):
+        person = None
+    if person is None or payload.get("ver") not in (None, person.token_version):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return person
+
+
+def _require_access(role) -> None:
+    if role is None:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+def _task(db: Session, task_id: int, user: Person) -> Task:
+    row = db.execute(task_access_query(task_id, user.person_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task, created_by, direct_role, via_team = row
+    _require_access(effective_role(direct_role, via_team, created_by, user.person_id))
+    return task
+
+
+def _responses(db: Session, tasks: list[Task]) -> list[TaskWithDetails]:
+    counts = dict(db.execute(subtask_counts_query([t.task_id for t in tasks])).all()) if tasks else {}
+    return task_responses(tasks, counts)
+
+
+@router.get("", response_model=list[TaskWithDetails])
+def list_tasks(
+    response: Response,
+    project_id: int,
+    include_archived: bool = False,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    user: Person = Depends(current_user),
+):
+    row = db.execute(project_access_query(project_id, user.person_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project, direct_role, via_team = row
+    _require_access(effective_role(direct_role, via_team, project.created_by, user.person_id))
+
+    query = select(Task).where(Task.project_id == project_id)
+    if not include_archived:
+        query = query.where(Task.is_archived == False)
+    if cursor:
+        query = query.where(tuple_(Task.priority, Task.created_at, Task.task_id) < decode_cursor(cursor, int, datetime, int))
+    page_size = clamp_page_size(limit, settings.task_page_size, settings.task_page_size_max)
+    tasks = db.scalars(
+        query.options(*task_relations())
+        .order_by(Task.priority.desc(), Task.created_at.desc(), Task.task_id.desc())
+        .limit(page_size + 1)
+    ).all()
+    if len(tasks) > page_size:
+        tasks = tasks[:page_size]
+        last = tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.priority, last.created_at, last.task_id)
+    return _responses(db, tasks)
+
+
+@router.get("/{task_id}", response_model=TaskWithDetails)
+def get_task(task_id: int, db: Session = Depends(get_db), user: Person = Depends(current_user)):
+    task = _task(db, task_id, user)
+    db.refresh(task, list(TASK_RELATIONS))
+    return _responses(db, [task])[0]
+
+
+@router.patch("/{task_id}", response_model=TaskWithDetails)
+def update_task(
+    task_id: int, task_data: TaskUpdate, db: Session = Depends(get_db), user: Person = Depends(current_user)
+):
+    """Status and plain field changes only; that is what the benchmark sends."""
+    if task_data.assignee_id is not None or task_data.tags is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not supported in sync mode")
+    task = _task(db, task_id, user)
+    old_status = task.status
+    changes = {}
+    for field in ("name", "description", "severity", "priority", "due_date", "is_archived"):
+        value = getattr(task_data, field)
+        if value is not None and value != getattr(task, field):
+            changes[field] = [getattr(task, field), value]
+            setattr(task, field, value)
+    comments = []
+    if task_data.status is not None and task_data.status != old_status:
+        task.status = task_data.status
+        changes["status"] = [old_status.value, task.status.value]
+        db.add(TaskStatusHistory(
+            task_id=task.task_id, old_status=old_status, new_status=task.status, changed_by=user.person_id
+        ))
+        comments.append(log_status_change(db, task, old_status, task.status, user))
+
+    db.flush()
+    entries = [(ChangeEntity.TASK, task.task_id)] + [(ChangeEntity.COMMENT, c.comment_id) for c in comments]
+    for entity, entity_id in entries:
+        seq = db.execute(change_seq_update(task.project_id, entity, entity_id)).one()
+        db.add(ProjectChange(project_id=seq.project_id, seq=seq.change_seq, entity=entity, entity_id=entity_id))
+    if changes:
+        enqueue(db, "task.updated", {
+            "task_id": task.task_id,
+            "project_id": task.project_id,
+            "changes": {k: [v.isoformat() if isinstance(v, datetime) else v for v in pair] for k, pair in changes.items()},
+            "tags": None,
+            "changed_by": user.person_id,
+        })
+    db.commit()
+    task = db.scalar(select(Task).options(*task_relations()).where(Task.task_id == task_id))
+    return _responses(db, [task])[0]
+
+
+# Ahead of the async task routes, so these win for the paths they share
+app.include_router(router, prefix="/api/tasks", tags=["tasks (sync)"])
+app.router.routes[:0] = [app.router.routes.pop() for _ in router.routes][::-1]
@@ -0,0 +1,186 @@
+"""Load benchmark for the task list/get/update endpoints.
+
+Compares requests/sec and latency percentiles between API servers. --serve
+starts both modes from this tree, the async app and benchmarks/sync_app.py
+(the same endpoints as sync handlers on the threadpool with get_db), one
+after the other on --port, and benchmarks each:
+
+    python benchmarks/task_endpoints.py --serve --concurrency 64 --duration 30
+
+Or point it at servers already running:
+
+    python benchmarks/task_endpoints.py \
+        --target async=http://localhost:8000 --target sync=http://localhost:8001
+
+Each target gets its own user-owned project seeded with --tasks tasks. Only
+the standard library is used by the client, so it runs from any environment.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def call(base_url: str, method: str, path: str, token: str | None = None, body: dict | None = None, form: dict | None = None):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    request = urllib.request.Request(f"{base_url}{path}", data=data, method=method, headers=headers)
+    with urllib.request.urlopen(request) as response:
+        payload = response.read()
+        return json.loads(payload) if payload else None
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    try:
+        call(base_url, "POST", "/api/auth/register", body={"name": "Benchmark", "email": email, "password": password})
+    except urllib.error.HTTPError:
+        pass  # already registered
+    return call(base_url, "POST", "/api/auth/login", form={"username": email, "password": password})["access_token"]
+
+
+def seed(base_url: str, token: str, tasks: int) -> tuple[int, list[int]]:
+    project = call(base_url, "POST", "/api/projects", token, body={"name": "Benchmark"})
+    task_ids = [
+        call(base_url, "POST", "/api/tasks", token, body={
+            "project_id": project["project_id"],
+            "name": f"Benchmark task {i}",
+            "priority": 1 + i % 5,
+            "tags": ["bench"],
+        })["task_id"]
+        for i in range(tasks)
+    ]
+    return project["project_id"], task_ids
+
+
+def run_scenario(base_url: str, name: str, request_fn, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id: int) -> None:
+        nonlocal errors
+        i = worker_id
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                request_fn(i)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors += 1
+            i += concurrency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def bench_target(base_url: str, args: argparse.Namespace) -> list[dict]:
+    token = login(base_url, args.email, args.password)
+    project_id, task_ids = seed(base_url, token, args.tasks)
+    statuses = ["NOT_STARTED", "PLANNING", "DEVELOPMENT", "TESTING", "FINISHED"]
+
+    scenarios = {
+        "list": lambda i: call(base_url, "GET", f"/api/tasks?project_id={project_id}&limit={args.page_size}", token),
+        "get": lambda i: call(base_url, "GET", f"/api/tasks/{task_ids[i % len(task_ids)]}", token),
+        "update": lambda i: call(base_url, "PATCH", f"/api/tasks/{task_ids[i % len(task_ids)]}", token,
+                                 body={"status": statuses[i % len(statuses)]}),
+    }
+    return [
+        run_scenario(base_url, name, fn, args.concurrency, args.duration)
+        for name, fn in scenarios.items()
+    ]
+
+
+SERVE_MODES = {"async": "app.main:app", "sync": "benchmarks.sync_app:app"}
+
+
+def serve(app_path: str, port: int) -> subprocess.Popen:
+    """Start uvicorn on ``app_path`` from backend/ and wait until it answers."""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        cwd=backend,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            call(f"http://127.0.0.1:{port}", "GET", "/api/health")
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise SystemExit(f"{app_path} did not start")
+            time.sleep(0.2)
+
+
+def report(label: str, results: list[dict]) -> None:
+    for result in results:
+        print(
+            f"{label:<10} {result['scenario']:<8} {result['requests']:>9} {result['errors']:>7} "
+            f"{result['rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", default=[], help="label=base_url, repeatable")
+    parser.add_argument("--serve", action="store_true", help="start the async and sync apps from this tree")
+    parser.add_argument("--port", type=int, default=8100, help="port for --serve")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="benchmark")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per scenario")
+    args = parser.parse_args()
+    if not args.target and not args.serve:
+        parser.error("give --serve or at least one --target")
+
+    print(f"{'target':<10} {'scenario':<8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    if args.serve:
+        # One server at a time, so they don't compete for CPU or connections
+        for label, app_path in SERVE_MODES.items():
+            server = serve(app_path, args.port)
+            try:
+                report(label, bench_target(f"http://127.0.0.1:{args.port}", args))
+            finally:
+                server.terminate()
+                server.wait()
+    for target in args.target:
+        label, base_url = target.split("=", 1)
+        report(label, bench_target(base_url.rstrip("/"), args))
+
+
+if __name__ == "__main__":
+    main()
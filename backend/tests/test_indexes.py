@@ -0,0 +1,75 @@
+"""The hot-path queries are planned on the indexes migrations 002, 003 and 012 build.
+
+Sequential scans are switched off for each EXPLAIN. The test tables are
+tiny, so otherwise the planner would rightly prefer them, and the test
+would prove nothing either way. With them off, a query that no index
+serves still falls back to a sequential scan and fails here.
+"""
+import json
+
+import pytest
+from sqlalchemy import text
+
+# (index the plan must use, query shaped like the one the API runs). A tuple
+# lists indexes that serve the query equally well; which one the planner
+# picks depends on the table's statistics
+CASES = [
+    (
+        "ix_task_project_priority_created",
+        "SELECT task_id FROM task WHERE project_id = 1 AND is_archived = false"
+        " ORDER BY priority DESC, created_at DESC, task_id DESC LIMIT 50",
+    ),
+    (
+        "ix_task_project_priority_created",
+        "SELECT task_id FROM task WHERE project_id = 1"
+        " ORDER BY priority DESC, created_at DESC, task_id DESC LIMIT 50",
+    ),
+    (
+        ("ix_task_project_assignee", "ix_task_assignee_id"),
+        "SELECT task_id FROM task WHERE project_id = 1 AND assignee_id = 1",
+    ),
+    ("ix_task_parent_task_id", "SELECT count(*) FROM task WHERE parent_task_id = 1"),
+    ("ix_task_assignee_id", "SELECT task_id FROM task WHERE assignee_id = 1"),
+    (
+        "ix_comment_task_created_id",
+        "SELECT comment_id FROM comment WHERE task_id = 1 ORDER BY created_at, comment_id LIMIT 50",
+    ),
+    (
+        "ix_comment_task_user_created_id",
+        "SELECT comment_id FROM comment WHERE task_id = 1 AND is_system_comment = false"
+        " ORDER BY created_at DESC, comment_id DESC LIMIT 50",
+    ),
+    ("ix_comment_attachment_comment_id", "SELECT attachment_id FROM comment_attachment WHERE comment_id = 1"),
+    ("ix_task_attachment_task_id", "SELECT attachment_id FROM task_attachment WHERE task_id = 1"),
+    (
+        "ix_task_status_history_task_changed",
+        "SELECT id FROM task_status_history WHERE task_id = 1 ORDER BY changed_at",
+    ),
+    ("ix_team_member_person_team", "SELECT team_id FROM team_member WHERE person_id = 1"),
+    ("ix_project_member_person_project", "SELECT project_id FROM project_member WHERE person_id = 1"),
+    ("ix_project_team_team_project", "SELECT project_id FROM project_team WHERE team_id = 1"),
+]
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+def _case_id(index) -> str:
+    return index if isinstance(index, str) else index[0]
+
+
+@pytest.mark.parametrize("index, query", CASES, ids=[f"{_case_id(index)}-{i}" for i, (index, _) in enumerate(CASES)])
+def test_query_uses_index(index, query):
+    from app.database import engine
+
+    accepted = {index} if isinstance(index, str) else set(index)
+    with engine.connect() as conn, conn.begin():
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    assert accepted & _index_names(plan[0]["Plan"]), json.dumps(plan, indent=2)
@@ -0,0 +1,64 @@
+"""The task endpoints load relations in a fixed number of queries, however many tasks they return."""
+# The current user, the access check and the task rows, then one query each
+# for tags, people, attachments and subtask counts; raise these deliberately,
+# never just to make a test pass
+LIST_TASKS_MAX_QUERIES = 8
+# GET loads the task in the access check and its relations onto it, behind
+# the task's key only
+GET_TASK_MAX_QUERIES = 7
+
+
+def _create_tasks(client, headers: dict, project_id: int, assignee_id: int, count: int) -> list[int]:
+    """Tasks with everything list_tasks loads: tags, an assignee, and a subtask each."""
+    task_ids = []
+    for i in range(count):
+        response = client.post("/api/tasks", json={
+            "project_id": project_id,
+            "name": f"Task {i}",
+            "assignee_id": assignee_id,
+            "tags": ["one", "two"],
+        }, headers=headers)
+        assert response.status_code == 201, response.text
+        task_ids.append(response.json()["task_id"])
+        response = client.post("/api/tasks", json={
+            "project_id": project_id,
+            "name": f"Subtask {i}",
+            "parent_task_id": task_ids[-1],
+        }, headers=headers)
+        assert response.status_code == 201, response.text
+    return task_ids
+
+
+def _list_query_count(client, headers: dict, project_id: int, count_queries: list) -> int:
+    # The first request fills the token and role caches
+    assert client.get("/api/tasks", params={"project_id": project_id}, headers=headers).status_code == 200
+    count_queries.clear()
+    response = client.get("/api/tasks", params={"project_id": project_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(count_queries)
+
+
+def test_list_tasks_query_count_does_not_grow_with_tasks(client, user, project_id, count_queries):
+    _create_tasks(client, user["headers"], project_id, user["person_id"], 2)
+    few = _list_query_count(client, user["headers"], project_id, count_queries)
+
+    _create_tasks(client, user["headers"], project_id, user["person_id"], 10)
+    many = _list_query_count(client, user["headers"], project_id, count_queries)
+
+    assert many == few, count_queries
+    assert many <= LIST_TASKS_MAX_QUERIES, count_queries
+
+
+def test_get_task_query_count(client, user, project_id, count_queries):
+    [task_id] = _create_tasks(client, user["headers"], project_id, user["person_id"], 1)
+    assert client.get(f"/api/tasks/{task_id}", headers=user["headers"]).status_code == 200
+
+    count_queries.clear()
+    response = client.get(f"/api/tasks/{task_id}", headers=user["headers"])
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["subtask_count"] == 1
+    assert sorted(tag["tag"] for tag in body["tags"]) == ["one", "two"]
+    assert body["assignee"]["person_id"] == user["person_id"]
+    assert len(count_queries) <= GET_TASK_MAX_QUERIES, count_queries
@@ -35,8 +35,11 @@ mkdir -p $BACKUP_DIR
 # Backup database
 docker exec nojira-db pg_dump -U nojira_user nojira | gzip > $BACKUP_DIR/db_$DATE.sql.gz
 
-# Backup uploads
-tar czf $BACKUP_DIR/uploads_$DATE.tar.gz -C /opt/nojira uploads 2>/dev/null || true
+# Backup uploads. Stored files are named by content hash and never change,
+# so each snapshot hard-links files already in the previous one and only
+# copies new uploads.
+LAST_UPLOADS=$(ls -1d $BACKUP_DIR/uploads_* 2>/dev/null | grep -v '\.tar\.gz$' | tail -n 1)
+rsync -a --delete --exclude tmp/ ${LAST_UPLOADS:+--link-dest=$LAST_UPLOADS} /opt/nojira/uploads/ $BACKUP_DIR/uploads_$DATE/ 2>/dev/null || true
 
 # Backup environment file
 cp /opt/nojira/.env $BACKUP_DIR/env_$DATE.backup 2>/dev/null || true
@@ -44,6 +47,7 @@ cp /opt/nojira/.env $BACKUP_DIR/env_$DATE.backup 2>/dev/null || true
 # Keep last 7 days
 find $BACKUP_DIR -name "db_*.sql.gz" -mtime +7 -delete
 find $BACKUP_DIR -name "uploads_*.tar.gz" -mtime +7 -delete
+find $BACKUP_DIR -maxdepth 1 -name "uploads_*" -type d -mtime +7 -exec rm -rf {} +
 find $BACKUP_DIR -name "env_*.backup" -mtime +7 -delete
 
 echo "$(date): Backup completed" >> $BACKUP_DIR/backup.log
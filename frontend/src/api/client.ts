@@ -6,10 +6,7 @@ class ApiError extends Error {
   }
 }
 
-async function request<T>(
-  endpoint: string,
-  options: RequestInit = {}
-): Promise<T> {
+async function send(endpoint: string, options: RequestInit = {}): Promise<Response> {
   const token = localStorage.getItem('token');
 
   const headers: HeadersInit = {
@@ -20,7 +17,11 @@ async function request<T>(
     (headers as Record<string, string>)['Authorization'] = `Bearer ${token}`;
   }
 
-  if (!(options.body instanceof FormData) && !(options.body instanceof URLSearchParams)) {
+  if (
+    !(options.body instanceof FormData) &&
+    !(options.body instanceof URLSearchParams) &&
+    !(headers as Record<string, string>)['Content-Type']
+  ) {
     (headers as Record<string, string>)['Content-Type'] = 'application/json';
   }
 
@@ -34,6 +35,15 @@ async function request<T>(
     throw new ApiError(response.status, error.detail || 'Request failed');
   }
 
+  return response;
+}
+
+async function request<T>(
+  endpoint: string,
+  options: RequestInit = {}
+): Promise<T> {
+  const response = await send(endpoint, options);
+
   if (response.status === 204) {
     return undefined as T;
   }
@@ -41,6 +51,144 @@ async function request<T>(
   return response.json();
 }
 
+// Follows X-Next-Cursor across keyset-paginated list endpoints.
+async function requestAllPages<T>(endpoint: string, params: URLSearchParams): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+
+  do {
+    if (cursor) params.set('cursor', cursor);
+    const response = await send(`${endpoint}?${params}`);
+    items.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return items;
+}
+
+// Reads a Server-Sent Events stream with fetch (EventSource can't send the
+// Authorization header) and reconnects from the last event id until stopped.
+function subscribeEvents(endpoint: string, onEvent: (type: string, data: unknown) => void): () => void {
+  const controller = new AbortController();
+  let lastEventId: string | null = null;
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = {};
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+        const response = await send(endpoint, { headers, signal: controller.signal });
+        const reader = response.body!.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let boundary;
+          while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let type = 'message';
+            let data = '';
+            for (const line of block.split('\n')) {
+              if (line.startsWith('id: ')) lastEventId = line.slice(4);
+              else if (line.startsWith('event: ')) type = line.slice(7);
+              else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onEvent(type, JSON.parse(data));
+          }
+        }
+      } catch {
+        if (controller.signal.aborted) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 3000));
+    }
+  };
+
+  connect();
+  return () => controller.abort();
+}
+
+interface DirectUpload {
+  upload_token: string;
+  url: string;
+  headers: Record<string, string>;
+}
+
+// Cleared once the server says uploads have to go through it (local storage).
+let directUploads = typeof crypto !== 'undefined' && !!crypto.subtle;
+
+async function sha256Hex(file: File): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+// PUTs the file straight to object storage when the server offers that;
+// null means it has to be POSTed to the API instead.
+async function uploadDirect<T>(endpoint: string, file: File): Promise<T | null> {
+  if (!directUploads) return null;
+  let ticket: DirectUpload;
+  try {
+    ticket = await request<DirectUpload>(`${endpoint}/direct`, {
+      method: 'POST',
+      body: JSON.stringify({ file_name: file.name, file_size: file.size, sha256: await sha256Hex(file) }),
+    });
+  } catch (e) {
+    if (e instanceof ApiError && e.status === 409) {
+      directUploads = false;
+      return null;
+    }
+    throw e;
+  }
+  const upload = await fetch(ticket.url, { method: 'PUT', headers: ticket.headers, body: file });
+  if (!upload.ok) throw new ApiError(upload.status, 'Upload to storage failed');
+  return request<T>(`${endpoint}/direct/complete`, {
+    method: 'POST',
+    body: JSON.stringify({ upload_token: ticket.upload_token }),
+  });
+}
+
+const RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024;
+const RESUMABLE_MAX_RETRIES = 5;
+
+// Sends the file in chunks over the tus protocol. After a failed chunk it
+// asks the server how much arrived and carries on from there. Returns the
+// new attachment's id.
+async function uploadResumable(endpoint: string, file: File): Promise<number> {
+  const tus = { 'Tus-Resumable': '1.0.0' };
+  const name = btoa(String.fromCharCode(...new TextEncoder().encode(file.name)));
+  const created = await send(`${endpoint}/resumable`, {
+    method: 'POST',
+    headers: { ...tus, 'Upload-Length': String(file.size), 'Upload-Metadata': `filename ${name}` },
+  });
+  const location = created.headers.get('Location')!.slice(API_BASE.length);
+
+  let offset = 0;
+  let failures = 0;
+  for (;;) {
+    try {
+      if (failures) {
+        await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+        const head = await send(location, { method: 'HEAD', headers: tus });
+        offset = Number(head.headers.get('Upload-Offset'));
+      }
+      const response = await send(location, {
+        method: 'PATCH',
+        headers: { ...tus, 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+        body: file.slice(offset, offset + RESUMABLE_CHUNK_SIZE),
+      });
+      const attachmentId = response.headers.get('X-Attachment-Id');
+      if (attachmentId) return Number(attachmentId);
+      offset = Number(response.headers.get('Upload-Offset'));
+      failures = 0;
+    } catch (e) {
+      // Network errors, server errors and offset conflicts are worth retrying
+      const retryable = !(e instanceof ApiError) || e.status >= 500 || e.status === 409 || e.status === 423;
+      if (!retryable || ++failures > RESUMABLE_MAX_RETRIES) throw e;
+    }
+  }
+}
+
 export const api = {
   // Auth
   register: (data: { name: string; email: string; password: string; nickname?: string }) =>
@@ -69,6 +217,17 @@ export const api = {
   getProject: (id: number) =>
     request<import('./client').ProjectWithDetails>(`/projects/${id}`),
 
+  // The browser revalidates with If-None-Match, so an unchanged board is a 304
+  getBoard: (projectId: number, filters?: { assignee_id?: number; severity?: number }) => {
+    const params = new URLSearchParams();
+    if (filters?.assignee_id) params.append('assignee_id', String(filters.assignee_id));
+    if (filters?.severity) params.append('severity', String(filters.severity));
+    return request<import('./client').ProjectBoard>(`/projects/${projectId}/board?${params}`);
+  },
+
+  subscribeProjectEvents: (projectId: number, onEvent: (type: string, data: unknown) => void) =>
+    subscribeEvents(`/projects/${projectId}/events`, onEvent),
+
   createProject: (data: { name: string; description?: string }) =>
     request<import('./client').Project>('/projects', {
       method: 'POST',
@@ -100,6 +259,11 @@ export const api = {
   listPeople: (search?: string) =>
     request<import('./client').Person[]>(`/auth/people${search ? `?search=${encodeURIComponent(search)}` : ''}`),
 
+  typeaheadPeople: (q: string, limit = 10) =>
+    request<import('./client').PersonBrief[]>(
+      `/auth/people/typeahead?q=${encodeURIComponent(q)}&limit=${limit}`
+    ),
+
   // Teams
   listTeams: () => request<import('./client').Team[]>('/teams'),
 
@@ -118,7 +282,7 @@ export const api = {
     if (filters?.status) params.append('status', filters.status);
     if (filters?.assignee_id) params.append('assignee_id', String(filters.assignee_id));
     if (filters?.severity) params.append('severity', String(filters.severity));
-    return request<import('./client').Task[]>(`/tasks?${params}`);
+    return requestAllPages<import('./client').Task>('/tasks', params);
   },
 
   getTask: (id: number) => request<import('./client').Task>(`/tasks/${id}`),
@@ -159,8 +323,14 @@ export const api = {
     request(`/tasks/${id}`, { method: 'DELETE' }),
 
   // Comments
-  listComments: (taskId: number) =>
-    request<import('./client').Comment[]>(`/comments/task/${taskId}`),
+  // One page, newest first; pass the returned cursor to get older comments
+  listComments: async (taskId: number, cursor?: string | null) => {
+    const params = new URLSearchParams({ newest_first: 'true' });
+    if (cursor) params.set('cursor', cursor);
+    const response = await send(`/comments/task/${taskId}?${params}`);
+    const comments: import('./client').Comment[] = await response.json();
+    return { comments, nextCursor: response.headers.get('X-Next-Cursor') };
+  },
 
   createComment: (taskId: number, text: string) =>
     request<import('./client').Comment>('/comments', {
@@ -178,21 +348,30 @@ export const api = {
     request(`/comments/${id}`, { method: 'DELETE' }),
 
   // Attachments
-  uploadTaskAttachment: (taskId: number, file: File) => {
+  uploadTaskAttachment: async (taskId: number, file: File) => {
+    const endpoint = `/attachments/task/${taskId}`;
+    const direct = await uploadDirect<{ attachment_id: number }>(endpoint, file);
+    if (direct) return direct;
+    if (file.size > RESUMABLE_CHUNK_SIZE) {
+      return { attachment_id: await uploadResumable(endpoint, file) };
+    }
     const formData = new FormData();
     formData.append('file', file);
-    return request<{ attachment_id: number }>(`/attachments/task/${taskId}`, {
+    return request<{ attachment_id: number }>(endpoint, {
       method: 'POST',
       body: formData,
     });
   },
 
-  downloadTaskAttachment: (attachmentId: number) =>
-    `${API_BASE}/attachments/task/${attachmentId}/download`,
+  // Plain links can't carry the token, so fetch a short-lived signed URL first
+  downloadTaskAttachment: async (attachmentId: number) => {
+    const { url } = await request<{ url: string }>(`/attachments/task/${attachmentId}/link`);
+    window.location.assign(url);
+  },
 
   deleteTaskAttachment: (attachmentId: number) =>
     request(`/attachments/task/${attachmentId}`, { method: 'DELETE' }),
 };
 
 // Re-export types for convenience
-export type { Person, Project, ProjectWithDetails, Team, TeamWithMembers, Task, Comment } from '../types';
+export type { Person, PersonBrief, Project, ProjectWithDetails, ProjectBoard, Team, TeamWithMembers, Task, Comment } from '../types';
@@ -11,7 +11,7 @@ import {
   useSensors,
 } from '@dnd-kit/core';
 import { api } from '../api/client';
-import type { Task, TaskStatus, Project, PersonBrief, ProjectWithDetails } from '../types';
+import type { BoardCard, Task, TaskStatus, Project, PersonBrief, ProjectWithDetails } from '../types';
 import { KanbanColumn } from './KanbanColumn';
 import { TaskDrawer } from './TaskDrawer';
 import { TaskCard } from './TaskCard';
@@ -30,13 +30,15 @@ interface Props {
 }
 
 export function KanbanBoard({ project }: Props) {
-  const [tasks, setTasks] = useState<Task[]>([]);
+  const [tasks, setTasks] = useState<BoardCard[]>([]);
+  // Cards beyond the per-column limit, counted by the server but not loaded
+  const [hiddenCounts, setHiddenCounts] = useState<Partial<Record<TaskStatus, number>>>({});
   const [selectedTask, setSelectedTask] = useState<Task | null>(null);
   const [loading, setLoading] = useState(true);
   const [showCreate, setShowCreate] = useState(false);
   const [showSettings, setShowSettings] = useState(false);
   const [newTaskName, setNewTaskName] = useState('');
-  const [activeTask, setActiveTask] = useState<Task | null>(null);
+  const [activeTask, setActiveTask] = useState<BoardCard | null>(null);
   const [filters, setFilters] = useState<{
     status?: TaskStatus;
     assignee_id?: number;
@@ -55,25 +57,51 @@ export function KanbanBoard({ project }: Props) {
 
   useEffect(() => {
     loadTasks();
-    loadProjectMembers();
   }, [project.project_id, filters]);
 
+  // Refetch the board when collaborators change it; a burst of events
+  // becomes one request, and an unchanged board revalidates as a 304.
+  useEffect(() => {
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = api.subscribeProjectEvents(project.project_id, () => {
+      clearTimeout(timer);
+      timer = setTimeout(refreshBoard, 300);
+    });
+    return () => {
+      clearTimeout(timer);
+      unsubscribe();
+    };
+  }, [project.project_id, filters]);
+
+  const refreshBoard = async () => {
+    const board = await api.getBoard(project.project_id, filters);
+    setTasks(board.columns.flatMap((c) => c.tasks));
+    setHiddenCounts(
+      Object.fromEntries(board.columns.map((c) => [c.status, c.count - c.tasks.length]))
+    );
+    setMembers(board.members.map((m) => m.person));
+  };
+
   const loadTasks = async () => {
     setLoading(true);
     try {
-      const data = await api.listTasks(project.project_id, filters);
-      setTasks(data);
+      await refreshBoard();
     } finally {
       setLoading(false);
     }
   };
 
-  const loadProjectMembers = async () => {
+  const loadProjectDetails = async () => {
     const projectData = await api.getProject(project.project_id);
     setProjectDetails(projectData);
     setMembers(projectData.members.map((m) => m.person));
   };
 
+  const openSettings = async () => {
+    await loadProjectDetails();
+    setShowSettings(true);
+  };
+
   const handleDragStart = (event: DragStartEvent) => {
     const task = tasks.find((t) => t.task_id === event.active.id);
     if (task) {
@@ -148,9 +176,9 @@ export function KanbanBoard({ project }: Props) {
     setSelectedTask(task);
   };
 
-  const handleTaskClick = (task: Task) => {
+  const handleTaskClick = async (card: BoardCard) => {
     if (!activeTask) {
-      setSelectedTask(task);
+      setSelectedTask(await api.getTask(card.task_id));
     }
   };
 
@@ -228,7 +256,7 @@ export function KanbanBoard({ project }: Props) {
           <button className="btn-primary" onClick={() => setShowCreate(true)}>
             + Create Task
           </button>
-          <button className="btn-secondary" onClick={() => setShowSettings(true)}>
+          <button className="btn-secondary" onClick={openSettings}>
             Settings
           </button>
         </div>
@@ -273,6 +301,7 @@ export function KanbanBoard({ project }: Props) {
                 key={column.status}
                 status={column.status}
                 title={column.title}
+                count={getTasksByStatus(column.status).length + (hiddenCounts[column.status] ?? 0)}
                 tasks={getTasksByStatus(column.status)}
                 onTaskClick={handleTaskClick}
               />
@@ -305,7 +334,7 @@ export function KanbanBoard({ project }: Props) {
           project={projectDetails}
           onClose={() => setShowSettings(false)}
           onUpdate={() => {
-            loadProjectMembers();
+            loadProjectDetails();
           }}
         />
       )}
@@ -1,23 +1,24 @@
 import { useDroppable } from '@dnd-kit/core';
 import { SortableContext, verticalListSortingStrategy } from '@dnd-kit/sortable';
-import type { Task, TaskStatus } from '../types';
+import type { BoardCard, TaskStatus } from '../types';
 import { TaskCard } from './TaskCard';
 
 interface Props {
   status: TaskStatus;
   title: string;
-  tasks: Task[];
-  onTaskClick: (task: Task) => void;
+  count: number;
+  tasks: BoardCard[];
+  onTaskClick: (task: BoardCard) => void;
 }
 
-export function KanbanColumn({ status, title, tasks, onTaskClick }: Props) {
+export function KanbanColumn({ status, title, count, tasks, onTaskClick }: Props) {
   const { setNodeRef, isOver } = useDroppable({ id: status });
 
   return (
     <div className={`kanban-column ${isOver ? 'drag-over' : ''}`}>
       <div className="column-header">
         <h3>{title}</h3>
-        <span className="task-count">{tasks.length}</span>
+        <span className="task-count">{count}</span>
       </div>
       <div ref={setNodeRef} className="column-content">
         <SortableContext
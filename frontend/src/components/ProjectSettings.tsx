@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { api } from '../api/client';
-import type { ProjectWithDetails, Person, ProjectRole } from '../types';
+import type { ProjectWithDetails, PersonBrief, ProjectRole } from '../types';
 
 interface Props {
   project: ProjectWithDetails;
@@ -9,19 +9,31 @@ interface Props {
 }
 
 export function ProjectSettings({ project, onClose, onUpdate }: Props) {
-  const [allPeople, setAllPeople] = useState<Person[]>([]);
+  const [matches, setMatches] = useState<PersonBrief[]>([]);
   const [searchTerm, setSearchTerm] = useState('');
   const [loading, setLoading] = useState(false);
   const [activeTab, setActiveTab] = useState<'members' | 'settings'>('members');
 
   useEffect(() => {
-    loadPeople();
-  }, []);
-
-  const loadPeople = async () => {
-    const people = await api.listPeople();
-    setAllPeople(people);
-  };
+    const term = searchTerm.trim();
+    if (!term) {
+      setMatches([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const people = await api.typeaheadPeople(term);
+        if (!cancelled) setMatches(people);
+      } catch (error) {
+        console.error('Failed to search people:', error);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
 
   const handleAddMember = async (personId: number, role: ProjectRole = 'MEMBER') => {
     setLoading(true);
@@ -61,12 +73,7 @@ export function ProjectSettings({ project, onClose, onUpdate }: Props) {
   };
 
   const memberIds = new Set(project.members.map((m) => m.person.person_id));
-  const filteredPeople = allPeople.filter(
-    (p) =>
-      !memberIds.has(p.person_id) &&
-      (p.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        p.email.toLowerCase().includes(searchTerm.toLowerCase()))
-  );
+  const filteredPeople = matches.filter((p) => !memberIds.has(p.person_id));
 
   return (
     <div className="modal-overlay" onClick={onClose}>
@@ -1,9 +1,9 @@
 import { useSortable } from '@dnd-kit/sortable';
 import { CSS } from '@dnd-kit/utilities';
-import type { Task } from '../types';
+import type { BoardCard } from '../types';
 
 interface Props {
-  task: Task;
+  task: BoardCard;
   onClick: () => void;
   isDragOverlay?: boolean;
 }
@@ -78,6 +78,11 @@ export function TaskCard({ task, onClick, isDragOverlay }: Props) {
             )}
           </div>
         )}
+        {task.comment_count > 0 && (
+          <span className="comment-count" title={`${task.comment_count} comments`}>
+            {task.comment_count}
+          </span>
+        )}
         {task.due_date && (
           <span className="due-date">
             {new Date(task.due_date).toLocaleDateString()}
@@ -13,7 +13,9 @@ interface Props {
 const STATUSES: TaskStatus[] = ['NOT_STARTED', 'PLANNING', 'DEVELOPMENT', 'TESTING', 'FINISHED'];
 
 export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props) {
+  // Oldest first for display; loaded newest first, a page at a time
   const [comments, setComments] = useState<Comment[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const [newComment, setNewComment] = useState('');
   const [editing, setEditing] = useState(false);
   const [editForm, setEditForm] = useState({
@@ -31,8 +33,15 @@ export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props
   }, [task.task_id]);
 
   const loadComments = async () => {
-    const data = await api.listComments(task.task_id);
-    setComments(data);
+    const page = await api.listComments(task.task_id);
+    setComments(page.comments.reverse());
+    setOlderCursor(page.nextCursor);
+  };
+
+  const loadOlderComments = async () => {
+    const page = await api.listComments(task.task_id, olderCursor);
+    setComments([...page.comments.reverse(), ...comments]);
+    setOlderCursor(page.nextCursor);
   };
 
   const handleSave = async () => {
@@ -63,6 +72,7 @@ export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props
     const comment = await api.createComment(task.task_id, newComment);
     setComments([...comments, comment]);
     setNewComment('');
+    onUpdate({ ...task, comment_count: task.comment_count + 1 });
   };
 
   const handleFileUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -236,9 +246,11 @@ export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props
               {task.attachments.map((a) => (
                 <li key={a.attachment_id}>
                   <a
-                    href={api.downloadTaskAttachment(a.attachment_id)}
-                    target="_blank"
-                    rel="noopener noreferrer"
+                    href="#"
+                    onClick={(e) => {
+                      e.preventDefault();
+                      api.downloadTaskAttachment(a.attachment_id);
+                    }}
                   >
                     {a.file_name}
                   </a>
@@ -248,7 +260,7 @@ export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props
           </div>
 
           <div className="comments-section">
-            <h4>Comments ({comments.length})</h4>
+            <h4>Comments ({task.comment_count})</h4>
 
             <form onSubmit={handleAddComment} className="comment-form">
               <textarea
@@ -261,6 +273,11 @@ export function TaskDrawer({ task, members, onClose, onUpdate, onDelete }: Props
             </form>
 
             <div className="comment-list">
+              {olderCursor && (
+                <button type="button" className="load-older" onClick={loadOlderComments}>
+                  Show older comments
+                </button>
+              )}
               {comments.map((comment) => (
                 <div
                   key={comment.comment_id}
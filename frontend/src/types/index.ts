@@ -65,6 +65,7 @@ export interface TaskAttachment {
   attachment_id: number;
   file_name: string;
   file_type: string;
+  file_size?: number | null;
   uploaded_by: number;
   uploaded_at: string;
 }
@@ -89,12 +90,37 @@ export interface Task {
   creator?: PersonBrief;
   attachments: TaskAttachment[];
   subtask_count: number;
+  comment_count: number;
+}
+
+export interface BoardCard {
+  task_id: number;
+  name: string;
+  status: TaskStatus;
+  assignee?: PersonBrief;
+  priority: number;
+  severity: number;
+  tags: TaskTag[];
+  comment_count: number;
+}
+
+export interface BoardColumn {
+  status: TaskStatus;
+  count: number;
+  tasks: BoardCard[];
+}
+
+export interface ProjectBoard {
+  project_id: number;
+  columns: BoardColumn[];
+  members: ProjectMember[];
 }
 
 export interface CommentAttachment {
   attachment_id: number;
   file_name: string;
   file_type: string;
+  file_size?: number | null;
   uploaded_at: string;
 }
 